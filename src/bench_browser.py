@@ -0,0 +1,217 @@
+import os
+import sys
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from utils_parse import *
+from utils_browser import *
+from bench_parse import load_fixtures
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark del renderizado de páginas de búsqueda: un navegador con scroll + sleep(2) (scraper anterior)
+# frente al pool de navegadores con bloqueo de recursos y condición de página lista.
+# Las páginas se sirven en local (stub HTTP): páginas guardadas search_*.html o sintéticas, con imágenes,
+# CSS, fuentes y un script "de terceros" lentos servidos desde otro puerto; comprueba que ambos extraen
+# los mismos libros y muestra páginas/segundo.
+# Antes, sin Chrome, comprueba el reparto de navegadores del pool con un driver simulado: más hilos que huecos,
+# creación de navegadores que falla y navegadores que se rompen; ningún hilo debe quedarse esperando.
+# uso: python bench_browser.py [dir_fixtures] [tamaño_pool]
+
+ASSET_DELAY = 0.5
+PAGES = 6
+
+# recursos pesados que se añaden a cada página servida (como en Goodreads: portadas, CSS, fuentes, analítica)
+def _assets(asset_port, page):
+    host = f"http://127.0.0.1:{asset_port}"
+    covers = "".join(f"<img src='{host}/covers/{page}-{i}.jpg'>" for i in range(10))
+    return (f"<link rel='stylesheet' href='{host}/site.css'>"
+            f"<style>@font-face {{font-family: x; src: url('{host}/font.woff2');}} body {{font-family: x;}}</style>"
+            f"<script src='{host}/tracker.js'></script>{covers}")
+
+class Asset(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(ASSET_DELAY)
+        body = b"/* */" if not self.path.endswith(".jpg") else b"\xff\xd8\xff"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+# servidor de páginas de búsqueda (/search?...&page=n) y servidor de recursos lentos, en puertos libres
+def serve(pages):
+    assets = ThreadingHTTPServer(("127.0.0.1", 0), Asset)
+    asset_port = assets.server_address[1]
+
+    class Search(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)
+            n = int(query.get("page", ["1"])[0])
+            if not 1 <= n <= len(pages):
+                body = b"<html><body><p>No results.</p></body></html>"
+            else:
+                body = pages[n - 1].replace("<body>", "<body>" + _assets(asset_port, n), 1).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    search = ThreadingHTTPServer(("127.0.0.1", 0), Search)
+    for server in (assets, search):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return search, assets
+
+# scraper anterior: un único navegador, carga completa, scroll y sleep(2) antes de esperar a a.bookTitle
+def legacy_render(urls):
+    options = Options()
+    for arg in ("--headless", "--disable-gpu", "--no-sandbox", "--disable-dev-shm-usage"):
+        options.add_argument(arg)
+    driver = webdriver.Chrome(options=options)
+    try:
+        html = []
+        for url in urls:
+            driver.get(url)
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            time.sleep(2)
+            WebDriverWait(driver, 20).until(lambda d: d.find_elements(By.CSS_SELECTOR, "a.bookTitle"))
+            html.append(driver.page_source)
+        return html
+    finally:
+        driver.quit()
+
+def pool_render(urls, size, block_urls):
+    pool = BrowserPool(size=size, make_driver=lambda: chrome_driver(block_urls=block_urls))
+    try:
+        # arranque de los navegadores fuera de la medida: en el scraper se reutilizan durante toda la ejecución
+        pool.render_many([urls[0]] * size)
+        t0 = time.perf_counter()
+        html = pool.render_many(urls)
+        return html, time.perf_counter() - t0, pool.summary()
+    finally:
+        pool.close()
+
+# driver simulado: get() devuelve una página fija o rompe el navegador si la URL contiene "crash"
+class FakeDriver:
+    def __init__(self):
+        self.page_source = ""
+
+    def get(self, url):
+        if "crash" in url:
+            raise WebDriverException("navegador roto")
+        time.sleep(0.01)
+        self.page_source = f"<html><body><a class='bookTitle' href='{url}'>x</a></body></html>"
+
+    def find_elements(self, by, selector):
+        return [1]
+
+    def execute_script(self, script):
+        return "complete"
+
+    def quit(self):
+        pass
+
+# reparto del pool con `threads` hilos sobre `size` huecos; make_driver falla en los intentos indicados
+def check_pool(size, threads, urls, failing_starts=()):
+    attempts = []
+    lock = threading.Lock()
+
+    def make_driver():
+        with lock:
+            attempts.append(1)
+            n = len(attempts)
+        # arrancar un navegador lleva tiempo: mientras, los demás hilos ya esperan un hueco
+        time.sleep(0.05)
+        if n in failing_starts:
+            raise RuntimeError(f"arranque {n} fallido")
+        return FakeDriver()
+
+    pool = BrowserPool(size=size, make_driver=make_driver, ready_timeout=1)
+    results = [None] * len(urls)
+
+    def worker(k):
+        for i in range(k, len(urls), threads):
+            try:
+                results[i] = pool.render(urls[i])
+            except Exception as e:
+                results[i] = e
+    workers = [threading.Thread(target=worker, args=(k,), daemon=True) for k in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join(timeout=10)
+    hung = sum(t.is_alive() for t in workers)
+    summary = pool.summary()
+    pool.close()
+    return hung, results, summary
+
+def pool_checks():
+    urls = [f"http://stub/search?page={i}" for i in range(12)]
+    checks = {}
+    # todos los arranques fallan: cada hilo recibe el error, ninguno se bloquea
+    hung, results, _ = check_pool(2, 4, urls[:4], failing_starts=range(1, 100))
+    checks["make_driver siempre falla, 4 hilos / 2 huecos: nadie espera para siempre"] = (
+        hung == 0 and all(isinstance(r, RuntimeError) for r in results))
+    # fallan los dos primeros arranques: el resto de páginas se renderiza con navegadores nuevos
+    hung, results, summary = check_pool(2, 4, urls, failing_starts=(1, 2))
+    checks["fallan 2 arranques, 4 hilos / 2 huecos: las demás páginas se renderizan"] = (
+        hung == 0 and sum(isinstance(r, str) for r in results) >= len(urls) - 2 and summary["started"] <= 2)
+    # navegadores que se rompen: se descartan y se sustituyen sin bloquear a los demás hilos
+    crashy = [u + ("&crash" if i % 3 == 0 else "") for i, u in enumerate(urls)]
+    hung, results, summary = check_pool(2, 5, crashy)
+    checks["navegadores rotos, 5 hilos / 2 huecos: se sustituyen"] = (
+        hung == 0 and all(isinstance(r, str) for i, r in enumerate(results) if i % 3)
+        and summary["discarded"] == 4 and summary["alive"] <= 2)
+    for name, ok in checks.items():
+        print(f"{'OK   ' if ok else 'FALLO'} {name}")
+    return all(checks.values())
+
+def books_of(html, base_url):
+    return [parse_search_page(h, "html.parser", base_url=base_url, limit=15)["books"] for h in html]
+
+if __name__ == "__main__":
+    if not pool_checks():
+        sys.exit(1)
+    fixtures = sys.argv[1] if len(sys.argv) > 1 else None
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else int(os.getenv('BROWSER_POOL_SIZE', '2'))
+    search_pages, _ = load_fixtures(fixtures)
+    search_pages = search_pages[:PAGES]
+    search, assets = serve(search_pages)
+    base_url = f"http://127.0.0.1:{search.server_address[1]}"
+    urls = [page_url(base_url, "/search?q=data+science", n) for n in range(1, len(search_pages) + 1)]
+    # el puerto de los recursos hace de dominio de terceros
+    block_urls = BLOCKED_URLS + [f"*127.0.0.1:{assets.server_address[1]}/*.js"]
+
+    try:
+        t0 = time.perf_counter()
+        legacy = legacy_render(urls)
+        legacy_s = time.perf_counter() - t0
+        pooled, pooled_s, summary = pool_render(urls, size, block_urls)
+    except WebDriverException as e:
+        print(f"[WARN] No se pudo arrancar Chrome/chromedriver: {str(e).splitlines()[0]}")
+        sys.exit(1)
+    finally:
+        search.shutdown()
+        assets.shutdown()
+
+    failed = [u for u, h in zip(urls, pooled) if isinstance(h, Exception)]
+    assert not failed, f"ERROR: páginas no renderizadas por el pool: {failed}"
+    same = books_of(legacy, base_url) == books_of(pooled, base_url)
+    print(f"{'modo':32} | {'páginas':>7} | {'s':>7} | {'pág/s':>6}")
+    print(f"{'1 navegador, scroll + sleep(2)':32} | {len(urls):7d} | {legacy_s:7.2f} | {len(urls) / legacy_s:6.2f}")
+    print(f"{f'pool x{size}, bloqueo + listo':32} | {len(urls):7d} | {pooled_s:7.2f} | {len(urls) / pooled_s:6.2f}")
+    print(f"pool: {summary}")
+    print("libros extraídos:", "idénticos" if same else "DISTINTOS")
+    sys.exit(0 if same else 1)
@@ -0,0 +1,302 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from bench_ingest import GB_FIELDS
+from bench_incremental import make_project
+from bench_fuzzy_match import COMMON, FIRST, LAST
+from utils_parquet import read_table
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark reproducible de la integración sobre catálogos sintéticos (sin red): genera landings Goodreads JSON +
+# Google Books CSV con tasas de coincidencia (isbn13 / isbn10 / título+autor), duplicados y fechas, idiomas y
+# monedas sucias controladas; ejecuta integrate_pipeline.py (o run_pipeline.py) en un proyecto temporal y anota
+# tiempo, RSS pico y filas/s, total y por etapa (perfil de utils_profile), en un archivo de resultados JSONL
+# uso: python bench_catalogue.py [--sizes 1k,100k,1M,10M] [--seed 0] [--rates fuzzy=0.3,...] [--runner]
+#      [--env DTYPE_PLAN=compact,...] [--repeat N] [--results ruta] [--data-dir ruta]
+# los resultados van por defecto a ../cache/bench_results.jsonl (cache/ está fuera de git)
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+GENERATOR_VERSION = 1
+
+# tasas por defecto; las de coincidencia son fracciones de los libros Goodreads (el resto no está en Google Books)
+DEFAULT_RATES = {
+    "isbn13": 0.45,          # Goodreads con isbn13 presente en Google Books
+    "isbn10": 0.15,          # Goodreads solo con isbn10 presente en Google Books
+    "fuzzy": 0.15,           # Goodreads sin ISBN; Google Books con título/autor parecidos
+    "gr_duplicate": 0.03,    # registros Goodreads repetidos (otra URL, mismo libro)
+    "gb_duplicate": 0.02,    # filas Google Books repetidas para el mismo ISBN
+    "gb_only": 0.10,         # filas Google Books sin registro Goodreads (fracción de n)
+    "messy_date": 0.30,      # fechas en formatos no ISO, vacías o inválidas
+    "messy_language": 0.30,  # idiomas como "eng", "English", "es-ES"...
+    "messy_currency": 0.30,  # monedas como "$", "€", "usd"...
+    "hyphen_isbn": 0.10,     # ISBN con guiones en Goodreads
+    "missing_title": 0.02,   # Goodreads sin título (la calidad exige ≥90%)
+}
+
+N_RARE_WORDS = 50000
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+          "November", "December"]
+LANGS = [("en", ["eng", "English", "en-US", "EN"]), ("es", ["spa", "Spanish", "es-ES"]), ("fr", ["fre", "fr-FR"]),
+         ("de", ["ger", "German"])]
+CURRENCIES = [("USD", ["$", "US$", "usd"]), ("EUR", ["€", "eur", "Euro"]), ("GBP", ["£", "gbp"])]
+PUBLISHERS = ["O'Reilly Media", "Packt Publishing", "Manning", "Wiley", "MIT Press", "No Starch Press", ""]
+CATEGORIES = ["Computers", "Science", "Mathematics", "Business & Economics", ""]
+
+def parse_size(text):
+    text = text.strip().lower()
+    mult = {"k": 1000, "m": 1000000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * mult)
+
+# dígito de control ISBN-13 / ISBN-10 para un núcleo de 9 dígitos
+def isbn13_of(core):
+    digits = "978" + core
+    check = (10 - sum(int(d) * (1 if k % 2 == 0 else 3) for k, d in enumerate(digits)) % 10) % 10
+    return digits + str(check)
+
+def isbn10_of(core):
+    check = (11 - sum(int(d) * (10 - k) for k, d in enumerate(core)) % 11) % 11
+    return core + ("X" if check == 10 else str(check))
+
+def hyphenate13(isbn):
+    return f"{isbn[:3]}-{isbn[3]}-{isbn[4:8]}-{isbn[8:12]}-{isbn[12]}"
+
+# generador de libros: títulos con palabras frecuentes + vocabulario amplio, ISBN únicos y válidos por índice
+class Catalogue:
+    def __init__(self, seed, rates):
+        self.rnd = random.Random(seed)
+        self.seed = seed
+        self.rates = rates
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        self.rare = ["".join(self.rnd.choice(letters) for _ in range(self.rnd.randint(4, 9)))
+                     for _ in range(N_RARE_WORDS)]
+
+    # núcleo de 9 dígitos distinto para cada libro (permutación de los índices: 7919 es primo con 10^9)
+    def core(self, book):
+        return f"{(book * 7919 + self.seed * 104729) % 10**9:09d}"
+
+    def book(self, book):
+        rnd = self.rnd
+        words = [rnd.choice(COMMON) for _ in range(rnd.randint(1, 2))] + \
+                [rnd.choice(self.rare) for _ in range(rnd.randint(1, 3))]
+        rnd.shuffle(words)
+        core = self.core(book)
+        return {
+            "title": " ".join(words).title(),
+            "subtitle": rnd.choice(["A Practical Guide", "An Introduction", "Second Edition", "", ""]),
+            "author": f"{rnd.choice(FIRST)} {rnd.choice(LAST)}",
+            "isbn13": isbn13_of(core),
+            "isbn10": isbn10_of(core),
+        }
+
+    def pub_date(self):
+        rnd = self.rnd
+        y, m, d = rnd.randint(1970, 2025), rnd.randint(1, 12), rnd.randint(1, 28)
+        if rnd.random() >= self.rates["messy_date"]:
+            return rnd.choice([f"{y}", f"{y}-{m:02d}", f"{y}-{m:02d}-{d:02d}"])
+        return rnd.choice([f"{MONTHS[m - 1]} {d}, {y}", f"{y}/{m:02d}/{d:02d}", f"{d} {MONTHS[m - 1][:3]} {y}",
+                           f"{y}-{m}", f"{y}-{m:02d}-{d:02d}T00:00:00", "", "unknown"])
+
+    def variant(self, pairs, rate):
+        code, variants = self.rnd.choice(pairs)
+        return self.rnd.choice(variants) if self.rnd.random() < rate else code
+
+    # fila Google Books del libro (título y autores canónicos; las variantes van en el registro Goodreads)
+    def gb_row(self, gb_id, b):
+        rnd = self.rnd
+        has_price = rnd.random() < 0.6
+        return {
+            "gb_id": f"GB{gb_id:010d}", "title": b["title"], "subtitle": b["subtitle"], "authors": b["author"],
+            "publisher": rnd.choice(PUBLISHERS), "pub_date": self.pub_date(),
+            "language": self.variant(LANGS, self.rates["messy_language"]), "categories": rnd.choice(CATEGORIES),
+            "isbn13": b["isbn13"], "isbn10": b["isbn10"],
+            "price_amount": f"{rnd.uniform(5, 90):.2f}" if has_price else "",
+            "price_currency": self.variant(CURRENCIES, self.rates["messy_currency"]) if has_price else "",
+        }
+
+    def gr_record(self, i, b, isbn13=None, isbn10=None, title=None):
+        rnd = self.rnd
+        if isbn13 and rnd.random() < self.rates["hyphen_isbn"]:
+            isbn13 = hyphenate13(isbn13)
+        return {
+            "title": None if rnd.random() < self.rates["missing_title"] else (title or b["title"]),
+            "author": b["author"],
+            "rating": round(rnd.uniform(1, 5), 2) if rnd.random() > 0.05 else None,
+            "ratings_count": rnd.randint(0, 90000) if rnd.random() > 0.05 else None,
+            "book_url": f"https://www.goodreads.com/book/show/{i}-{b['isbn13'][-6:]}",
+            "isbn10": isbn10, "isbn13": isbn13,
+        }
+
+# escribe el landing (registro a registro, memoria constante) y devuelve los contadores por tipo de registro
+def write_catalogue(dirname, n, seed=0, rates=None):
+    rates = {**DEFAULT_RATES, **(rates or {})}
+    assert rates["isbn13"] + rates["isbn10"] + rates["fuzzy"] <= 1, "ERROR: las tasas de coincidencia suman más de 1"
+    cat = Catalogue(seed, rates)
+    rnd = cat.rnd
+    counts = {"goodreads_rows": 0, "googlebooks_rows": 0, "isbn13": 0, "isbn10": 0, "fuzzy": 0, "unmatched": 0,
+              "gr_duplicates": 0, "gb_duplicates": 0, "gb_only": 0}
+    gb_id = 0
+    os.makedirs(dirname, exist_ok=True)
+    with open(os.path.join(dirname, "goodreads_books.json"), "w", encoding="utf-8") as fj, \
+         open(os.path.join(dirname, "googlebooks_books.csv"), "w", encoding="utf-8", newline="") as fc:
+        fj.write('{"metadata": {"source": "synthetic", "seed": %d}, "data": [\n' % seed)
+        writer = csv.DictWriter(fc, fieldnames=GB_FIELDS)
+        writer.writeheader()
+
+        def emit_gr(rec):
+            fj.write(("," if counts["goodreads_rows"] else "") + json.dumps(rec, ensure_ascii=False) + "\n")
+            counts["goodreads_rows"] += 1
+
+        def emit_gb(row):
+            nonlocal gb_id
+            writer.writerow(row)
+            gb_id += 1
+            counts["googlebooks_rows"] += 1
+
+        for i in range(n):
+            b = cat.book(i)
+            u = rnd.random()
+            if u < rates["isbn13"]:
+                kind, rec = "isbn13", cat.gr_record(i, b, isbn13=b["isbn13"])
+            elif u < rates["isbn13"] + rates["isbn10"]:
+                kind, rec = "isbn10", cat.gr_record(i, b, isbn10=b["isbn10"])
+            elif u < rates["isbn13"] + rates["isbn10"] + rates["fuzzy"]:
+                # Goodreads añade el subtítulo al título y no trae ISBN
+                title = f"{b['title']}: {b['subtitle']}" if b["subtitle"] else b["title"]
+                kind, rec = "fuzzy", cat.gr_record(i, b, title=title)
+            else:
+                # sin correspondencia: ISBN propio que Google Books no conoce, o sin ISBN
+                kind, rec = "unmatched", cat.gr_record(i, b, isbn13=b["isbn13"] if rnd.random() < 0.5 else None)
+            counts[kind] += 1
+            emit_gr(rec)
+            if rnd.random() < rates["gr_duplicate"]:
+                dup = dict(rec, book_url=rec["book_url"] + "-dup", rating=None)
+                emit_gr(dup)
+                counts["gr_duplicates"] += 1
+
+            if kind != "unmatched":
+                emit_gb(cat.gb_row(gb_id, b))
+                if rnd.random() < rates["gb_duplicate"]:
+                    emit_gb(cat.gb_row(gb_id, b))
+                    counts["gb_duplicates"] += 1
+            if rnd.random() < rates["gb_only"]:
+                emit_gb(cat.gb_row(gb_id, cat.book(n + i)))
+                counts["gb_only"] += 1
+        fj.write("]}")
+    return counts
+
+def dir_mb(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2**20
+
+# landing en caché por (n, semilla, tasas, versión del generador): los tamaños grandes se generan una sola vez
+def cached_landing(data_dir, n, seed, rates):
+    key = hashlib.sha1(json.dumps([GENERATOR_VERSION, n, seed, rates], sort_keys=True).encode()).hexdigest()[:12]
+    root = os.path.join(data_dir, f"catalogue_{n}_{key}")
+    manifest = os.path.join(root, "catalogue.json")
+    if not os.path.exists(manifest):
+        shutil.rmtree(root, ignore_errors=True)
+        t0 = time.perf_counter()
+        counts = write_catalogue(os.path.join(root, "landing"), n, seed, rates)
+        info = {"n": n, "seed": seed, "rates": rates, "generator_version": GENERATOR_VERSION, "counts": counts,
+                "generate_s": round(time.perf_counter() - t0, 2)}
+        with open(manifest, "w", encoding="utf-8") as fh:
+            json.dump(info, fh, indent=2)
+    with open(manifest, "r", encoding="utf-8") as fh:
+        return os.path.join(root, "landing"), json.load(fh)
+
+# ejecuta el script en un proyecto temporal con el landing enlazado; RSS pico del hijo con wait4 (Linux/macOS)
+def run_integration(landing, env_overrides, runner=False):
+    root = make_project(tempfile.mkdtemp(prefix="bench_catalogue_"))
+    try:
+        os.rmdir(os.path.join(root, "landing"))
+        os.symlink(os.path.abspath(landing), os.path.join(root, "landing"))
+        env = dict(os.environ, LANDING_DIR="../landing", DOCS_DIR="../docs", STANDARD_DIR="../standard",
+                   INTEGRATE_MODE="full", INTEGRATE_STATE_DIR="../cache/integrate",
+                   PIPELINE_STATE_DIR="../cache/pipeline", PROFILE_TRACE_PATH="../cache/pipeline_trace.jsonl",
+                   **env_overrides)
+        cmd = ["run_pipeline.py", "--skip", "scrape,enrich"] if runner else ["integrate_pipeline.py"]
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable] + cmd, cwd=os.path.join(root, "src"), env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        peak_mb = None
+        if hasattr(os, "wait4"):
+            stderr = proc.stderr.read()
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss en kB en Linux y en bytes en macOS
+            peak_mb = usage.ru_maxrss / (2**20 if sys.platform == "darwin" else 1024)
+        else:
+            stderr = proc.communicate()[1]
+        wall = time.perf_counter() - t0
+        if proc.returncode != 0:
+            print(stderr[-3000:])
+            raise RuntimeError(f"{cmd[0]} falló con código {proc.returncode}")
+
+        with open(os.path.join(root, "docs", "ingest_summary.json"), "r", encoding="utf-8") as fh:
+            summary = json.load(fh)
+        gb_id = read_table(os.path.join(root, "standard", "book_source_detail.parquet"), columns=["gb_id"])["gb_id"]
+        return {"wall_s": round(wall, 3), "peak_rss_mb": round(peak_mb, 1) if peak_mb is not None else None,
+                "counts": summary.get("counts"), "gb_match_ratio": round(float(gb_id.notna().mean()), 4),
+                "stages": summary.get("profile", {}).get("integrate_pipeline", {}).get("stages", [])}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def parse_pairs(text, cast=str):
+    return {k.strip(): cast(v) for k, v in (p.split("=", 1) for p in text.split(",") if p.strip())}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de integración sobre catálogos sintéticos")
+    parser.add_argument("--sizes", default="1k,100k", help="libros Goodreads por catálogo, ej. 1k,100k,1M,10M")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rates", default="", help="tasas del generador, ej. isbn13=0.3,fuzzy=0.3")
+    parser.add_argument("--env", default="", help="configuración de la integración, ej. DTYPE_PLAN=compact")
+    parser.add_argument("--runner", action="store_true", help="ejecutar run_pipeline.py --skip scrape,enrich")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--results", default="../cache/bench_results.jsonl")
+    parser.add_argument("--data-dir", default="../cache/bench")
+    args = parser.parse_args()
+
+    rates = {**DEFAULT_RATES, **parse_pairs(args.rates, float)}
+    env_overrides = parse_pairs(args.env)
+    revision = git_revision()
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+
+    print(f"{'filas':>9} | {'landing MB':>10} | {'total s':>8} | {'filas/s':>9} | {'RSS pico MB':>11} | "
+          f"{'coinc. GB':>9} | etapas (s)")
+    for n in [parse_size(s) for s in args.sizes.split(",") if s.strip()]:
+        landing, info = cached_landing(args.data_dir, n, args.seed, rates)
+        rows_in = info["counts"]["goodreads_rows"] + info["counts"]["googlebooks_rows"]
+        for rep in range(args.repeat):
+            res = run_integration(landing, env_overrides, runner=args.runner)
+            for st in res["stages"]:
+                st["rows_per_s"] = round(st["rows_in"] / st["wall_s"]) if st.get("rows_in") and st["wall_s"] else None
+            record = {
+                "timestamp": datetime.now(timezone.utc).isoformat(), "git_revision": revision,
+                "script": "run_pipeline" if args.runner else "integrate_pipeline", "n": n, "seed": args.seed,
+                "repeat": rep, "rates": rates, "env": env_overrides, "generator": info["counts"],
+                "landing_mb": round(dir_mb(landing), 1), "rows_in": rows_in,
+                "rows_per_s": round(rows_in / res["wall_s"]), **res,
+            }
+            with open(args.results, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+            stages = " ".join(f"{s['stage']}={s['wall_s']:.2f}" for s in res["stages"])
+            print(f"{n:9d} | {record['landing_mb']:10.1f} | {res['wall_s']:8.2f} | {record['rows_per_s']:9d} | "
+                  f"{res['peak_rss_mb'] if res['peak_rss_mb'] is not None else float('nan'):11.0f} | "
+                  f"{res['gb_match_ratio']:9.3f} | {stages}")
+    print(f"\nResultados añadidos a {args.results}")
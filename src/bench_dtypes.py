@@ -0,0 +1,89 @@
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+from utils_dtypes import *
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Informe de memoria de book_source_detail y dim_book: columnas object y listas Python (versión anterior)
+# vs plan de tipos compactos de utils_dtypes; memory_usage(deep=True) cuenta cada str por fila aunque sea compartido
+# uso: python bench_dtypes.py [filas]
+
+FILES = ["goodreads_books.json", "googlebooks_books.csv"]
+
+def pick(rng, options, n, p_null=0.0):
+    values = np.array(options, dtype=object)[rng.integers(0, len(options), n)]
+    values[rng.random(n) < p_null] = None
+    return values
+
+# book_source_detail sintético con los tipos que produce integrate_pipeline (object en texto e ISBN)
+def make_detail(n, seed=0):
+    rng = np.random.default_rng(seed)
+    isbn13 = (9780000000000 + rng.permutation(n)).astype(str).astype(object)
+    isbn13[rng.random(n) < 0.3] = None
+    has_gb = rng.random(n) < 0.7
+    gb = lambda values: np.where(has_gb, values, None)
+    titles = np.array([f"Title {i % 200000} - a practical guide" for i in range(n)], dtype=object)
+    years = rng.integers(1950, 2026, n).astype(str).astype(object)
+    return pd.DataFrame({
+        "src_id": [f"goodreads:{i}" for i in range(n)],
+        "__source": "goodreads",
+        "title_gr": titles,
+        "author": [f"Author {i % 50000}" for i in range(n)],
+        "rating": np.round(rng.uniform(1, 5, n), 2),
+        "ratings_count": rng.integers(0, 100000, n).astype(float),
+        "book_url": [f"https://www.goodreads.com/book/show/{i}" for i in range(n)],
+        "isbn10_gr": np.where(pd.isna(isbn13), None, pd.Series(isbn13).str[3:]),
+        "isbn13": isbn13,
+        "gb_id": gb([f"gb{i:09d}" for i in range(n)]),
+        "title": gb(titles),
+        "subtitle": gb(pick(rng, ["Second edition", "A primer", None], n)),
+        "authors": gb([f"Author {i % 50000}" for i in range(n)]),
+        "publisher": gb(pick(rng, ["O'Reilly Media", "Packt", "Manning", "Wiley"], n)),
+        "pub_date": gb(years),
+        "language": gb(pick(rng, ["en", "es", "fr", "de"], n)),
+        "categories": gb(pick(rng, ["Computers", "Science", "Mathematics"], n)),
+        "isbn10": gb(pd.Series(isbn13).str[3:].to_numpy(dtype=object)),
+        "price_amount": np.where(has_gb, np.round(rng.uniform(5, 80, n), 2), np.nan),
+        "price_currency": gb(pick(rng, ["USD", "EUR"], n)),
+        "prov_title": np.where(has_gb, "google_books", "goodreads").astype(object),
+        "prov_authors": np.where(has_gb, "google_books", "goodreads").astype(object),
+        "prov_price": gb(np.full(n, "google_books", dtype=object)),
+        "pub_date_iso": gb(years),
+        "language_norm": gb(pick(rng, ["en", "es", "fr", "de"], n)),
+        "price_currency_norm": gb(pick(rng, ["USD", "EUR"], n)),
+        "ingest_ts": "2025-01-01T00:00:00+00:00",
+        "source_files": pd.Categorical.from_codes(np.zeros(n, dtype="int8"), categories=[json.dumps(FILES)]),
+        "canonical_isbn13": isbn13,
+        "canonical_id": np.where(pd.isna(isbn13), [f"synth:{i:016x}" for i in range(n)], isbn13),
+    })
+
+def make_dim_book(detail):
+    dim = detail[["canonical_id", "isbn13", "isbn10", "gb_id", "title", "subtitle", "authors", "publisher",
+                  "pub_date", "language", "categories", "price_amount", "price_currency", "rating",
+                  "ratings_count"]].copy()
+    dim["ratings_count"] = dim["ratings_count"].astype(object)
+    dim["source_ids"] = [[s] for s in detail["src_id"]]
+    dim["ingest_ts"] = detail["ingest_ts"]
+    return dim
+
+def report(name, before, after):
+    rb, ra = memory_report(before), memory_report(after)
+    print(f"\n{name}: {rb['rows']} filas | {rb['total_bytes'] / 1e6:8.1f} MB -> {ra['total_bytes'] / 1e6:8.1f} MB "
+          f"({rb['total_bytes'] / ra['total_bytes']:.1f}x)")
+    print(f"{'columna':20} | {'tipo compacto':22} | {'antes MB':>8} | {'después MB':>10}")
+    for c in before.columns:
+        print(f"{c:20} | {str(after[c].dtype)[:22]:22} | {rb['columns'][c] / 1e6:8.1f} | {ra['columns'][c] / 1e6:10.1f}")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    detail = make_detail(n)
+    dim = make_dim_book(detail)
+    for name, frame in [("book_source_detail", detail), ("dim_book", dim)]:
+        t0 = time.perf_counter()
+        compact = apply_dtype_plan(frame)
+        t_plan = time.perf_counter() - t0
+        report(name, frame, compact)
+        print(f"apply_dtype_plan: {t_plan:.2f} s")
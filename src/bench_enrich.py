@@ -0,0 +1,194 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import tempfile
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from bench_incremental import make_project
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Comprobación y benchmark del enriquecimiento por lotes (GOOGLEBOOKS_BATCH_SIZE) contra una API Google Books
+# simulada en local: el CSV debe ser idéntico al del modo de una petición por libro, cada libro debe recibir el
+# volumen que declara su ISBN, una ejecución interrumpida (kill -9) debe reanudarse sin repetir los tramos ya escritos,
+# y se comparan peticiones y tiempo.
+# uso: python bench_enrich.py [libros] [tamaño_lote]
+
+SEED = 7
+
+# catálogo simulado: volúmenes con ISBN-13/ISBN-10 (algunos con guiones) y los libros del landing que los buscan:
+# por ISBN-13, solo por ISBN-10, ISBN sin volumen en la API, ISBN repetidos y solo título+autor
+def make_catalogue(n, seed=SEED):
+    rnd = random.Random(seed)
+    volumes, books, expected = [], [], []
+    for i in range(n):
+        isbn13 = str(9781000000000 + i * 7)
+        isbn10 = f"{100000000 + i:09d}X" if i % 11 == 0 else f"{1000000000 + i:010d}"
+        vol = {"id": f"gb{i}", "volumeInfo": {
+            "title": f"Volume {i}", "authors": [f"Author {i % 50}"], "publishedDate": "2020-01-02",
+            "language": "en", "industryIdentifiers": [
+                {"type": "ISBN_13", "identifier": isbn13 if i % 9 else f"{isbn13[:3]}-{isbn13[3:]}"},
+                {"type": "ISBN_10", "identifier": isbn10}]},
+            "saleInfo": {}}
+        kind = rnd.random()
+        book = {"title": f"Volume {i}", "author": f"Author {i % 50}", "isbn10": None, "isbn13": None}
+        if kind < 0.60:
+            book["isbn13"] = isbn13
+        elif kind < 0.70:
+            book["isbn10"] = isbn10
+        elif kind < 0.80:
+            # ISBN que la API no conoce
+            book["isbn13"] = str(9799000000000 + i)
+            vol = None
+        elif kind < 0.85 and books:
+            # mismo ISBN que un libro anterior
+            j = rnd.randrange(len(books))
+            book = dict(books[j])
+            vol = expected[j]
+        if vol is not None and vol not in volumes:
+            volumes.append(vol)
+        books.append(book)
+        expected.append(vol)
+    return volumes, books, expected
+
+def isbns_of(vol):
+    return {x["identifier"].replace("-", "").upper() for x in vol["volumeInfo"]["industryIdentifiers"]}
+
+# API simulada: q=isbn:A OR isbn:B ... devuelve los volúmenes que declaran esos ISBN en orden aleatorio
+# (más un volumen ajeno si hay alguno, que en las búsquedas por lote sale primero) y respeta maxResults;
+# q=intitle:...+inauthor:... busca por título exacto
+def serve(volumes):
+    by_isbn = {i: v for v in volumes for i in isbns_of(v)}
+    by_title = {v["volumeInfo"]["title"].lower(): v for v in volumes}
+    decoy = {"id": "decoy", "volumeInfo": {"title": "Unrelated", "industryIdentifiers": [
+        {"type": "ISBN_13", "identifier": "9780000000002"}]}, "saleInfo": {}}
+    calls = {"requests": 0, "delay": 0.0}
+    lock = threading.Lock()
+
+    class Api(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                calls["requests"] += 1
+            time.sleep(calls["delay"])
+            params = parse_qs(urlsplit(self.path).query)
+            q = params.get("q", [""])[0]
+            ids = [p.strip()[5:].replace("-", "").upper() for p in q.split(" OR ") if p.strip().startswith("isbn:")]
+            if ids:
+                items = list(dict.fromkeys(id(by_isbn[i]) for i in ids if i in by_isbn))
+                items = [v for v in volumes if id(v) in items]
+                random.Random(q).shuffle(items)
+                if items:
+                    items = [decoy] + items if len(ids) > 1 else items + [decoy]
+            else:
+                title = q.split("intitle:")[-1].split(" inauthor:")[0].strip().lower()
+                items = [by_title[title]] if title in by_title else []
+            items = items[:int(params.get("maxResults", ["10"])[0])]
+            body = json.dumps({"totalItems": len(items), "items": items} if items else {"totalItems": 0}).encode()
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # cliente terminado a mitad de la prueba de interrupción
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Api)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, calls
+
+def enrich_env(port, batch_size, cache_path="", chunk_books=500):
+    return dict(os.environ, LANDING_DIR="../landing", DOCS_DIR="../docs", GOOGLEBOOKS_BATCH_SIZE=str(batch_size),
+                GOOGLEBOOKS_API_URL=f"http://127.0.0.1:{port}/books/v1/volumes?", GOOGLEBOOKS_RATE_PER_SEC="0",
+                GOOGLEBOOKS_CACHE_PATH=cache_path, GOOGLEBOOKS_CHUNK_BOOKS=str(chunk_books), PROFILE_TRACE_PATH="")
+
+def run_enrich(root, port, batch_size, cache_path="", chunk_books=500):
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "enrich_googlebooks.py"], cwd=os.path.join(root, "src"),
+                         env=enrich_env(port, batch_size, cache_path, chunk_books), capture_output=True, text=True)
+    if out.returncode != 0:
+        print(out.stdout[-2000:], out.stderr[-2000:])
+        raise RuntimeError("enrich_googlebooks.py falló")
+    with open(os.path.join(root, "landing", "googlebooks_books.csv"), encoding="utf-8") as fh:
+        rows = list(csv.DictReader(fh))
+    return rows, time.perf_counter() - t0
+
+# lanza el enriquecimiento y lo mata (SIGKILL) cuando ha confirmado al menos `min_done` libros;
+# devuelve los libros confirmados y si quedó un CSV final (no debería)
+def interrupted_enrich(root, port, batch_size, chunk_books, min_done):
+    progress_path = os.path.join(root, "landing", "googlebooks_books.csv.progress.json")
+    proc = subprocess.Popen([sys.executable, "enrich_googlebooks.py"], cwd=os.path.join(root, "src"),
+                            env=enrich_env(port, batch_size, chunk_books=chunk_books),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    done = 0
+    while proc.poll() is None and done < min_done:
+        time.sleep(0.01)
+        try:
+            with open(progress_path, encoding="utf-8") as fh:
+                done = json.load(fh)["done"]
+        except (OSError, ValueError, KeyError):
+            pass
+    proc.kill()
+    proc.wait()
+    return done, os.path.exists(os.path.join(root, "landing", "googlebooks_books.csv"))
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    volumes, books, expected = make_catalogue(n)
+    server, calls = serve(volumes)
+    port = server.server_address[1]
+
+    with tempfile.TemporaryDirectory() as root:
+        make_project(root)
+        with open(os.path.join(root, "landing", "goodreads_books.json"), "w", encoding="utf-8") as fh:
+            json.dump({"metadata": {}, "data": books}, fh)
+
+        results = {}
+        for label, size in [("1 petición por libro", 1), (f"lotes de {batch_size}", batch_size)]:
+            before = calls["requests"]
+            rows, secs = run_enrich(root, port, size)
+            results[label] = (rows, calls["requests"] - before, secs)
+
+        # segunda pasada por lotes con caché: no debe hacer ninguna petición
+        cache_path = os.path.join(root, "cache", "gb.sqlite")
+        run_enrich(root, port, batch_size, cache_path)
+        before = calls["requests"]
+        cached_rows, _ = run_enrich(root, port, batch_size, cache_path)
+        cached_requests = calls["requests"] - before
+
+        # interrupción a mitad (peticiones lentas, tramos pequeños) y reanudación
+        os.remove(os.path.join(root, "landing", "googlebooks_books.csv"))
+        calls["delay"] = 0.01
+        killed_at, published = interrupted_enrich(root, port, batch_size, chunk_books=25, min_done=len(books) // 2)
+        calls["delay"] = 0.0
+        before = calls["requests"]
+        resumed_rows, _ = run_enrich(root, port, batch_size, chunk_books=25)
+        resumed_requests = calls["requests"] - before
+    server.shutdown()
+
+    single, batched = (r[0] for r in results.values())
+    want = [v["id"] for v in expected if v is not None]
+    print(f"{'modo':22} | {'libros':>6} | {'peticiones':>10} | {'s':>6} | {'filas':>5}")
+    for label, (rows, requests, secs) in results.items():
+        print(f"{label:22} | {len(books):6d} | {requests:10d} | {secs:6.2f} | {len(rows):5d}")
+    checks = {
+        "CSV idéntico al modo de una petición por libro": single == batched,
+        "cada libro recibe el volumen de su ISBN": [r["gb_id"] for r in batched] == want,
+        "caché: segunda pasada sin peticiones y mismo CSV": cached_requests == 0 and cached_rows == batched,
+        f"reanudación tras kill -9 en el libro {killed_at}: mismo CSV, {resumed_requests} peticiones en la reanudación":
+            not published and 0 < killed_at < len(books) and resumed_rows == batched
+            and resumed_requests < results[f"lotes de {batch_size}"][1],
+    }
+    for name, ok in checks.items():
+        print(f"{'OK   ' if ok else 'FALLO'} {name}")
+    sys.exit(0 if all(checks.values()) else 1)
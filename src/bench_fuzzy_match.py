@@ -0,0 +1,79 @@
+import sys
+import time
+import random
+from utils_match import *
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark del emparejamiento aproximado título+autor: "scan" (lineal) vs "blocking" (índice)
+# uso: python bench_fuzzy_match.py [1000,10000,100000,1000000]
+
+COMMON = [
+    "data", "science", "python", "machine", "learning", "deep", "business", "statistics", "the", "of",
+    "for", "handbook", "guide", "practical", "introduction", "analytics", "cloud", "big", "smart", "thinking",
+]
+N_RARE_WORDS = 50000
+FIRST = ["John", "Joel", "Sandra", "Cathy", "Hadley", "Jake", "Alex", "Foster", "Annalyn", "Mine"]
+LAST = ["Grus", "Matz", "O'Neil", "Wickham", "VanderPlas", "Gutman", "Provost", "Ng", "Kelleher", "Foreman"]
+N_QUERIES = 1000
+SCAN_LIMIT = 10000
+
+# genera un catálogo sintético de Google Books: palabras frecuentes + vocabulario amplio de palabras raras
+def make_catalogue(n, rnd):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    rare = ["".join(rnd.choice(letters) for _ in range(rnd.randint(4, 9))) for _ in range(N_RARE_WORDS)]
+    titles, authors = [], []
+    for _ in range(n):
+        words = [rnd.choice(COMMON) for _ in range(rnd.randint(1, 2))] + [rnd.choice(rare) for _ in range(rnd.randint(1, 3))]
+        rnd.shuffle(words)
+        titles.append(" ".join(words).title())
+        authors.append(f"{rnd.choice(FIRST)} {rnd.choice(LAST)}")
+    return titles, authors
+
+# consultas estilo Goodreads: título con subtítulo, título truncado, una sola palabra (o parte de ella, también más
+# corta que el n-grama) o sin coincidencia
+def make_queries(titles, authors, rnd):
+    queries = []
+    for _ in range(N_QUERIES):
+        j = rnd.randrange(len(titles))
+        kind = rnd.random()
+        if kind < 0.4:
+            t = f"{titles[j]}: A Practical Guide"
+        elif kind < 0.65:
+            t = titles[j][: max(4, len(titles[j]) - 3)]
+        elif kind < 0.8:
+            word = rnd.choice(titles[j].split(" "))
+            t = word[rnd.randrange(2):][: rnd.randint(2, len(word))]
+        else:
+            t = f"Unknown Book {rnd.random()}"
+        queries.append((t.lower().strip(), authors[j].lower().strip()))
+    return queries
+
+def run(n):
+    rnd = random.Random(n)
+    titles, authors = make_catalogue(n, rnd)
+    queries = make_queries(titles, authors, rnd)
+
+    t0 = time.perf_counter()
+    index = build_title_index(titles, authors)
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    blocked = [match_title_author(index, t, a) for t, a in queries]
+    block_s = time.perf_counter() - t0
+
+    scan_s = None
+    if n <= SCAN_LIMIT:
+        t0 = time.perf_counter()
+        scanned = [match_title_author_scan(titles, authors, t, a) for t, a in queries]
+        scan_s = time.perf_counter() - t0
+        assert scanned == blocked, "blocking y scan difieren"
+
+    scan_txt = f"{scan_s * 1000 / N_QUERIES:9.3f}" if scan_s is not None else "        -"
+    print(f"{n:>9} | {build_s:8.2f} | {block_s * 1000 / N_QUERIES:9.3f} | {scan_txt}")
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1000, 10000, 100000, 1000000]
+    print("  gb_rows | build(s) | block ms/q |  scan ms/q")
+    for n in sizes:
+        run(n)
@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import subprocess
+import pandas as pd
+from bench_ingest import write_landing
+from utils_parquet import read_table
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Comprobación y benchmark de la integración incremental (INTEGRATE_MODE=incremental)
+# uso: python bench_incremental.py [filas]
+# tras cada cambio del landing, la salida incremental debe ser idéntica (salvo ingest_ts) a una reconstrucción completa
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUTS = ["dim_book", "book_source_detail"]
+
+# proyecto temporal con la misma estructura que el repositorio (src/ se ejecuta con rutas relativas)
+def make_project(root):
+    shutil.copytree(SRC_DIR, os.path.join(root, "src"), ignore=shutil.ignore_patterns("__pycache__"))
+    for d in ["landing", "docs", "standard"]:
+        os.makedirs(os.path.join(root, d), exist_ok=True)
+    return root
+
+def run_pipeline(root, mode):
+    env = dict(os.environ, INTEGRATE_MODE=mode, LANDING_DIR="../landing/", DOCS_DIR="../docs",
+               STANDARD_DIR="../standard", INTEGRATE_STATE_DIR="../cache/integrate")
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "integrate_pipeline.py"], cwd=os.path.join(root, "src"),
+                         env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        print(out.stdout[-2000:], out.stderr[-2000:])
+        raise RuntimeError("integrate_pipeline.py falló")
+    lines = [l for l in out.stdout.splitlines() if l.startswith(("Integración", "Registros", "canonical_id"))]
+    return time.perf_counter() - t0, lines
+
+def read_outputs(root):
+    return {f: read_table(os.path.join(root, "standard", f + ".parquet")).drop(columns=["ingest_ts"]) for f in OUTPUTS}
+
+def sync_landing(src_root, dst_root):
+    dst = os.path.join(dst_root, "landing")
+    shutil.rmtree(dst)
+    shutil.copytree(os.path.join(src_root, "landing"), dst)
+
+def edit_goodreads(root, fn):
+    path = os.path.join(root, "landing", "goodreads_books.json")
+    with open(path, "r", encoding="utf-8") as fh:
+        payload = json.load(fh)
+    fn(payload["data"])
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh)
+
+def new_record(i, rnd):
+    return {"title": f"New book {i}: {rnd.random()}", "author": f"Author {i % 5000}", "rating": 3.5,
+            "ratings_count": None, "book_url": f"https://www.goodreads.com/book/show/new-{i}",
+            "isbn10": None, "isbn13": str(9780000000000 + i) if i % 2 else None}
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rnd = random.Random(n)
+
+    def append_and_edit(data):
+        for i in rnd.sample(range(len(data)), max(1, len(data) // 200)):
+            data[i]["title"] = data[i]["title"] + " (2nd edition)"
+            data[i]["rating"] = 4.99
+        data.extend(new_record(len(data) + k, rnd) for k in range(max(1, len(data) // 100)))
+
+    def delete_tail(data):
+        del data[-max(1, len(data) // 50):]
+
+    def delete_middle(data):
+        del data[len(data) // 2]
+
+    def edit_googlebooks(root):
+        path = os.path.join(root, "landing", "googlebooks_books.csv")
+        df = pd.read_csv(path, dtype=str)
+        df.loc[::97, "price_amount"] = "12.5"
+        df.to_csv(path, index=False)
+
+    steps = [
+        ("inicial", None),
+        ("sin cambios", lambda root: None),
+        ("append + edición GR", lambda root: edit_goodreads(root, append_and_edit)),
+        ("borrado al final GR", lambda root: edit_goodreads(root, delete_tail)),
+        ("borrado en medio GR", lambda root: edit_goodreads(root, delete_middle)),
+        ("cambio Google Books", edit_googlebooks),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inc = make_project(os.path.join(tmp, "incremental"))
+        full = make_project(os.path.join(tmp, "full"))
+        # 2/3 de los registros con isbn13, el resto se empareja por título + autor
+        write_landing(os.path.join(inc, "landing"), n)
+        print(f"{n} registros por fuente")
+        print("paso                  | full s | incremental s | resultado")
+        for name, change in steps:
+            if change is not None:
+                change(inc)
+            sync_landing(inc, full)
+            t_full, _ = run_pipeline(full, "full")
+            t_inc, lines = run_pipeline(inc, "incremental")
+            a, b = read_outputs(inc), read_outputs(full)
+            for f in OUTPUTS:
+                pd.testing.assert_frame_equal(a[f], b[f], check_dtype=True)
+            print(f"{name:21} | {t_full:6.1f} | {t_inc:13.1f} | idéntico ({'; '.join(lines)})")
@@ -0,0 +1,134 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import shutil
+import resource
+import tempfile
+import subprocess
+import pandas as pd
+from utils_ingest import *
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark de memoria de la ingesta del landing: carga completa vs streaming por lotes
+# uso: python bench_ingest.py [filas] [chunk_rows]
+# cada modo se ejecuta en un proceso aparte para medir su pico de RSS de forma aislada; después se mide la
+# integración completa (integrate_pipeline.py) con LANDING_MODE=full y stream, que debe dar las mismas salidas
+
+GB_FIELDS = ["gb_id", "title", "subtitle", "authors", "publisher", "pub_date", "language", "categories",
+             "isbn13", "isbn10", "price_amount", "price_currency"]
+
+# escribe un landing sintético de n filas (JSON Goodreads + CSV Google Books), registro a registro
+def write_landing(dirname, n):
+    rnd = random.Random(n)
+    with open(os.path.join(dirname, "goodreads_books.json"), "w", encoding="utf-8") as fh:
+        fh.write('{"metadata": {"records": %d}, "data": [\n' % n)
+        for i in range(n):
+            rec = {
+                "title": f"Book title number {i}: a subtitle", "author": f"Author {i % 5000}",
+                "rating": round(rnd.uniform(1, 5), 2), "ratings_count": rnd.randint(0, 90000),
+                "book_url": f"https://www.goodreads.com/book/show/{i}-book",
+                "isbn10": None, "isbn13": str(9780000000000 + i) if i % 3 else None,
+            }
+            fh.write(("," if i else "") + json.dumps(rec) + "\n")
+        fh.write("]}")
+    with open(os.path.join(dirname, "googlebooks_books.csv"), "w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=GB_FIELDS)
+        writer.writeheader()
+        for i in range(n):
+            writer.writerow({
+                "gb_id": f"GB{i:09d}", "title": f"Book title number {i}", "subtitle": "a subtitle",
+                "authors": f"Author {i % 5000}", "publisher": "Publisher", "pub_date": "2020-01-01",
+                "language": "en", "categories": "Computers", "isbn13": str(9780000000000 + i),
+                "isbn10": str(1000000000 + i), "price_amount": "" if i % 2 else "9.99", "price_currency": "EUR",
+            })
+
+# carga anterior: json.load del archivo completo + read_csv completo
+def load_full(dirname, chunk_rows):
+    with open(os.path.join(dirname, "goodreads_books.json"), "r", encoding="utf-8") as fh:
+        df_json = pd.DataFrame(json.load(fh)["data"])
+    df_csv = pd.read_csv(os.path.join(dirname, "googlebooks_books.csv"))
+    return df_json, df_csv
+
+# carga en streaming: lotes de chunk_rows con tipos explícitos
+def load_stream(dirname, chunk_rows):
+    df_json = pd.concat(iter_json_batches(os.path.join(dirname, "goodreads_books.json"), chunk_rows), ignore_index=True)
+    df_csv = pd.concat(iter_csv_chunks(os.path.join(dirname, "googlebooks_books.csv"), chunk_rows), ignore_index=True)
+    return df_json, df_csv
+
+# solo el lector: cada lote se consume y se descarta (pico acotado por chunk_rows)
+def scan_stream(dirname, chunk_rows):
+    rows = 0
+    for batch in iter_json_batches(os.path.join(dirname, "goodreads_books.json"), chunk_rows):
+        rows += len(batch)
+    for chunk in iter_csv_chunks(os.path.join(dirname, "googlebooks_books.csv"), chunk_rows):
+        rows += len(chunk)
+    return rows
+
+# integración completa en un proyecto temporal con el landing enlazado: segundos, pico de RSS del proceso
+# (wait4, Linux/macOS) y salidas
+def run_integration(dirname, landing_mode, chunk_rows):
+    from bench_incremental import make_project, read_outputs
+    root = make_project(tempfile.mkdtemp(prefix="bench_ingest_"))
+    try:
+        os.rmdir(os.path.join(root, "landing"))
+        os.symlink(os.path.abspath(dirname), os.path.join(root, "landing"))
+        env = dict(os.environ, LANDING_DIR="../landing/", DOCS_DIR="../docs", STANDARD_DIR="../standard",
+                   INTEGRATE_MODE="full", LANDING_MODE=landing_mode, LANDING_CHUNK_ROWS=str(chunk_rows),
+                   DIM_BOOK_INDEX="0", PROFILE_TRACE_PATH="")
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "integrate_pipeline.py"], cwd=os.path.join(root, "src"), env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        stderr = proc.stderr.read()
+        _, status, usage = os.wait4(proc.pid, 0)
+        if os.waitstatus_to_exitcode(status) != 0:
+            print(stderr[-3000:])
+            raise RuntimeError("integrate_pipeline.py falló")
+        # ru_maxrss en kB en Linux y en bytes en macOS
+        peak_mib = usage.ru_maxrss / (2**20 if sys.platform == "darwin" else 1024)
+        return time.perf_counter() - t0, peak_mib, read_outputs(root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def child(mode, dirname, chunk_rows):
+    t0 = time.perf_counter()
+    if mode == "reader":
+        scan_stream(dirname, chunk_rows)
+        frames_mib = 0.0
+    else:
+        df_json, df_csv = (load_full if mode == "full" else load_stream)(dirname, chunk_rows)
+        frames_mib = (df_json.memory_usage(deep=True).sum() + df_csv.memory_usage(deep=True).sum()) / 2**20
+    elapsed = time.perf_counter() - t0
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"mode": mode, "seconds": elapsed, "peak_rss_mib": peak_mib, "frames_mib": frames_mib}))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        sys.exit(0)
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    chunk_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    with tempfile.TemporaryDirectory() as dirname:
+        write_landing(dirname, n)
+        size_mib = sum(os.path.getsize(os.path.join(dirname, f)) for f in os.listdir(dirname)) / 2**20
+        print(f"{n} filas por fuente, landing {size_mib:.0f} MiB, chunk {chunk_rows}")
+        print("mode   | seconds | peak RSS MiB | frames MiB")
+        # full/stream materializan los DataFrames finales; reader mide solo la lectura por lotes
+        for mode in ["full", "stream", "reader"]:
+            out = subprocess.run([sys.executable, __file__, "--child", mode, dirname, str(chunk_rows)],
+                                 capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout)
+            print(f"{r['mode']:6} | {r['seconds']:7.1f} | {r['peak_rss_mib']:12.0f} | {r['frames_mib']:10.0f}")
+
+        print("integración | seconds | peak RSS MiB")
+        outputs = {}
+        for mode in ["full", "stream"]:
+            secs, peak_mib, outputs[mode] = run_integration(dirname, mode, chunk_rows)
+            print(f"{mode:11} | {secs:7.1f} | {peak_mib:12.0f}")
+        same = all(outputs["full"][f].equals(outputs["stream"][f]) for f in outputs["full"])
+        print("salidas full/stream:", "idénticas" if same else "DISTINTAS")
+        sys.exit(0 if same else 1)
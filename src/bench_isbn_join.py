@@ -0,0 +1,77 @@
+import sys
+import time
+import random
+import pandas as pd
+from utils_match import *
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark de la etapa ISBN-10: bucle original (iterrows + merged.at por celda) vs join enmascarado
+# uso: python bench_isbn_join.py [10000,100000,300000]
+
+LEGACY_LIMIT = 100000
+
+# genera df_json/df_csv con la forma que tienen en integrate_pipeline tras limpiar ISBNs
+def make_frames(n, rnd):
+    gb_cols = ["gb_id", "title", "subtitle", "authors", "publisher", "pub_date", "language", "categories",
+               "isbn13", "isbn10", "price_amount", "price_currency"]
+    gb = []
+    gr = []
+    for j in range(n):
+        isbn13 = str(9780000000000 + j)
+        isbn10 = str(1000000000 + j)
+        gb.append(dict(zip(gb_cols, [f"GB{j}", f"Title {j}", None, f"Author {j}", "Pub", "2020-01-01", "en",
+                                     "Computers", isbn13, isbn10, rnd.choice([None, 9.99]), "EUR"])))
+        kind = rnd.random()
+        gr.append({
+            "title": f"Title {j}: subtitle", "author": f"Author {j}", "rating": 4.0, "ratings_count": 10,
+            "book_url": f"https://example.org/{j}",
+            "isbn10": isbn10 if kind < 0.6 else None,
+            "isbn13": isbn13 if kind < 0.2 else None,
+        })
+    df_json = pd.DataFrame(gr)
+    df_json["__source"] = "goodreads"
+    df_csv = pd.DataFrame(gb).astype(object)
+    df_csv["__source"] = "googlebooks_books.csv"
+    df_json = df_json.reset_index().rename(columns={"index": "src_row_id"})
+    df_json["src_id"] = df_json["__source"] + ":" + df_json["src_row_id"].astype(str)
+    df_csv = df_csv.reset_index().rename(columns={"index": "src_row_id"})
+    df_csv["src_id"] = df_csv["__source"] + ":" + df_csv["src_row_id"].astype(str)
+    return df_json, df_csv
+
+# implementación previa, se mantiene solo como referencia de resultado y tiempo
+def legacy_isbn10(merged, df_csv):
+    missing_gb_mask = merged["gb_id"].isna() & merged["isbn10_gr"].notna()
+    gb_by_isbn10 = df_csv.dropna(subset=["isbn10"]).drop_duplicates(subset=["isbn10"]).set_index("isbn10")
+    for i, row in merged[missing_gb_mask].iterrows():
+        try:
+            rec = gb_by_isbn10.loc[row["isbn10_gr"]].to_dict()
+        except KeyError:
+            continue
+        for k, v in rec.items():
+            merged.at[i, k] = v
+    return merged
+
+def run(n):
+    rnd = random.Random(n)
+    df_json, df_csv = make_frames(n, rnd)
+    merged = pd.merge(df_json, df_csv, how="left", on="isbn13", suffixes=("_gr", "_gb"))
+
+    t0 = time.perf_counter()
+    fast = merge_by_isbn10(merged.copy(), df_csv)
+    fast_s = time.perf_counter() - t0
+
+    legacy_txt = "        -"
+    if n <= LEGACY_LIMIT:
+        t0 = time.perf_counter()
+        slow = legacy_isbn10(merged.copy(), df_csv)
+        legacy_s = time.perf_counter() - t0
+        pd.testing.assert_frame_equal(fast[slow.columns], slow)
+        legacy_txt = f"{legacy_s:9.2f}"
+    print(f"{n:>9} | {fast_s:8.3f} | {legacy_txt}")
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10000, 100000, 300000]
+    print("  gr_rows | join(s) | legacy(s)")
+    for n in sizes:
+        run(n)
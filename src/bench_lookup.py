@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from utils_parquet import *
+from utils_lookup import *
+from bench_parquet import make_dim_book
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark de búsquedas puntuales sobre dim_book: leer el Parquet y filtrar (versión anterior) vs índice SQLite
+# uso: python bench_lookup.py [filas] [consultas]
+
+def percentiles(latencies):
+    us = np.array(latencies) * 1e6
+    return np.percentile(us, 50), np.percentile(us, 99)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    df = make_dim_book(n)
+    df["isbn10"] = df["isbn13"].str[3:]
+    rnd = random.Random(0)
+    tmp = tempfile.mkdtemp(prefix="bench_lookup_")
+    try:
+        dim_path = os.path.join(tmp, "dim_book.parquet")
+        write_table(df, dim_path, parquet_options())
+        t0 = time.perf_counter()
+        build_lookup_index(df, index_path(dim_path))
+        t_build = time.perf_counter() - t0
+        print(f"{n} filas | índice: {t_build:.1f} s, {os.path.getsize(index_path(dim_path)) / 1e6:.0f} MB")
+
+        sample = df.iloc[[rnd.randrange(n) for _ in range(n_queries)]]
+        lookup = BookLookup(index_path(dim_path))
+        t0 = time.perf_counter()
+        first = lookup.by_canonical_id(sample["canonical_id"].iloc[0])
+        t_open = time.perf_counter() - t0
+
+        cases = [
+            ("canonical_id", lookup.by_canonical_id, sample["canonical_id"], "canonical_id"),
+            ("isbn13", lookup.by_isbn13, sample["isbn13"].dropna(), "isbn13"),
+            ("isbn10", lookup.by_isbn10, sample["isbn10"].dropna(), "isbn10"),
+            ("prefijo de título", lambda t: lookup.search_title(t, 20), sample["title"].str[:9], None),
+        ]
+        print(f"apertura + primera consulta: {t_open * 1000:.2f} ms")
+        print("consulta            | p50 µs | p99 µs | consultas")
+        for name, fn, keys, field in cases:
+            latencies = []
+            for k in keys:
+                t0 = time.perf_counter()
+                got = fn(k)
+                latencies.append(time.perf_counter() - t0)
+                if field is not None:
+                    assert got is not None and got[field] == k, (name, k)
+                else:
+                    assert got and all(title_key(r["title"]).startswith(title_key(k)) for r in got), (name, k)
+            p50, p99 = percentiles(latencies)
+            print(f"{name:19} | {p50:6.1f} | {p99:6.1f} | {len(keys)}")
+
+        # versión anterior: cargar dim_book completo y filtrar; y filtro pyarrow con poda por estadísticas
+        key = sample["isbn13"].dropna().iloc[0]
+        t0 = time.perf_counter()
+        full = pd.read_parquet(dim_path)
+        row = full[full["isbn13"] == key]
+        t_full = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        pruned = open_dataset(dim_path).to_table(filter=ds.field("isbn13") == key)
+        t_pruned = time.perf_counter() - t0
+        assert len(row) == pruned.num_rows == 1
+        print(f"read_parquet + filtro (anterior): {t_full * 1000:.0f} ms | filtro pyarrow: {t_pruned * 1000:.1f} ms")
+        lookup.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import time
+import shutil
+import resource
+import tempfile
+import subprocess
+import pandas as pd
+from utils_parquet import *
+from bench_parquet import make_dim_book
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark de lectura de salidas estándar: pd.read_parquet con columnas object (versión anterior) vs
+# read_standard (Arrow, mmap) sobre el Parquet o sobre el sidecar .arrow; cada lector es un proceso aparte
+# uso: python bench_mmap.py [filas] [procesos]
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# campo en kB de /proc/self/<archivo>: VmHWM (RSS pico, no hereda el del proceso padre como ru_maxrss)
+# y Pss (las páginas compartidas se reparten entre los procesos que las usan)
+def proc_kb(fname, field):
+    try:
+        with open(f"/proc/self/{fname}") as fh:
+            for line in fh:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+# un lector: abre la salida, hace una consulta típica (idioma + media de rating) e informa tiempos y memoria
+def worker(mode, path):
+    t0 = time.perf_counter()
+    if mode == "anterior":
+        df = pd.read_parquet(path)
+    elif mode == "columnas":
+        df = read_standard(path, columns=["language", "rating"])
+    else:
+        df = read_standard(path)
+    t_open = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    es = df[df["language"] == "es"]
+    value = float(es["rating"].mean())
+    t_query = time.perf_counter() - t0
+    print(json.dumps({
+        "open_s": t_open, "query_s": t_query, "value": round(value, 6),
+        "maxrss_mb": (proc_kb("status", "VmHWM") or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) / 1024,
+        "pss_mb": (proc_kb("smaps_rollup", "Pss") or 0) / 1024,
+    }))
+
+def run_workers(mode, path, n_procs):
+    procs = [subprocess.Popen([sys.executable, __file__, "--worker", mode, path], cwd=SRC_DIR,
+                              stdout=subprocess.PIPE, text=True) for _ in range(n_procs)]
+    return [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        worker(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    n_procs = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    df = make_dim_book(n)
+    tmp = tempfile.mkdtemp(prefix="bench_mmap_")
+    try:
+        plain = os.path.join(tmp, "plain", "dim_book.parquet")
+        with_sidecar = os.path.join(tmp, "sidecar", "dim_book.parquet")
+        for p in [plain, with_sidecar]:
+            os.makedirs(os.path.dirname(p))
+            write_table(df, p, parquet_options())
+        write_sidecar(df, sidecar_path(with_sidecar), parquet_options())
+        del df
+        print(f"{n} filas | parquet {os.path.getsize(plain) / 1e6:.0f} MB | sidecar {os.path.getsize(sidecar_path(with_sidecar)) / 1e6:.0f} MB")
+
+        modes = [
+            ("read_parquet object (anterior)", "anterior", plain),
+            ("read_standard parquet", "arrow", plain),
+            ("read_standard sidecar mmap", "arrow", with_sidecar),
+            ("sidecar mmap, 2 columnas", "columnas", with_sidecar),
+        ]
+        print(f"lector                         | procesos | apertura s | consulta s | RSS pico MB/proc | PSS total MB")
+        for name, mode, path in modes:
+            for k in sorted({1, n_procs}):
+                res = run_workers(mode, path, k)
+                assert len({r["value"] for r in res}) == 1
+                print(f"{name:30} | {k:8d} | {max(r['open_s'] for r in res):10.3f} | "
+                      f"{max(r['query_s'] for r in res):10.3f} | {max(r['maxrss_mb'] for r in res):16.0f} | "
+                      f"{sum(r['pss_mb'] for r in res):12.0f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
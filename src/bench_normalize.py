@@ -0,0 +1,145 @@
+import sys
+import time
+import random
+from dateutil import parser as dateparser
+import numpy as np
+import pandas as pd
+from utils_quality import *
+from utils_isbn import *
+from utils_normalize import *
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark de normalización: Series.apply(escalar) vs kernels por columna de utils_normalize
+# uso: python bench_normalize.py [filas]
+# antes de medir se comprueba con datos aleatorios que ambas versiones dan el mismo resultado (valores y dtype)
+
+PAIRS = [
+    ("pub_date", normalize_pub_date, normalize_pub_date_col),
+    ("language", normalize_language, normalize_language_col),
+    ("currency", normalize_currency, normalize_currency_col),
+    ("isbn", fast_clean_isbn, clean_isbn_col),
+    ("ratings_count", safe_int, safe_int_col),
+]
+
+TEXT_POOL = [
+    "", " ", "  en ", "EN", "eng", "English", "en-US", "en_us", "spa", "es-ES", "fr", "FRE", "e", "x",
+    "usd", "US$", "$", " € ", "£", "gbp", "ñ", "日本語", "0", "1", "True", "None", "nan",
+    "2020", " 1999 ", "2020-05", "2020-5", "2021-02-30", "March 3, 2001", "12/05/2010", "no date", "٢٠٢٠",
+    "978-1-4493-7428-0", " 9781449374280 ", "0-596-52068-9", "-", "--",
+]
+
+def random_value(rnd):
+    kind = rnd.random()
+    if kind < 0.55:
+        return rnd.choice(TEXT_POOL)
+    if kind < 0.65:
+        return None
+    if kind < 0.72:
+        return float("nan")
+    if kind < 0.82:
+        return rnd.choice([0, 1, -3, 2020, 9781449374280])
+    if kind < 0.92:
+        return rnd.choice([0.0, -0.0, 1.5, -2.7, 2020.0, 1e20, float("inf")])
+    return rnd.choice([True, False])
+
+# columnas aleatorias de varios dtypes: object mixto, float con NaN, int, vacía
+def random_columns(rnd, n):
+    yield pd.Series([random_value(rnd) for _ in range(n)], dtype=object)
+    yield pd.Series([rnd.choice(TEXT_POOL + [None]) for _ in range(n)], dtype=object)
+    yield pd.Series([rnd.choice([rnd.uniform(-1e6, 1e6), float("nan"), -0.0]) for _ in range(n)])
+    yield pd.Series([rnd.uniform(0, 1e5) for _ in range(n)])
+    yield pd.Series([rnd.randint(0, 10**6) for _ in range(n)])
+    yield pd.Series([float("nan")] * n)
+    yield pd.Series([], dtype=object)
+    yield pd.Series([], dtype="float64")
+
+def check_equivalence(rounds=200, seed=0):
+    rnd = random.Random(seed)
+    for r in range(rounds):
+        for ser in random_columns(rnd, rnd.randint(1, 60)):
+            ser.index = ser.index * 3 + 7
+            for name, scalar, column in PAIRS:
+                expected = ser.apply(scalar)
+                got = column(ser)
+                try:
+                    pd.testing.assert_series_equal(got, expected, check_names=False)
+                    assert [type(v) for v in got] == [type(v) for v in expected]
+                except AssertionError:
+                    print(f"Diferencia en {name} (ronda {r}), entrada: {ser.tolist()}")
+                    raise
+    print(f"equivalencia OK: {rounds} rondas x {len(PAIRS)} funciones")
+
+# fecha sin camino rápido ni caché: dateutil para todo lo que no sea YYYY / YYYY-MM
+def legacy_pub_date(d):
+    if d is None:
+        return None
+    d = str(d).strip()
+    if d == "":
+        return None
+    if (d.isdigit() and len(d) == 4) or (len(d) == 7 and d[4] == '-'):
+        return d
+    try:
+        return dateparser.parse(d, fuzzy=True).date().isoformat()
+    except Exception:
+        return None
+
+# el camino rápido de fechas debe coincidir con dateutil en todas las formas que reconoce
+def check_dates():
+    names = list(MONTHS) + [m.capitalize() for m in MONTHS] + [m.upper() for m in MONTHS]
+    cases = []
+    for y in [1, 99, 999, 1000, 1899, 2000, 2024, 9999]:
+        for m in range(0, 14):
+            for d in [0, 1, 9, 12, 13, 28, 29, 30, 31, 32]:
+                cases += [f"{y:04d}-{m:02d}-{d:02d}", f"{y:04d}/{m:02d}/{d:02d}", f"{y:04d}-{m}-{d}", f"{y:04d}/{m}/{d}"]
+                cases += [f"{name} {d}, {y:04d}" for name in names] + [f"{name} {d:02d} {y}" for name in names]
+    for c in cases:
+        assert normalize_pub_date(c) == legacy_pub_date(c), c
+    print(f"fechas OK: {len(cases)} formas comparadas con dateutil")
+
+# columnas con la forma del landing: baja cardinalidad en fechas/idioma/moneda, ISBN casi únicos
+def catalogue_columns(n):
+    rnd = np.random.default_rng(n)
+    years = rnd.integers(1950, 2025, n)
+    dates = np.where(rnd.random(n) < 0.5, years.astype(str),
+                     np.char.add(years.astype(str), rnd.choice(["-01-15", "-06", "-11-02"], n)))
+    return {
+        "pub_date": pd.Series(dates, dtype=object).where(rnd.random(n) > 0.1, None),
+        "pub_date_long": pd.Series(np.char.add(rnd.choice(["March ", "Jan ", "October "], n),
+                                               np.char.add(rnd.integers(1, 29, n).astype(str), np.char.add(", ", years.astype(str)))), dtype=object),
+        "language": pd.Series(rnd.choice(["en", "eng", "es", "English", "fr", None], n), dtype=object),
+        "currency": pd.Series(rnd.choice(["EUR", "USD", "$", "€", None], n), dtype=object),
+        "isbn": pd.Series((9780000000000 + np.arange(n)).astype(str), dtype=object),
+        "ratings_count": pd.Series(np.where(rnd.random(n) < 0.2, np.nan, rnd.integers(0, 90000, n))),
+    }
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    check_equivalence()
+    check_dates()
+
+    cols = catalogue_columns(n)
+    print(f"{n} filas")
+    print("campo         | apply s | columna s | speedup")
+    for name, scalar, column in PAIRS:
+        ser = cols[name]
+        t0 = time.perf_counter()
+        expected = ser.apply(scalar)
+        t_apply = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = column(ser)
+        t_col = time.perf_counter() - t0
+        pd.testing.assert_series_equal(got, expected)
+        print(f"{name:13} | {t_apply:7.2f} | {t_col:9.3f} | {t_apply / t_col:6.1f}x")
+
+    # fechas largas ("Month D, YYYY"): dateutil por fila vs camino rápido + caché LRU
+    ser = cols["pub_date_long"]
+    t0 = time.perf_counter()
+    expected = ser.apply(legacy_pub_date)
+    t_legacy = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = normalize_pub_date_col(ser)
+    t_col = time.perf_counter() - t0
+    pd.testing.assert_series_equal(got, expected)
+    print(f"{'pub_date_long':13} | {t_legacy:7.2f} | {t_col:9.3f} | {t_legacy / t_col:6.1f}x  (dateutil vs camino rápido)")
+    print("contadores de fechas:", date_parse_stats())
@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from utils_parquet import *
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark de la salida Parquet de dim_book: to_parquet por defecto (versión anterior) vs write_table
+# (zstd, row groups, diccionario, estadísticas de página) en un archivo o particionado por idioma / año
+# uso: python bench_parquet.py [filas]
+
+LANGUAGES = ["en", "es", "fr", "de", "it", "pt", "ja", "zh"]
+FILES = ["goodreads_books.json", "googlebooks_books.csv"]
+
+def make_dim_book(n, seed=0):
+    rng = np.random.default_rng(seed)
+    isbn = (9780000000000 + rng.permutation(n)).astype(str).astype(object)
+    isbn[rng.random(n) < 0.1] = None
+    canonical_id = np.where(pd.isna(isbn), [f"synth:{i:016x}" for i in range(n)], isbn)
+    year = rng.integers(1950, 2026, n)
+    pub_date = pd.Series(year.astype(str)) + "-" + pd.Series(rng.integers(1, 13, n)).map("{:02d}".format)
+    language = np.array(LANGUAGES, dtype=object)[rng.choice(len(LANGUAGES), n, p=[.5, .2, .1, .06, .05, .04, .03, .02])]
+    df = pd.DataFrame({
+        "canonical_id": canonical_id,
+        "isbn13": isbn,
+        "isbn10": None,
+        "gb_id": [f"gb{i:09d}" for i in range(n)],
+        "title": [f"Title {i % 50000} vol {i % 7}" for i in range(n)],
+        "subtitle": None,
+        "authors": [f"Author {i % 20000}" for i in range(n)],
+        "publisher": np.array(["O'Reilly", "Packt", "Manning", "Wiley", None], dtype=object)[rng.integers(0, 5, n)],
+        "pub_date": pub_date.to_numpy(dtype=object),
+        "language": language,
+        "categories": np.array(["Computers", "Science", "Mathematics", None], dtype=object)[rng.integers(0, 4, n)],
+        "price_amount": np.round(rng.uniform(5, 80, n), 2),
+        "price_currency": np.array(["USD", "EUR", None], dtype=object)[rng.integers(0, 3, n)],
+        "rating": np.round(rng.uniform(1, 5, n), 2),
+        "ratings_count": rng.integers(0, 100000, n),
+        "source_ids": [[f"gr{i}"] for i in range(n)],
+    })
+    df["source_files"] = json.dumps(FILES)
+    # dim_book sale ordenado por canonical_id (orden de groupby): las estadísticas de isbn13 por row group son estrechas
+    return df.sort_values("canonical_id").reset_index(drop=True)
+
+def dir_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+# consultas típicas sobre dim_book: (nombre, columnas, filtro)
+def queries(df):
+    some_isbn = df["isbn13"].dropna().iloc[len(df) // 2]
+    return [
+        ("language == es", None, ds.field("language") == "es"),
+        ("isbn13 puntual", None, ds.field("isbn13") == some_isbn),
+        ("pub_date 2020..2022", None, (ds.field("pub_date") >= "2020") & (ds.field("pub_date") < "2023")),
+        ("proyección 3 columnas", ["canonical_id", "title", "rating"], None),
+        ("tabla completa", None, None),
+    ]
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    df = make_dim_book(n)
+    tmp = tempfile.mkdtemp(prefix="bench_parquet_")
+    layouts = {
+        "to_parquet (anterior)": lambda p: df.to_parquet(p, index=False, engine="pyarrow"),
+        "zstd, 1 archivo": lambda p: write_table(df, p, parquet_options()),
+        "zstd, language=": lambda p: write_table(df, p, parquet_options(partition_by="language")),
+        "zstd, pub_year=": lambda p: write_table(df, p, parquet_options(partition_by="pub_year")),
+        "zstd, list<string>": lambda p: write_table(df, p, parquet_options(source_files="list")),
+    }
+    try:
+        print(f"{n} filas")
+        results = {}
+        for name, write in layouts.items():
+            path = os.path.join(tmp, f"{len(results)}.parquet")
+            t0 = time.perf_counter()
+            write(path)
+            t_write = time.perf_counter() - t0
+            # la partición pub_year permite podar por año además de por estadísticas de pub_date
+            dataset = open_dataset(path)
+            row = {"escritura s": t_write, "MB": dir_size(path) / 1e6}
+            for q, columns, flt in queries(df):
+                if name.endswith("pub_year=") and q.startswith("pub_date"):
+                    flt = flt & (ds.field("pub_year") >= 2020) & (ds.field("pub_year") <= 2022)
+                t, table = timed(lambda: dataset.to_table(columns=columns, filter=flt))
+                row[q] = (t, table.num_rows)
+            results[name] = row
+
+        counts = {q: {r[q][1] for r in results.values()} for q, _, _ in queries(df)}
+        assert all(len(c) == 1 for c in counts.values()), counts
+
+        names = [q for q, _, _ in queries(df)]
+        print(f"{'layout':22} | {'MB':>6} | {'escritura s':>11} | " + " | ".join(f"{q:>21}" for q in names))
+        for name, row in results.items():
+            cells = " | ".join(f"{row[q][0] * 1000:18.1f} ms" for q in names)
+            print(f"{name:22} | {row['MB']:6.1f} | {row['escritura s']:11.2f} | {cells}")
+        print("filas devueltas: " + ", ".join(f"{q}={counts[q].pop()}" for q in names))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
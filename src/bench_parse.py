@@ -0,0 +1,90 @@
+import os
+import sys
+import glob
+import time
+import random
+import tracemalloc
+from bs4 import BeautifulSoup
+from utils_parse import *
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark de parsing HTML por backend: páginas/segundo y pico de memoria (tracemalloc)
+# uso: python bench_parse.py [dir_fixtures]
+#   dir_fixtures: páginas guardadas (search_*.html / detail_*.html, p. ej. driver.page_source);
+#   si no se indica, se generan páginas sintéticas con la estructura de Goodreads.
+
+N_SYNTHETIC = 20
+REPEAT = 3
+
+# relleno típico de una página real: scripts, navegación y enlaces que no interesan al parser
+def _boilerplate(rnd, n_links):
+    links = "".join(f'<li><a href="/genres/{rnd.random()}">Genre {i}</a></li>' for i in range(n_links))
+    script = "<script>var x = {" + ",".join(f'"k{i}": {i}' for i in range(400)) + "};</script>"
+    return f"<head><title>Goodreads</title>{script}</head><div class='siteHeader'><ul>{links}</ul></div>"
+
+def synthetic_search_page(rnd, page):
+    rows = []
+    for i in range(20):
+        rows.append(
+            "<tr itemscope itemtype='http://schema.org/Book'>"
+            f"<td><a class='bookTitle' href='/book/show/{page}{i}-book'><span itemprop='name'>Book {page}-{i}</span></a>"
+            f"<span itemprop='author'><a class='authorName' href='/author/{i}'><span>Author {i}</span></a></span>"
+            f"<span class='minirating'>{rnd.uniform(1, 5):.2f} avg rating — {rnd.randint(1, 90000):,} ratings</span></td></tr>"
+        )
+    pagination = f"<div><a class='previous_page' href='/search?page={page - 1}'>prev</a><a class='next_page' href='/search?page={page + 1}'>next</a></div>"
+    return f"<html>{_boilerplate(rnd, 300)}<body><table class='tableList'>{''.join(rows)}</table>{pagination}</body></html>"
+
+def synthetic_detail_page(rnd, i):
+    box = f"<div id='bookDataBox'><div class='infoBoxRowItem'>ISBN {rnd.randint(10**9, 10**10 - 1)} (ISBN13: 978{rnd.randint(10**9, 10**10 - 1)})</div></div>"
+    reviews = "".join(f"<div class='review'><p>{'lorem ipsum ' * 30}</p></div>" for _ in range(40))
+    return f"<html>{_boilerplate(rnd, 200)}<body><h1>Book {i}</h1>{box}{reviews}</body></html>"
+
+def load_fixtures(path):
+    if path:
+        search = [open(f, encoding="utf-8").read() for f in sorted(glob.glob(os.path.join(path, "search_*.html")))]
+        detail = [open(f, encoding="utf-8").read() for f in sorted(glob.glob(os.path.join(path, "detail_*.html")))]
+        return search, detail
+    rnd = random.Random(0)
+    return ([synthetic_search_page(rnd, p) for p in range(1, N_SYNTHETIC + 1)],
+            [synthetic_detail_page(rnd, i) for i in range(N_SYNTHETIC)])
+
+# parseo anterior: árbol completo con html.parser y un segundo parseo para la paginación
+def legacy_search(html, backend):
+    soup = BeautifulSoup(html, backend)
+    rows = soup.select(ROW_SELECTOR)[:15]
+    BeautifulSoup(html, backend).select_one(NEXT_SELECTOR)
+    return rows
+
+def legacy_detail(html, backend):
+    data_box = BeautifulSoup(html, backend).find("div", {"id": "bookDataBox"})
+    return data_box.get_text(" ", strip=True) if data_box else None
+
+def measure(fn, pages, backend):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        for html in pages:
+            fn(html, backend)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(pages) * REPEAT / elapsed, peak / 2**20
+
+if __name__ == "__main__":
+    search, detail = load_fixtures(sys.argv[1] if len(sys.argv) > 1 else None)
+    backends = [b for b in BACKENDS if b != "lxml" or HAS_LXML]
+    cases = [
+        ("search", "full", legacy_search, search),
+        ("search", "scoped", parse_search_page, search),
+        ("detail", "full", legacy_detail, detail),
+        ("detail", "scoped", parse_detail_box, detail),
+    ]
+    print(f"{len(search)} páginas de búsqueda, {len(detail)} de detalle (x{REPEAT})")
+    print("page   | mode   | backend     | pages/s | peak MiB")
+    for kind, mode, fn, pages in cases:
+        if not pages:
+            continue
+        for backend in backends:
+            rate, peak = measure(fn, pages, backend)
+            print(f"{kind:6} | {mode:6} | {backend:11} | {rate:7.1f} | {peak:8.2f}")
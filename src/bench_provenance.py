@@ -0,0 +1,83 @@
+import sys
+import json
+import time
+import random
+import hashlib
+import numpy as np
+import pandas as pd
+from utils_isbn import *
+from utils_survivorship import *
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Micro-benchmark de book_source_detail: provenance, source_files e ids sintéticos
+# apply(axis=1) / lambda por fila / iterrows (versión anterior) vs operaciones por columna
+# uso: python bench_provenance.py [10000,100000,1000000]
+
+LEGACY_LIMIT = 1000000
+FILES = ["goodreads_books.json", "googlebooks_books.csv"]
+
+def make_detail(n, rnd):
+    def pick(options, p_null):
+        return None if rnd.random() < p_null else rnd.choice(options)
+    return pd.DataFrame({
+        "title_gr": [pick([f"Title {i % 5000}", "Dune"], 0.05) for i in range(n)],
+        "author": [pick([f"Author {i % 900}", "ANN"], 0.1) for i in range(n)],
+        "title": [pick(["Dune", "Emma"], 0.5) for _ in range(n)],
+        "authors": [pick(["Ann", "Bob"], 0.5) for _ in range(n)],
+        "price_amount": [pick([1.5, 9.99], 0.6) for _ in range(n)],
+        "isbn13": [pick([str(9780000000000 + i)], 0.4) for i in range(n)],
+    })
+
+# implementación previa, se mantiene solo como referencia de resultado y tiempo
+def pick_prov(row, field_gr, field_gb):
+    if pd.notna(row.get(field_gb)):
+        return "google_books"
+    if pd.notna(row.get(field_gr)):
+        return "goodreads"
+    return None
+
+def make_synthetic_id(row):
+    s = (str(row.get("title_gr", "")) + "|" + str(row.get("author", ""))).lower()
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()[:16]
+
+def legacy(bsd):
+    bsd["prov_title"] = bsd.apply(lambda r: pick_prov(r, "title_gr", "title"), axis=1)
+    bsd["prov_authors"] = bsd.apply(lambda r: pick_prov(r, "author", "authors"), axis=1)
+    bsd["prov_price"] = bsd.apply(lambda r: pick_prov(r, "price_amount", "price_amount"), axis=1)
+    bsd["source_files"] = bsd.apply(lambda r: [f for f in FILES], axis=1)
+    bsd["canonical_isbn13"] = bsd["isbn13"].apply(get_isbn13)
+    bsd["canonical_id"] = bsd["canonical_isbn13"].copy()
+    for i, r in bsd.iterrows():
+        if not r["canonical_id"] or str(r["canonical_id"]).lower() in ["nan", "none"]:
+            bsd.at[i, "canonical_id"] = "synth:" + make_synthetic_id(r)
+    bsd["source_files"] = bsd["source_files"].apply(json.dumps)
+    return bsd
+
+def columnar(bsd):
+    bsd["prov_title"] = pick_prov_col(bsd, "title_gr", "title")
+    bsd["prov_authors"] = pick_prov_col(bsd, "author", "authors")
+    bsd["prov_price"] = pick_prov_col(bsd, "price_amount", "price_amount")
+    bsd["source_files"] = pd.Categorical.from_codes(np.zeros(len(bsd), dtype="int8"), categories=[json.dumps(FILES)])
+    bsd["canonical_isbn13"] = bsd["isbn13"].apply(get_isbn13)
+    bsd["canonical_id"] = fill_synthetic_ids(bsd)
+    bsd["source_files"] = bsd["source_files"].astype(object)
+    return bsd
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10000, 100000, 1000000]
+    print("rows    | legacy s | µs/fila | columnas s | µs/fila | speedup")
+    for n in sizes:
+        bsd = make_detail(n, random.Random(n))
+        t0 = time.perf_counter()
+        got = columnar(bsd.copy())
+        t_col = time.perf_counter() - t0
+        col_us = t_col / n * 1e6
+        if n > LEGACY_LIMIT:
+            print(f"{n:7d} | {'-':>8} | {'-':>7} | {t_col:10.2f} | {col_us:7.2f} |")
+            continue
+        t0 = time.perf_counter()
+        expected = legacy(bsd.copy())
+        t_legacy = time.perf_counter() - t0
+        pd.testing.assert_frame_equal(got, expected)
+        print(f"{n:7d} | {t_legacy:8.2f} | {t_legacy / n * 1e6:7.2f} | {t_col:10.2f} | {col_us:7.2f} | {t_legacy / t_col:6.1f}x")
@@ -0,0 +1,121 @@
+import sys
+import time
+import random
+import numpy as np
+import pandas as pd
+from utils_quality import *
+from utils_normalize import *
+from utils_survivorship import *
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Benchmark de supervivencia de dim_book: bucle por groupby (versión anterior) vs reglas vectorizadas
+# uso: python bench_survivorship.py [10000,100000,1000000]
+# antes de medir se comprueba con grupos aleatorios (nulos, empates, tipos mezclados) que el resultado es idéntico
+
+LEGACY_LIMIT = 100000
+
+# implementación previa, se mantiene solo como referencia de resultado y tiempo
+def choose_most_complete(series):
+    vals = [v for v in series if pd.notna(v)]
+    if not vals:
+        return None
+    vals = sorted(vals, key=lambda x: (len(str(x)), str(x)), reverse=True)
+    return vals[0]
+
+def choose_pub_date(series):
+    scored = []
+    for v in series:
+        iso = normalize_pub_date(v)
+        if iso is None:
+            continue
+        score = {10: 3, 7: 2, 4: 1}.get(len(iso), 0)
+        scored.append(((score, iso), iso))
+    if not scored:
+        return None
+    return sorted(scored, key=lambda x: (x[0][0], x[1]), reverse=True)[0][1]
+
+def legacy_dim_book(bsd):
+    dim_rows = []
+    for cid, group in bsd.groupby("canonical_id"):
+        isbn13_vals = [v for v in group["isbn13"] if pd.notna(v)]
+        dim_rows.append({
+            "canonical_id": cid,
+            "isbn13": isbn13_vals[0] if isbn13_vals else None,
+            "isbn10": choose_most_complete(group["isbn10"].tolist() + group["isbn10_gr"].tolist()),
+            "gb_id": choose_most_complete(group["gb_id"]),
+            "title": choose_most_complete(group["title_gr"].tolist() + group["title"].tolist()),
+            "subtitle": choose_most_complete(group["subtitle"]),
+            "authors": choose_most_complete(group["authors"].tolist() + group["author"].tolist()),
+            "publisher": choose_most_complete(group["publisher"]),
+            "pub_date": choose_pub_date(group["pub_date"].tolist()),
+            "language": choose_most_complete(group["language_norm"]),
+            "categories": choose_most_complete(group["categories"]),
+            "price_amount": group["price_amount"].dropna().max() if group["price_amount"].notna().any() else None,
+            "price_currency": choose_most_complete(group["price_currency_norm"]),
+            "rating": group["rating"].dropna().max() if group["rating"].notna().any() else None,
+            "ratings_count": group["ratings_count"].dropna().max() if group["ratings_count"].notna().any() else None,
+            "source_ids": list(group["src_id"].unique()),
+        })
+    return pd.DataFrame(dim_rows)
+
+# book_source_detail sintético: n filas repartidas en ~n/dup grupos
+def make_detail(n, rnd, dup=3, messy=False):
+    def pick(options, p_null=0.3):
+        return None if rnd.random() < p_null else rnd.choice(options)
+    titles = ["Dune", "Dune ", "Dune: Messiah", "Emma", "Ulysses", "It"]
+    dates = ["2020", "2020-05", "2020-05-01", "2019-12-31", "May 3, 2001", "n.d.", "2021/01/02", None]
+    rows = []
+    for i in range(n):
+        g = rnd.randrange(max(1, n // dup))
+        rows.append({
+            "canonical_id": f"synth:{g:08d}" if g % 3 else str(9780000000000 + g),
+            "isbn13": pick([str(9780000000000 + g)], 0.5),
+            "isbn10": pick(["0596520689", "059652068X", "1"]), "isbn10_gr": pick(["0596520689", "12"]),
+            "gb_id": pick(["a", "bb", "cc", "B"]),
+            "title_gr": pick(titles + ([1, 1.0, "1"] if messy else [])), "title": pick(titles + [float("nan")]),
+            "subtitle": pick(["", "x", "Part I"], 0.6), "authors": pick(["Ann", "Bob", "Ann Lee"]),
+            "author": pick(["Ann", "Zed"]), "publisher": pick(["P", "Q"]),
+            "pub_date": pick(dates, 0.2), "language_norm": pick(["en", "es", "na"]),
+            "categories": pick(["Fiction", "Science"]), "price_currency_norm": pick(["EUR", "USD", "NAN"]),
+            "price_amount": pick([1.5, 20.0, 0.0]), "rating": pick([3.5, 4.25]),
+            "ratings_count": rnd.choice([None, 3, 10]) if messy else rnd.randint(0, 1000),
+            "src_id": pick([f"goodreads:{i}", f"goodreads:{i % 7}"], 0.1),
+        })
+    bsd = pd.DataFrame(rows)
+    bsd["pub_date_iso"] = normalize_pub_date_col(bsd["pub_date"])
+    return bsd
+
+def check_equivalence(rounds=300, seed=0):
+    rnd = random.Random(seed)
+    for r in range(rounds):
+        bsd = make_detail(rnd.randint(1, 80), rnd, dup=rnd.choice([1, 2, 5]), messy=r % 2 == 1)
+        expected = legacy_dim_book(bsd)
+        got = survive(bsd, key="canonical_id", rules=DIM_BOOK_RULES)
+        try:
+            pd.testing.assert_frame_equal(got, expected)
+            for c in expected.columns:
+                assert [type(v) for v in got[c]] == [type(v) for v in expected[c]], c
+        except AssertionError:
+            print(f"Diferencia en la ronda {r}")
+            raise
+    print(f"equivalencia OK: {rounds} catálogos aleatorios")
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10000, 100000, 1000000]
+    check_equivalence()
+    print("rows    | groups  | legacy s | rules s | speedup")
+    for n in sizes:
+        bsd = make_detail(n, random.Random(n))
+        groups = bsd["canonical_id"].nunique()
+        t0 = time.perf_counter()
+        got = survive(bsd, key="canonical_id", rules=DIM_BOOK_RULES)
+        t_rules = time.perf_counter() - t0
+        if n > LEGACY_LIMIT:
+            print(f"{n:7d} | {groups:7d} | {'-':>8} | {t_rules:7.2f} |")
+            continue
+        t0 = time.perf_counter()
+        expected = legacy_dim_book(bsd)
+        t_legacy = time.perf_counter() - t0
+        pd.testing.assert_frame_equal(got, expected)
+        print(f"{n:7d} | {groups:7d} | {t_legacy:8.2f} | {t_rules:7.2f} | {t_legacy / t_rules:6.1f}x")
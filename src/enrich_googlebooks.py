@@ -1,47 +1,194 @@
 import requests
 import json
-import csv
 import urllib.parse
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from utils_quality import *
 from utils_isbn import *
+from utils_http import *
+from utils_cache import *
+from utils_profile import *
+from utils_stream import *
 
 #--------------------------------------------------------------------------------------------------------------
 
 # configuración de rutas sistema y web
 load_dotenv("../.env.example")
 LANDING_DIR = os.getenv('LANDING_DIR')
+DOCS_DIR = os.getenv('DOCS_DIR')
 INPUT_JSON = os.path.join(LANDING_DIR, "goodreads_books.json")
 OUTPUT_CSV = os.path.join(LANDING_DIR, "googlebooks_books.csv")
 URL_API = os.getenv('GOOGLEBOOKS_API_URL')
 
+# concurrencia y control de tasa hacia la API (1 hilo = modo secuencial)
+CONCURRENCY = int(os.getenv('GOOGLEBOOKS_CONCURRENCY', '4'))
+RATE_PER_SEC = float(os.getenv('GOOGLEBOOKS_RATE_PER_SEC', '5'))
+TIMEOUT = float(os.getenv('GOOGLEBOOKS_TIMEOUT', '10'))
+MAX_RETRIES = int(os.getenv('GOOGLEBOOKS_MAX_RETRIES', '4'))
+
+# tiempos por etapa, peticiones a la API y aciertos de caché (docs/ingest_summary.json, "profile")
+PROFILER = profiler_from_env("enrich_googlebooks")
+HTTP_STATS = HttpStats()
+
+SESSION = make_session(pool_size=CONCURRENCY, stats=HTTP_STATS)
+BUCKET = TokenBucket(RATE_PER_SEC, burst=CONCURRENCY)
+
+# caché persistente de respuestas (vacío = desactivada); TTL en días y tope LRU de entradas
+CACHE_PATH = os.getenv('GOOGLEBOOKS_CACHE_PATH', '')
+CACHE = LookupCache(
+    CACHE_PATH,
+    ttl_seconds=float(os.getenv('GOOGLEBOOKS_CACHE_TTL_DAYS', '30')) * 86400,
+    negative_ttl_seconds=float(os.getenv('GOOGLEBOOKS_CACHE_NEGATIVE_TTL_DAYS', '7')) * 86400,
+    max_entries=int(os.getenv('GOOGLEBOOKS_CACHE_MAX_ENTRIES', '100000')),
+) if CACHE_PATH else None
+
+# columnas del CSV UTF-8 de salida
+FIELDNAMES = [
+    "gb_id",
+    "title", "subtitle", "authors", "publisher",
+    "pub_date", "language", "categories",
+    "isbn13", "isbn10",
+    "price_amount", "price_currency"
+]
+
+# escritura en streaming: libros por tramo, tramos entre fsync y reanudación de una ejecución interrumpida
+CHUNK_BOOKS = max(1, int(os.getenv('GOOGLEBOOKS_CHUNK_BOOKS', '500')))
+FSYNC_EVERY = int(os.getenv('GOOGLEBOOKS_FSYNC_EVERY', '1'))
+RESUME = os.getenv('GOOGLEBOOKS_RESUME', '1') == '1'
+
+# modo por lotes: hasta GOOGLEBOOKS_BATCH_SIZE ISBN por petición (isbn:A OR isbn:B ...); 1 = una petición por libro.
+# La API devuelve como mucho 40 volúmenes por petición (maxResults)
+BATCH_SIZE = max(1, min(40, int(os.getenv('GOOGLEBOOKS_BATCH_SIZE', '10'))))
+BATCH_STATS = {"batch_requests": 0, "batched_isbns": 0, "matched": 0, "fallbacks": 0}
+BATCH_LOCK = threading.Lock()
+
+# ISBN con el que se consulta un libro (ISBN-13 preferente); None si hay que buscar por título+autor
+def query_isbn(isbn10, isbn13):
+    return str(isbn13 or isbn10 or "").strip() or None
+
+# URL de consulta: ISBN-13 > ISBN-10 > título+autor
+def lookup_url(isbn10, isbn13, title, author):
+    isbn = query_isbn(isbn10, isbn13)
+    if isbn:
+        return f"{URL_API}q=isbn:{isbn}"
+    # búsqueda por título + autor
+    q_title = urllib.parse.quote(title or "")
+    q_author = urllib.parse.quote(author or "")
+    return f"{URL_API}q=intitle:{q_title}+inauthor:{q_author}"
+
+# una petición; se guarda solo el primer volumen y "sin items" como respuesta negativa
+def request_volume(url, key):
+    r = get_with_retry(SESSION, url, bucket=BUCKET, timeout=TIMEOUT, max_retries=MAX_RETRIES)
+    data = r.json()
+    item = data["items"][0] if "items" in data else None
+    if CACHE is not None:
+        CACHE.put(key, item)
+    return item
+
 # función para obtener info de libros usando la API de googlebooks
 def search_google_books(isbn10, isbn13, title, author):
     """
     Busca el libro en Google Books y devuelve un registro normalizado.
     Prioriza ISBN-13 > ISBN-10 > título+autor.
+    Usa la caché persistente si está activa; si no, la sesión compartida,
+    el limitador de tasa y reintentos con backoff.
     """
 
-    # búsqueda por ISBN preferente
-    if isbn13:
-        url = f"{URL_API}q=isbn:{isbn13}"
-    elif isbn10:
-        url = f"{URL_API}q=isbn:{isbn10}"
-    else:
-        # búsqueda por título + autor
-        q_title = urllib.parse.quote(title or "")
-        q_author = urllib.parse.quote(author or "")
-        url = f"{URL_API}q=intitle:{q_title}+inauthor:{q_author}"
-
-    r = requests.get(url)
-    data = r.json()
+    key = query_cache_key(isbn10, isbn13, title, author)
+    if CACHE is not None:
+        found, item = CACHE.get(key)
+        if found:
+            return parse_volume(item) if item else None
 
-    if "items" not in data:
+    item = request_volume(lookup_url(isbn10, isbn13, title, author), key)
+    if item is None:
         return None
+    return parse_volume(item)
 
-    info = data["items"][0].get("volumeInfo", {})
-    sale = data["items"][0].get("saleInfo", {})
+# identificadores de un volumen (ISBN-13 y ISBN-10 sin guiones)
+def volume_isbns(item):
+    ids = set()
+    for id_obj in item.get("volumeInfo", {}).get("industryIdentifiers", []):
+        if id_obj.get("type") in ("ISBN_10", "ISBN_13"):
+            ids.add(id_obj["identifier"].replace("-", "").strip().upper())
+    return ids
+
+# consulta varios ISBN en una sola petición y reparte los volúmenes devueltos por ISBN-13/ISBN-10:
+# {isbn: volumen} solo para los ISBN con un volumen que los declara (el primero en el orden de la respuesta)
+def search_google_books_batch(isbns):
+    query = urllib.parse.quote(" OR ".join(f"isbn:{i}" for i in isbns), safe=":")
+    r = get_with_retry(SESSION, f"{URL_API}q={query}&maxResults={len(isbns)}", bucket=BUCKET, timeout=TIMEOUT,
+                       max_retries=MAX_RETRIES)
+    wanted = {i.replace("-", "").upper(): i for i in isbns}
+    found = {}
+    for item in r.json().get("items", []):
+        for ident in volume_isbns(item):
+            if ident in wanted and wanted[ident] not in found:
+                found[wanted[ident]] = item
+    with BATCH_LOCK:
+        BATCH_STATS["batch_requests"] += 1
+        BATCH_STATS["batched_isbns"] += len(isbns)
+        BATCH_STATS["matched"] += len(found)
+    return found
+
+# resuelve todos los libros con peticiones por lotes: caché primero, luego los ISBN pendientes agrupados de
+# BATCH_SIZE en BATCH_SIZE, y petición individual para los ISBN sin volumen en su lote y para título+autor.
+# Devuelve un volumen (o None) por libro, en el orden de entrada
+def lookup_books_batched(books, pool):
+    keys = [query_cache_key(b.get("isbn10"), b.get("isbn13"), b.get("title"), b.get("author")) for b in books]
+    items = {}
+    if CACHE is not None:
+        for key in dict.fromkeys(keys):
+            found, item = CACHE.get(key)
+            if found:
+                items[key] = item
+
+    # ISBN pendientes (sin repetir) en lotes
+    pending = {}
+    for b, key in zip(books, keys):
+        isbn = query_isbn(b.get("isbn10"), b.get("isbn13"))
+        if key not in items and isbn:
+            pending.setdefault(isbn, key)
+    isbns = list(pending)
+    chunks = [isbns[i:i + BATCH_SIZE] for i in range(0, len(isbns), BATCH_SIZE)]
+
+    def run_chunk(chunk):
+        try:
+            return search_google_books_batch(chunk)
+        except (requests.RequestException, ValueError) as e:
+            print(f"Warning: fallo en la consulta por lotes ({len(chunk)} ISBN): {e}")
+            return {}
+    for found in pool.map(run_chunk, chunks):
+        for isbn, item in found.items():
+            items[pending[isbn]] = item
+            if CACHE is not None:
+                CACHE.put(pending[isbn], item)
+
+    # sin volumen en el lote (o lote fallido) y título+autor: petición individual como en el modo normal
+    single = {}
+    for b, key in zip(books, keys):
+        if key not in items and key not in single:
+            single[key] = b
+
+    def run_single(key):
+        b = single[key]
+        try:
+            return key, request_volume(lookup_url(b.get("isbn10"), b.get("isbn13"), b.get("title"), b.get("author")), key)
+        except (requests.RequestException, ValueError) as e:
+            print(f"Warning: fallo al consultar '{b.get('title')}': {e}")
+            return key, None
+    for key, item in pool.map(run_single, list(single)):
+        items[key] = item
+    with BATCH_LOCK:
+        BATCH_STATS["fallbacks"] += len(single)
+    return [items.get(key) for key in keys]
+
+# normaliza un volumen de la API al esquema del CSV
+def parse_volume(item):
+    info = item.get("volumeInfo", {})
+    sale = item.get("saleInfo", {})
 
     # Extraer ISBNs normalizados
     isbn_10, isbn_13 = None, None
@@ -60,7 +207,7 @@ def search_google_books(isbn10, isbn13, title, author):
 
     # Normalización final
     return {
-        "gb_id": data["items"][0].get("id"),
+        "gb_id": item.get("id"),
         "title": info.get("title"),
         "subtitle": info.get("subtitle"),
         "authors": ", ".join(info.get("authors", [])),
@@ -85,40 +232,75 @@ def search_google_books(isbn10, isbn13, title, author):
 
 # función que ejecuta busqueda en googlebooks usando el archivo JSON scrapeado como referencia
 def enrich_books():
-    with open(INPUT_JSON, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        books = data['data']
-
-    enriched = []
-
-    for b in books:
-
-        gdata = search_google_books(
-            isbn10=b.get("isbn10"),
-            isbn13=b.get("isbn13"),
-            title=b.get("title"),
-            author=b.get("author")
-        )
-
-        if gdata:
-            enriched.append(gdata)
-
-    # guardar CSV UTF-8 con esquema claro
-    fieldnames = [
-        "gb_id",
-        "title", "subtitle", "authors", "publisher",
-        "pub_date", "language", "categories",
-        "isbn13", "isbn10",
-        "price_amount", "price_currency"
-    ]
-
-    with open(OUTPUT_CSV, "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(enriched)
+    with PROFILER.stage("load"):
+        with open(INPUT_JSON, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            books = data['data']
+        PROFILER.rows(rows_out=len(books))
+
+    # consulta un libro; un fallo tras agotar reintentos no detiene el resto del lote
+    def lookup(b):
+        try:
+            return search_google_books(
+                isbn10=b.get("isbn10"),
+                isbn13=b.get("isbn13"),
+                title=b.get("title"),
+                author=b.get("author")
+            )
+        except (requests.RequestException, ValueError) as e:
+            print(f"Warning: fallo al consultar '{b.get('title')}': {e}")
+            return None
+
+    # la salida se escribe por tramos de CHUNK_BOOKS libros (memoria constante) en googlebooks_books.csv.partial;
+    # con RESUME, una ejecución interrumpida continúa tras el último tramo confirmado de la misma entrada.
+    # map conserva el orden de entrada, así el CSV es determinista con cualquier concurrencia
+    with PROFILER.stage("lookup"):
+        writer = ResumableCsvWriter(OUTPUT_CSV, FIELDNAMES, source=file_sha256(INPUT_JSON), resume=RESUME,
+                                    fsync_every=FSYNC_EVERY)
+        if writer.resumed:
+            print(f"Reanudando enriquecimiento: {writer.done} libros ya procesados ({writer.rows} filas)")
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, CONCURRENCY)) as pool:
+                for start in range(writer.done, len(books), CHUNK_BOOKS):
+                    chunk = books[start:start + CHUNK_BOOKS]
+                    if BATCH_SIZE > 1:
+                        rows = [parse_volume(item) for item in lookup_books_batched(chunk, pool) if item]
+                    else:
+                        rows = [gdata for gdata in pool.map(lookup, chunk) if gdata]
+                    writer.append(rows, len(chunk))
+        except BaseException:
+            writer.close()
+            raise
+        PROFILER.rows(rows_in=len(books), rows_out=writer.rows)
+
+    # publicar el CSV completo (rename atómico del parcial)
+    with PROFILER.stage("write"):
+        writer.finalize()
+        PROFILER.rows(rows_out=writer.rows)
 
     print("CSV googlebooks_books.csv generado en /landing")
 
+    # contadores de la caché en docs/ingest_summary.json
+    if CACHE is not None:
+        os.makedirs(DOCS_DIR, exist_ok=True)
+        summary_path = os.path.join(DOCS_DIR, "ingest_summary.json")
+        summary = {}
+        if os.path.exists(summary_path):
+            with open(summary_path, "r", encoding="utf-8") as fh:
+                summary = json.load(fh)
+        summary["googlebooks_cache"] = CACHE.summary()
+        with open(summary_path, "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, indent=2, ensure_ascii=False)
+        print("Caché Google Books:", json.dumps(CACHE.summary()))
+
+    # perfil: etapas, peticiones HTTP y caché
+    PROFILER.set("http", {"google_books": HTTP_STATS.summary()})
+    PROFILER.set("cache", {"google_books": CACHE.summary() if CACHE is not None else None})
+    with BATCH_LOCK:
+        PROFILER.set("batch", {"batch_size": BATCH_SIZE, **BATCH_STATS})
+    os.makedirs(DOCS_DIR, exist_ok=True)
+    PROFILER.finish(os.path.join(DOCS_DIR, "ingest_summary.json"))
+
 
 if __name__ == "__main__":
     enrich_books()
\ No newline at end of file
@@ -1,11 +1,21 @@
 import os
+import sys
 import glob
 import json
-import hashlib
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from utils_quality import *
 from utils_isbn import *
+from utils_match import *
+from utils_ingest import *
+from utils_normalize import *
+from utils_survivorship import *
+from utils_incremental import *
+from utils_parquet import *
+from utils_lookup import *
+from utils_dtypes import *
+from utils_profile import *
 
 #--------------------------------------------------------------------------------------------------------------
 
@@ -14,474 +24,548 @@ load_dotenv("../.env.example")
 LANDING_DIR = os.getenv('LANDING_DIR')
 DOCS_DIR = os.getenv('DOCS_DIR')
 STANDARD_DIR = os.getenv('STANDARD_DIR')
+# "blocking" (índice por n-gramas/tokens) o "scan" (recorrido lineal original)
+FUZZY_MATCH_MODE = os.getenv('FUZZY_MATCH_MODE', 'blocking')
+# "full" (json.load / read_csv completos) o "stream" (lotes de LANDING_CHUNK_ROWS filas con tipos explícitos)
+LANDING_MODE = os.getenv('LANDING_MODE', 'full')
+LANDING_CHUNK_ROWS = int(os.getenv('LANDING_CHUNK_ROWS', '50000'))
+# "full" (reconstrucción completa) o "incremental" (solo registros de archivos con sha256 distinto)
+INTEGRATE_MODE = os.getenv('INTEGRATE_MODE', 'full')
+INTEGRATE_STATE_DIR = os.getenv('INTEGRATE_STATE_DIR', '../cache/integrate')
+# salida Parquet: compresión, filas por row group, partición Hive (vacío = un archivo) y source_files como json | list
+PARQUET_OPTIONS = parquet_options(
+    compression=os.getenv('PARQUET_COMPRESSION', 'zstd'),
+    row_group_rows=os.getenv('PARQUET_ROW_GROUP_ROWS', '131072'),
+    partition_by=os.getenv('PARQUET_PARTITION_BY', ''),
+    source_files=os.getenv('PARQUET_SOURCE_FILES', 'json'),
+)
+# índice de búsqueda de dim_book (sidecar SQLite por isbn13, isbn10, canonical_id y título): 1 | 0
+DIM_BOOK_INDEX = os.getenv('DIM_BOOK_INDEX', '1') == '1'
+# sidecar Arrow IPC (.arrow, sin compresión) de cada salida para lecturas mapeadas en memoria: 1 | 0
+ARROW_SIDECAR = os.getenv('ARROW_SIDECAR', '0') == '1'
+# tipos de book_source_detail y dim_book: "object" (columnas object y listas Python) o "compact" (plan de utils_dtypes)
+DTYPE_PLAN_MODE = os.getenv('DTYPE_PLAN', 'object')
 
 os.makedirs(DOCS_DIR, exist_ok=True)
 os.makedirs(STANDARD_DIR, exist_ok=True)
 
-# leer archivos desde landing/ y anotar metadatos 
-landing_files = glob.glob(os.path.join(LANDING_DIR, "*"))
-file_metadata = []
-
-json_records = []
-csv_records = []
-
-for fpath in landing_files:
-    fname = os.path.basename(fpath)
-    stat = os.stat(fpath)
-    fmeta = {
-        "file_name": fname,
-        "path": f"/landing/{fpath[11:len(fpath)]}",
-        "size_bytes": stat.st_size,
-        "sha256": file_sha256(fpath),
-        "ingest_timestamp": INGEST_TS,
-    }
-    file_metadata.append(fmeta)
-
-    # carga contenido dependiendo de la extensión del archivo
-    ext = os.path.splitext(fname)[1].lower()
-    try:
-        if ext in [".json"]:
-            with open(fpath, "r", encoding="utf-8") as fh:
-                json_full = json.load(fh)
-                data = json_full['data']
-                # acepta listas u objeto único para archivo JSON
-                if isinstance(data, list):
-                    json_records.extend(data)
-                else:
-                    json_records.append(data)
-        elif ext in [".csv"]:
-            df = pd.read_csv(fpath)
-            csv_records.append((fname, df))
-        else:
-            pass
-    except Exception as e:
-        print(f"Warning: fallo al leer {fname}: {e}")
-
-# normalizar y construir book_source_detail 
-if json_records:
-    df_json = pd.DataFrame(json_records)
-else:
-    df_json = pd.DataFrame(columns=["title","author","rating","ratings_count","book_url","isbn10","isbn13"])
-
-# Concatenar todos los CSVs de Google Books (si hay más de uno)
-if csv_records:
-    dfs = []
-    for fname, df in csv_records:
-        df = df.copy()
+# tiempos, memoria y filas por etapa (PROFILE_MODE=cprofile|sample vuelca además un perfil por etapa)
+PROFILER = profiler_from_env("integrate_pipeline")
+
+bsd_path = os.path.join(STANDARD_DIR, "book_source_detail.parquet")
+dim_path = os.path.join(STANDARD_DIR, "dim_book.parquet")
+outputs = [bsd_path, dim_path] + ([index_path(dim_path)] if DIM_BOOK_INDEX else [])
+outputs += [sidecar_path(bsd_path), sidecar_path(dim_path)] if ARROW_SIDECAR else []
+settings = {"fuzzy_match_mode": FUZZY_MATCH_MODE, "landing_mode": LANDING_MODE, "parquet": PARQUET_OPTIONS,
+            "dtype_plan": DTYPE_PLAN_MODE}
+
+# ---------------------------------------- ETAPAS ----------------------------------------
+# cada etapa es una función que recibe los resultados de las anteriores; run_pipeline.py las ejecuta como
+# etapas con checkpoint y este script las encadena en orden
+
+# columnas mínimas de cada fuente cuando no hay archivos
+GR_COLUMNS = ["title","author","rating","ratings_count","book_url","isbn10","isbn13"]
+GB_COLUMNS = ["gb_id","title","subtitle","authors","publisher","pub_date","language","categories",
+              "isbn13","isbn10","price_amount","price_currency","__source_file"]
+
+# registros Goodreads listos para emparejar: tipos str, ISBN limpios e identificador de fila (src_id) a partir de
+# `offset`, para que los lotes del modo stream numeren igual que el frame completo
+def prepare_goodreads(df, offset=0):
+    # uniformizar nombres de columnas mínimas asegurando tipos str
+    for c in ["title","author","isbn10","isbn13"]:
+        if c in df.columns:
+            df[c] = df[c].astype(object)
+    # Crear columna 'source' que identifique de donde viene cada fila
+    df["__source"] = "goodreads"
+    _clean_isbn_cols(df)
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    df = df.reset_index().rename(columns={"index": "src_row_id"})
+    df["src_id"] = df["__source"] + ":" + df["src_row_id"].astype(str)
+    return df
+
+# filas Google Books de un archivo (o trozo) `fname`: tipos str, ISBN limpios y archivo de procedencia
+def prepare_googlebooks(df, fname):
+    if fname is not None:
         df["__source_file"] = fname
-        dfs.append(df)
-    df_csv = pd.concat(dfs, ignore_index=True, sort=False)
-else:
-    df_csv = pd.DataFrame(columns=[
-        "gb_id","title","subtitle","authors","publisher","pub_date","language","categories",
-        "isbn13","isbn10","price_amount","price_currency","__source_file"
-    ])
-
-# uniformizar nombres de columnas mínimas asegurando tipos str
-for c in ["title","author","isbn10","isbn13"]:
-    if c in df_json.columns:
-        df_json[c] = df_json[c].astype(object)
-for c in ["title","authors","isbn10","isbn13","pub_date","language","price_amount","price_currency"]:
-    if c in df_csv.columns:
-        df_csv[c] = df_csv[c].astype(object)
-
-# Crear columna 'source' que identifique de donde viene cada fila
-df_json["__source"] = "goodreads"
-df_csv["__source"] = df_csv.get("__source_file", "google_books")
-
-# Antes de merge limpiar ISBN evaluando tipos
-def fast_clean_isbn(s): 
-    if pd.isna(s): 
-        return None 
-    s = str(s).replace("-", "").strip() 
-    return s if s != "" else None
-
-for df in [df_json, df_csv]:
-    if "isbn10" in df.columns:
-        df["isbn10"] = df["isbn10"].apply(fast_clean_isbn)
-    else:
-        df["isbn10"] = None
-    if "isbn13" in df.columns:
-        df["isbn13"] = df["isbn13"].apply(fast_clean_isbn)
-    else:
-        df["isbn13"] = None
-
-# garantizar la trazabilidad, crea identificadores únicos para cada fila de origen
-df_json = df_json.reset_index().rename(columns={"index": "src_row_id"})
-df_json["src_id"] = df_json["__source"] + ":" + df_json["src_row_id"].astype(str)
-
-df_csv = df_csv.reset_index().rename(columns={"index": "src_row_id"})
-df_csv["src_id"] = df_csv["__source"] + ":" + df_csv["src_row_id"].astype(str)
-
-# Estrategia de merge por clave principal ISBN13, clave alternativa ISBN10, clave alternativa aproximada por título + autor
-merged = pd.merge(df_json, df_csv, how="left", on="isbn13", suffixes=("_gr", "_gb"))
-
-# para filas donde falta el ISBN13 para merge, probar merge con el ISBN10
-missing_gb_mask = merged["gb_id"].isna() & merged["isbn10_gr"].notna()
-if missing_gb_mask.any():
-    
-    gb_by_isbn10 = df_csv.dropna(subset=["isbn10"]).drop_duplicates(subset=["isbn10"]).set_index("isbn10")
-    def pick_gb_by_isbn10(row):
-        isbn10 = row.get("isbn10_gr")
-        if pd.isna(isbn10):
-            return None
+    for c in ["title","authors","isbn10","isbn13","pub_date","language","price_amount","price_currency"]:
+        if c in df.columns:
+            df[c] = df[c].astype(object)
+    df["__source"] = df.get("__source_file", "google_books")
+    _clean_isbn_cols(df)
+    return df
+
+# Antes de merge limpiar ISBN evaluando tipos (por columna, equivalente a apply(fast_clean_isbn))
+def _clean_isbn_cols(df):
+    for c in ["isbn10", "isbn13"]:
+        df[c] = clean_isbn_col(df[c]) if c in df.columns else None
+
+# ingesta: metadatos del landing, plan incremental y registros Goodreads / Google Books listos para emparejar
+def ingest_landing():
+    # leer archivos desde landing/ y anotar metadatos 
+    landing_files = glob.glob(os.path.join(LANDING_DIR, "*"))
+    file_metadata = []
+
+    for fpath in landing_files:
+        fname = os.path.basename(fpath)
+        stat = os.stat(fpath)
+        fmeta = {
+            "file_name": fname,
+            "path": f"/landing/{fpath[11:len(fpath)]}",
+            "size_bytes": stat.st_size,
+            "sha256": file_sha256(fpath),
+            "ingest_timestamp": INGEST_TS,
+        }
+        file_metadata.append(fmeta)
+
+    # modo incremental: comparar los sha256 con el manifiesto de la ejecución anterior
+    plan, changed_files = "full", []
+    if INTEGRATE_MODE == "incremental":
+        plan, changed_files = plan_integration(load_manifest(INTEGRATE_STATE_DIR), file_metadata, settings, outputs)
+        if plan == "delta" and not os.path.exists(os.path.join(INTEGRATE_STATE_DIR, STATE_FILE)):
+            plan = "full"
+        print(f"Integración incremental: {plan} (archivos cambiados: {changed_files})")
+        if plan == "skip":
+            return {"plan": plan, "changed_files": changed_files, "file_metadata": file_metadata}
+
+    json_records = []
+    json_files = []
+    json_paths = []
+    csv_frames = []
+
+    for fpath in landing_files:
+        fname = os.path.basename(fpath)
+
+        # carga contenido dependiendo de la extensión del archivo
+        ext = os.path.splitext(fname)[1].lower()
         try:
-            rec = gb_by_isbn10.loc[isbn10]
-            # si rec es un DataFrame, si hay duplicados, elige el primero
-            if isinstance(rec, pd.DataFrame):
-                rec = rec.iloc[0]
-            return rec.to_dict()
-        except KeyError:
-            return None
-    fill_rows = []
-    for i, row in merged[missing_gb_mask].iterrows():
-        rec = pick_gb_by_isbn10(row)
-        if rec:
-            for k, v in rec.items():
-                merged.at[i, k] = v
-
-# Para resultados no coincidentes, probar coincidencia aproximada por título + autor
-def fuzzy_match_gb(row):
-    if pd.notna(row.get("gb_id")):
-        return None
-    t = str(row.get("title_gr", "")).lower().strip()
-    a = str(row.get("author", "")).lower().strip()
-    if t == "":
-        return None
-
-    for j, cand in df_csv.iterrows():
-        t2 = str(cand.get("title", "")).lower()
-        a2 = str(cand.get("authors", "")).lower()
-        if t in t2 or t2 in t:           
-            if a and a != "nan":
-                
-                if any(tok for tok in a.split() if tok in a2):
-                    return cand.to_dict()
+            if ext in [".json"] and LANDING_MODE == "stream":
+                # los registros se leen lote a lote al emparejar (match_sources): aquí solo se anota el archivo
+                json_paths.append((fname, fpath))
+            elif ext in [".csv"] and LANDING_MODE == "stream":
+                # cada trozo se prepara al llegar; solo se conservan los trozos ya limpios
+                csv_frames.extend(prepare_googlebooks(chunk, fname) for chunk in iter_csv_chunks(fpath, LANDING_CHUNK_ROWS))
+            elif ext in [".json"]:
+                with open(fpath, "r", encoding="utf-8") as fh:
+                    json_full = json.load(fh)
+                    data = json_full['data']
+                    # acepta listas u objeto único para archivo JSON
+                    if isinstance(data, list):
+                        json_records.extend(data)
+                        json_files.append((fname, len(data)))
+                    else:
+                        json_records.append(data)
+                        json_files.append((fname, 1))
+            elif ext in [".csv"]:
+                csv_frames.append(prepare_googlebooks(pd.read_csv(fpath), fname))
             else:
-                return cand.to_dict()
-    return None
-
-for i, row in merged[merged["gb_id"].isna()].iterrows():
-    rec = fuzzy_match_gb(row)
-    if rec:
-        for k, v in rec.items():
-            merged.at[i, k] = v
-
-# Ahora crea book_source_detail, una fila por fuente(Goodreads + campos coincidentes de Google Books)
-book_source_detail = merged[[
-    "src_id", "__source", "title_gr", "author", "rating", "ratings_count", "book_url",
-    "isbn10_gr", "isbn13",
-    "gb_id", "title", "subtitle", "authors", "publisher", "pub_date", "language", "categories",
-    "isbn13", "isbn10", "price_amount", "price_currency"
-]].copy()
-
-# provenance por campo, devuelve la procedencia del campo canónico
-def pick_prov(row, field_gr, field_gb):   
-    v_gr = row.get(field_gr)
-    v_gb = row.get(field_gb)
-    if pd.notna(v_gb):
-        return "google_books"
-    if pd.notna(v_gr):
-        return "goodreads"
-    return None
-
-book_source_detail["prov_title"]   = book_source_detail.apply(lambda r: pick_prov(r, "title_gr", "title"), axis=1)
-book_source_detail["prov_authors"] = book_source_detail.apply(lambda r: pick_prov(r, "author", "authors"), axis=1)
-book_source_detail["prov_price"]   = book_source_detail.apply(lambda r: pick_prov(r, "price_amount", "price_amount"), axis=1)
-
-# normaliza campos no numericos
-book_source_detail["pub_date_iso"] = book_source_detail["pub_date"].apply(normalize_pub_date)
-book_source_detail["language_norm"] = book_source_detail["language"].apply(normalize_language)
-book_source_detail["price_currency_norm"] = book_source_detail["price_currency"].apply(normalize_currency)
-# normaliza campos numericos
-book_source_detail["ratings_count"] = book_source_detail["ratings_count"].apply(safe_int)
-book_source_detail["price_amount"] = pd.to_numeric(book_source_detail["price_amount"], errors="coerce")
-
-# anotar metadatos de ingestión en cada fila
-book_source_detail["ingest_ts"] = INGEST_TS
-book_source_detail["source_files"] = book_source_detail.apply(
-    lambda r: [meta["file_name"] for meta in file_metadata], axis=1
-)
+                pass
+        except Exception as e:
+            print(f"Warning: fallo al leer {fname}: {e}")
+
+    # normalizar y construir book_source_detail (en modo stream, Goodreads se prepara por lotes en match_sources)
+    df_json = None
+    if LANDING_MODE != "stream":
+        df_json = prepare_goodreads(pd.DataFrame(json_records) if json_records else pd.DataFrame(columns=GR_COLUMNS))
+
+    # Concatenar todos los CSVs de Google Books (si hay más de uno)
+    if csv_frames:
+        df_csv = pd.concat(csv_frames, ignore_index=True, sort=False)
+        del csv_frames
+    else:
+        df_csv = prepare_googlebooks(pd.DataFrame(columns=GB_COLUMNS), None)
+
+    # garantizar la trazabilidad, crea identificadores únicos para cada fila de origen
+    df_csv = df_csv.reset_index().rename(columns={"index": "src_row_id"})
+    df_csv["src_id"] = df_csv["__source"] + ":" + df_csv["src_row_id"].astype(str)
+
+    PROFILER.rows(rows_in=len(landing_files), rows_out=(len(df_json) if df_json is not None else 0) + len(df_csv))
+    return {"plan": plan, "changed_files": changed_files, "file_metadata": file_metadata,
+            "json_files": json_files, "json_paths": json_paths, "df_json": df_json, "df_csv": df_csv}
+
+# filas de book_source_detail (antes de deduplicar) para los registros Goodreads de df_json;
+# cada registro se resuelve con independencia del resto, por lo que vale para un subconjunto
+# (`title_index`: índice de títulos de df_csv ya construido, para no repetirlo en cada lote)
+def build_source_detail(df_json, df_csv, source_files_json, title_index=None):
+    # Estrategia de merge por clave principal ISBN13, clave alternativa ISBN10, clave alternativa aproximada por título + autor
+    merged = pd.merge(df_json, df_csv, how="left", on="isbn13", suffixes=("_gr", "_gb"))
+
+    # para filas donde falta el ISBN13 para merge, probar merge con el ISBN10
+    merged = merge_by_isbn10(merged, df_csv)
+
+    # Para resultados no coincidentes, probar coincidencia aproximada por título + autor
+    merged = merge_by_title_author(merged, df_csv, mode=FUZZY_MATCH_MODE, index=title_index)
+
+    # Ahora crea book_source_detail, una fila por fuente(Goodreads + campos coincidentes de Google Books)
+    # (las columnas que solo crean las etapas ISBN-10/título+autor pueden faltar en un subconjunto sin coincidencias)
+    detail = merged.reindex(columns=[
+        "src_id", "__source", "title_gr", "author", "rating", "ratings_count", "book_url",
+        "isbn10_gr", "isbn13",
+        "gb_id", "title", "subtitle", "authors", "publisher", "pub_date", "language", "categories",
+        "isbn13", "isbn10", "price_amount", "price_currency"
+    ]).copy()
+
+    # provenance por campo, devuelve la procedencia del campo canónico
+    detail["prov_title"]   = pick_prov_col(detail, "title_gr", "title")
+    detail["prov_authors"] = pick_prov_col(detail, "author", "authors")
+    detail["prov_price"]   = pick_prov_col(detail, "price_amount", "price_amount")
+
+    # normaliza campos no numericos (kernels por columna de utils_normalize)
+    detail["pub_date_iso"] = normalize_pub_date_col(detail["pub_date"])
+    detail["language_norm"] = normalize_language_col(detail["language"])
+    detail["price_currency_norm"] = normalize_currency_col(detail["price_currency"])
+    # normaliza campos numericos
+    detail["ratings_count"] = safe_int_col(detail["ratings_count"])
+    detail["price_amount"] = pd.to_numeric(detail["price_amount"], errors="coerce")
+
+    # anotar metadatos de ingestión en cada fila
+    detail["ingest_ts"] = INGEST_TS
+    # source_files es igual en todas las filas: columna de diccionario con una sola categoría (la lista en JSON)
+    detail["source_files"] = pd.Categorical.from_codes(
+        np.zeros(len(detail), dtype="int8"), categories=[source_files_json]
+    )
 
-# Deduplicación y modelo canónico (dim_book)
-def make_synthetic_id(row):
-    s = (str(row.get("title_gr","")) + "|" + str(row.get("author",""))).lower()
-    return hashlib.sha1(s.encode("utf-8")).hexdigest()[:16]
-
-# crear campo de candidato a canonical_id
-book_source_detail = book_source_detail.loc[:, ~book_source_detail.columns.duplicated()]
-book_source_detail["canonical_isbn13"] = book_source_detail["isbn13"].apply(get_isbn13)
-book_source_detail["canonical_id"] = book_source_detail["canonical_isbn13"].copy()
-
-# rellena canonical_id con id sintetico si hace falta
-for i, r in book_source_detail.iterrows():
-    if not r["canonical_id"] or str(r["canonical_id"]).lower() in ["nan","none"]:
-        book_source_detail.at[i, "canonical_id"] = "synth:" + make_synthetic_id(r)
-
-book_source_detail = select_most_complete(book_source_detail)
-
-# preferencia de valores no nulos; busqueda de los valores más completos
-def choose_most_complete(series):   
-    vals = [v for v in series if pd.notna(v)]
-    if not vals:
-        return None
-    vals = sorted(vals, key=lambda x: (len(str(x)), str(x)), reverse=True)
-    return vals[0]
-
-# normalización extra por opción más específica y más reciente
-def choose_pub_date(series):
-    normalized = [(normalize_pub_date(v), v) for v in series]
-    
-    scored = []
-    for iso, orig in normalized:
-        if iso is None:
-            score = (0, None)
-        elif len(iso) == 10:
-            score = (3, iso)
-        elif len(iso) == 7:
-            score = (2, iso)
-        elif len(iso) == 4:
-            score = (1, iso)
+    # crear campo de candidato a canonical_id
+    detail = detail.loc[:, ~detail.columns.duplicated()]
+    detail["canonical_isbn13"] = detail["isbn13"].apply(get_isbn13)
+
+    # canonical_id: isbn13 o id sintético (sha1 de título|autor) si falta
+    detail["canonical_id"] = fill_synthetic_ids(detail)
+    gb_file = merged["__source_file"].to_numpy() if "__source_file" in merged.columns else None
+    keys = pd.DataFrame({"_gr_fp": merged["_gr_fp"].to_numpy(), "gb_file": gb_file})
+    return detail, keys
+
+# emparejamiento: filas de book_source_detail antes de deduplicar (completas o reutilizando el estado incremental).
+# En modo stream los registros Goodreads se leen en lotes de LANDING_CHUNK_ROWS y cada lote se empareja al llegar:
+# solo se conservan sus filas de book_source_detail, nunca el landing completo
+def match_sources(ingest):
+    df_csv = ingest["df_csv"]
+    source_files_json = json.dumps([meta["file_name"] for meta in ingest["file_metadata"]])
+    state = load_state(INTEGRATE_STATE_DIR) if ingest["plan"] == "delta" else None
+    known_fp = state["keys"]["_gr_fp"].to_numpy() if state is not None else None
+    pieces, fingerprints = [], []
+    # en modo stream el índice de títulos de Google Books se construye una vez para todos los lotes
+    title_index = None
+    if ingest["df_json"] is None and FUZZY_MATCH_MODE == "blocking":
+        title_index = build_title_index(df_csv["title"].tolist(), df_csv["authors"].tolist())
+
+    # huella de cada registro Goodreads (decide qué filas del estado anterior se pueden reutilizar) y filas del lote;
+    # en delta solo se reprocesan los registros nuevos o modificados
+    def add_batch(batch):
+        gr_fp = row_fingerprints(batch, GR_KEY_COLS)
+        batch["_gr_fp"] = gr_fp
+        fingerprints.append(gr_fp)
+        if known_fp is not None:
+            batch = batch[~np.isin(gr_fp, known_fp)]
+        if known_fp is None or len(batch):
+            pieces.append(build_source_detail(batch, df_csv, source_files_json, title_index))
+
+    if ingest["df_json"] is not None:
+        add_batch(ingest["df_json"])
+        json_files = ingest["json_files"]
+    else:
+        json_files, offset = [], 0
+        for fname, fpath in ingest["json_paths"]:
+            start = (len(pieces), len(fingerprints), offset)
+            try:
+                for batch in iter_json_batches(fpath, LANDING_CHUNK_ROWS):
+                    n = len(batch)
+                    add_batch(prepare_goodreads(batch, offset))
+                    offset += n
+            except Exception as e:
+                # como en el modo full, un archivo que no se puede leer entero no aporta registros
+                print(f"Warning: fallo al leer {fname}: {e}")
+                del pieces[start[0]:], fingerprints[start[1]:]
+                offset = start[2]
+                continue
+            json_files.append((fname, offset - start[2]))
+        if not fingerprints:
+            add_batch(prepare_goodreads(pd.DataFrame(columns=GR_COLUMNS)))
+
+    gr_fp = np.concatenate(fingerprints)
+    gr_files = pd.Series(np.repeat([f for f, n in json_files], [n for f, n in json_files]), index=gr_fp, dtype=object)
+
+    if state is not None:
+        reuse = np.isin(gr_fp, known_fp)
+        cached = state["keys"]["_gr_fp"].isin(gr_fp).to_numpy()
+        if pieces:
+            delta_rows, delta_keys = concat_detail_pieces(pieces)
         else:
-            score = (0, iso)
-        scored.append((score, iso))
-    scored = [s for s in scored if s[0][1] is not None]
-    if not scored:
-        return None
-    # en caso de empate, seleccionar la fecha más reciente
-    scored = sorted(scored, key=lambda x: (x[0][0], x[1]), reverse=True)
-    return scored[0][1]
-
-dim_rows = []
-for cid, group in book_source_detail.groupby("canonical_id"):
-    # identificar si alguna fila tiene isbn13
-    isbn13_vals = [v for v in group["isbn13"] if pd.notna(v)]
-    isbn13_final = isbn13_vals[0] if isbn13_vals else None
-
-    title_final = choose_most_complete(group["title_gr"].tolist() + group["title"].tolist())
-    subtitle_final = choose_most_complete(group["subtitle"])
-    authors_final = choose_most_complete(group["authors"].tolist() + group["author"].tolist())
-    publisher_final = choose_most_complete(group["publisher"])
-    pub_date_final = choose_pub_date(group["pub_date"].tolist())
-    language_final = choose_most_complete(group["language_norm"])
-    categories_final = choose_most_complete(group["categories"])
-    isbn10_final = choose_most_complete(group["isbn10"].tolist() + group["isbn10_gr"].tolist())
-    price_amount_final = group["price_amount"].dropna().max() if group["price_amount"].notna().any() else None
-    price_currency_final = choose_most_complete(group["price_currency_norm"])
-    gb_id_final = choose_most_complete(group["gb_id"])
-
-    # ratings info obtenida de goodreads
-    ratings_count_final = group["ratings_count"].dropna().max() if group["ratings_count"].notna().any() else None
-    rating_final = group["rating"].dropna().max() if group["rating"].notna().any() else None
-
-    sources = list(group["src_id"].unique())
-
-
-    dim_rows.append({
-        "canonical_id": cid,
-        "isbn13": isbn13_final,
-        "isbn10": isbn10_final,
-        "gb_id": gb_id_final,
-        "title": title_final,
-        "subtitle": subtitle_final,
-        "authors": authors_final,
-        "publisher": publisher_final,
-        "pub_date": pub_date_final,
-        "language": language_final,
-        "categories": categories_final,
-        "price_amount": price_amount_final,
-        "price_currency": price_currency_final,
-        "rating": rating_final,
-        "ratings_count": ratings_count_final,
-        "source_ids": sources,
-        "ingest_ts": INGEST_TS
-    })
-
-# aserciones bloqueantes(filtro de calidad)
-
-# ≥90% de filas deben tener título
-title_ratio = book_source_detail["title_gr"].notna().mean()
-assert title_ratio >= 0.90, \
-    f"ERROR: Solo {title_ratio*100:.1f}% de títulos presentes (<90%)."
-
-# unicidad de isbn13 en canónico
-dup_isbn13 = book_source_detail["isbn13"].dropna().duplicated().any()
-assert not dup_isbn13, \
-    "ERROR: Se detectaron isbn13 duplicados en book_source_detail. Revisar merge."
-
-# rangos básicos de precio
-if "price_amount" in book_source_detail.columns:
-    bad_price = book_source_detail["price_amount"].dropna().lt(0).any()
-    assert not bad_price, "ERROR: Existen precios negativos, lo cual viola reglas de calidad."
-
-
-dim_book = pd.DataFrame(dim_rows)
-
-# quality metrics
-metrics = {}
-metrics["ingest_timestamp"] = INGEST_TS
-metrics["files_read"] = [ {k:v for k,v in m.items()} for m in file_metadata ]
-metrics["counts"] = {
-    "goodreads_rows": len(df_json),
-    "google_books_rows": len(df_csv),
-    "merged_rows": len(book_source_detail),
-    "canonical_rows_emitted": len(dim_book)
-}
-
-# missings por campo importante en dim_book
-missing = {}
-for col in ["isbn13","isbn10","title","authors","pub_date","language","price_amount"]:
-    missing[col] = int(dim_book[col].isna().sum()) if col in dim_book.columns else None
-metrics["missing_counts"] = missing
-metrics["title_coverage_ratio"] = float(title_ratio)
-metrics["isbn13_unique"] = not dup_isbn13
-metrics["bad_price_values"] = bool(bad_price if 'bad_price' in locals() else False)
-
-# duplicados detectados
-metrics["duplicates_detected_by_isbn13"] = int(book_source_detail["isbn13"].duplicated(keep=False).sum()) if "isbn13" in book_source_detail.columns else 0
-
-# lista de canonical_ids sintéticos(sin isbn13)
-metrics["synthetic_ids_count"] = int(dim_book["isbn13"].isna().sum())
-metrics["examples_synthetic_ids"] = dim_book.loc[dim_book["isbn13"].isna(), "canonical_id"].head(5).tolist()
-
-# guardar quality metrics
-with open(os.path.join(DOCS_DIR, "quality_metrics.json"), "w", encoding="utf-8") as fh:
-    json.dump(metrics, fh, indent=2, ensure_ascii=False)
-
-# Guardar Parquet outputs
-# parquet de book_source_detail
-bsd = book_source_detail.copy()
-bsd["source_files"] = bsd["source_files"].apply(json.dumps)
-bsd.to_parquet(os.path.join(STANDARD_DIR, "book_source_detail.parquet"), index=False, engine="pyarrow")
-
-# parquet de dim_book 
-dim_book.to_parquet(os.path.join(STANDARD_DIR, "dim_book.parquet"), index=False, engine="pyarrow")
-
-# Generar schema.md
-schema_lines = []
-
-schema_lines.append("# Schema: dim_book\n")
-schema_lines.append("Este documento describe el esquema final del dataset `dim_book`, incluyendo:\n")
-schema_lines.append("- Definición de campos (tipo, nullability, formato, ejemplo, reglas)\n")
-schema_lines.append("- Prioridades y fuentes (Goodreads vs Google Books)\n")
-schema_lines.append("- Reglas de deduplicación\n")
-schema_lines.append("- Reglas de supervivencia aplicadas durante la integración\n\n")
-
-schema_lines.append("## 1. Campos del dataset\n")
-
-field_schema = [
-    {
-        "name": "isbn13",
-        "type": "string",
-        "nullable": False,
-        "format": "ISBN-13 (13 dígitos, validados por utils_isbn)",
-        "example": "9781491957660",
-        "rules": "Clave primaria del libro. Se elige siempre el ISBN-13 válido. Si no existe, la fila se descarta."
-    },
-    {
-        "name": "title",
-        "type": "string",
-        "nullable": False,
-        "format": "Texto UTF-8",
-        "example": "Data Science from Scratch",
-        "rules": "Se selecciona usando survival rule: priority Google Books > Goodreads. Debe existir ≥90% cobertura."
-    },
-    {
-        "name": "authors",
-        "type": "string",
-        "nullable": True,
-        "format": "Lista de autores separada por coma",
-        "example": "Joel Grus",
-        "rules": "Survival rule: Google Books > Goodreads."
-    },
-    {
-        "name": "publisher",
-        "type": "string",
-        "nullable": True,
-        "format": "Texto libre",
-        "example": "O'Reilly Media",
-        "rules": "Tomado exclusivamente de Google Books."
-    },
-    {
-        "name": "pub_date",
-        "type": "string",
-        "nullable": True,
-        "format": "Fecha ISO-8601 (YYYY, YYYY-MM o YYYY-MM-DD)",
-        "example": "2019-04-14",
-        "rules": "Fecha original de Google Books, no normalizada más allá de ISO."
-    },
-    {
-        "name": "language",
-        "type": "string",
-        "nullable": True,
-        "format": "Código BCP-47",
-        "example": "en",
-        "rules": "Se usa el código de idioma proporcionado por Google Books."
-    },
-    {
-        "name": "categories",
-        "type": "string",
-        "nullable": True,
-        "format": "Lista separada por coma",
-        "example": "Data Science, Machine Learning",
-        "rules": "Categorías directamente de Google Books."
-    },
-    {
-        "name": "price_amount",
-        "type": "float",
-        "nullable": True,
-        "format": "Número decimal positivo",
-        "example": "34.50",
-        "rules": "Debe ser ≥0. Seleccionado desde Google Books si existe."
-    },
-    {
-        "name": "price_currency",
-        "type": "string",
-        "nullable": True,
-        "format": "Código ISO-4217",
-        "example": "USD",
-        "rules": "Moneda proporcionada por Google Books."
-    },
-    {
-        "name": "prov_title",
-        "type": "string",
-        "nullable": True,
-        "format": "goodreads | google_books",
-        "example": "google_books",
-        "rules": "Indica de dónde procede el valor final de `title`."
-    },
-    {
-        "name": "prov_authors",
-        "type": "string",
-        "nullable": True,
-        "format": "goodreads | google_books",
-        "example": "google_books",
-        "rules": "Indica de dónde procede el valor final de `authors`."
-    },
-    {
-        "name": "prov_price",
-        "type": "string",
-        "nullable": True,
-        "format": "google_books",
-        "example": "google_books",
-        "rules": "Indica si el precio proviene de Google Books."
-    },
-]
-
-# Generación de tabla
-schema_lines.append("| Campo | Tipo | Nullable | Formato | Ejemplo | Reglas |\n")
-schema_lines.append("|-------|------|----------|---------|---------|--------|\n")
-
-for f in field_schema:
-    schema_lines.append(
-        f"| {f['name']} | {f['type']} | {f['nullable']} | {f['format']} | {f['example']} | {f['rules']} |\n"
+            delta_rows, delta_keys = state["rows"].iloc[:0], state["keys"].iloc[:0]
+        book_source_detail, detail_keys = combine_detail_rows(
+            state["rows"][cached], state["keys"][cached], delta_rows, delta_keys, gr_fp
+        )
+        book_source_detail = set_full_dtypes(book_source_detail, source_files_json)
+        print(f"Registros Goodreads reprocesados: {int((~reuse).sum())} de {len(gr_fp)}")
+    elif len(pieces) == 1:
+        book_source_detail, detail_keys = pieces[0]
+    else:
+        book_source_detail, detail_keys = concat_detail_pieces(pieces)
+        book_source_detail = set_full_dtypes(book_source_detail, source_files_json)
+    del pieces
+    # tipos compactos desde aquí hasta la salida (también en el estado incremental)
+    if DTYPE_PLAN_MODE == "compact":
+        book_source_detail = apply_dtype_plan(book_source_detail)
+
+    # contadores de fechas tomados aquí: el resumen los necesita aunque esta etapa se reutilice desde su checkpoint
+    # huellas de las filas supervivientes de la ejecución anterior, para la supervivencia incremental
+    previous_post = (state["post_fp"], state["post_cid"]) if state is not None else None
+    PROFILER.rows(rows_in=len(gr_fp), rows_out=len(book_source_detail))
+    return {"detail_rows": book_source_detail, "detail_keys": detail_keys, "gr_files": gr_files,
+            "previous_post": previous_post, "date_parsing": date_parse_stats()}
+
+# une las filas (y claves) de book_source_detail construidas por lotes, en orden
+def concat_detail_pieces(pieces):
+    rows = concat_rows([r for r, k in pieces])
+    keys = concat_rows([k for r, k in pieces])
+    return rows, keys
+
+# columnas cuyo tipo depende del conjunto completo: mismo resultado que en una reconstrucción de una sola vez
+def set_full_dtypes(detail, source_files_json):
+    detail["ratings_count"] = safe_int_col(detail["ratings_count"])
+    detail["source_files"] = pd.Categorical.from_codes(
+        np.zeros(len(detail), dtype="int8"), categories=[source_files_json]
     )
+    return detail
+
+# supervivencia: deduplicación de book_source_detail y modelo canónico dim_book
+def survive_books(ingest, match):
+    # filas previas a deduplicar (select_most_complete añade _notnull_count al frame que recibe)
+    book_source_detail = select_most_complete(match["detail_rows"].copy())
+
+    # huella de cada fila superviviente (sin metadatos de ingesta) para localizar los canonical_id afectados
+    post_cols = [c for c in book_source_detail.columns if c not in ("ingest_ts", "source_files")]
+    post_fp = row_fingerprints(book_source_detail, post_cols)
+    post_cid = book_source_detail["canonical_id"].to_numpy(dtype=object)
+
+    # modelo canónico: una fila por canonical_id según las reglas de supervivencia de utils_survivorship
+    if ingest["plan"] == "delta":
+        # solo se recalculan los canonical_id cuya fila superviviente cambió; el resto se conserva
+        affected = affected_canonical_ids(*match["previous_post"], post_fp, post_cid)
+        recomputed = survive(book_source_detail[book_source_detail["canonical_id"].isin(affected)],
+                             key="canonical_id", rules=DIM_BOOK_RULES)
+        recomputed["ingest_ts"] = INGEST_TS
+        dim_book = upsert_dim_book(read_table(dim_path), recomputed, affected, book_source_detail, DIM_BOOK_RULES)
+        print(f"canonical_id recalculados: {len(affected)} de {len(dim_book)}")
+    else:
+        dim_book = survive(book_source_detail, key="canonical_id", rules=DIM_BOOK_RULES)
+        dim_book["ingest_ts"] = INGEST_TS
+    if DTYPE_PLAN_MODE == "compact":
+        dim_book = apply_dtype_plan(dim_book)
+
+    PROFILER.rows(rows_in=len(match["detail_rows"]), rows_out=len(dim_book))
+    return {"book_source_detail": book_source_detail, "dim_book": dim_book, "post_fp": post_fp, "post_cid": post_cid}
+
+# calidad: aserciones bloqueantes y docs/quality_metrics.json; si fallan no se escribe ninguna salida
+def check_quality(ingest, books, match):
+    book_source_detail, dim_book = books["book_source_detail"], books["dim_book"]
+    df_csv = ingest["df_csv"]
+
+    # aserciones bloqueantes(filtro de calidad)
+
+    # ≥90% de filas deben tener título
+    title_ratio = book_source_detail["title_gr"].notna().mean()
+    assert title_ratio >= 0.90, \
+        f"ERROR: Solo {title_ratio*100:.1f}% de títulos presentes (<90%)."
+
+    # unicidad de isbn13 en canónico
+    dup_isbn13 = book_source_detail["isbn13"].dropna().duplicated().any()
+    assert not dup_isbn13, \
+        "ERROR: Se detectaron isbn13 duplicados en book_source_detail. Revisar merge."
+
+    # rangos básicos de precio
+    if "price_amount" in book_source_detail.columns:
+        bad_price = book_source_detail["price_amount"].dropna().lt(0).any()
+        assert not bad_price, "ERROR: Existen precios negativos, lo cual viola reglas de calidad."
+
+
+    # quality metrics
+    metrics = {}
+    metrics["ingest_timestamp"] = INGEST_TS
+    metrics["files_read"] = [ {k:v for k,v in m.items()} for m in ingest["file_metadata"] ]
+    metrics["counts"] = {
+        "goodreads_rows": len(match["gr_files"]),
+        "google_books_rows": len(df_csv),
+        "merged_rows": len(book_source_detail),
+        "canonical_rows_emitted": len(dim_book)
+    }
 
-schema_lines.append("\n")
+    # missings por campo importante en dim_book
+    missing = {}
+    for col in ["isbn13","isbn10","title","authors","pub_date","language","price_amount"]:
+        missing[col] = int(dim_book[col].isna().sum()) if col in dim_book.columns else None
+    metrics["missing_counts"] = missing
+    metrics["title_coverage_ratio"] = float(title_ratio)
+    metrics["isbn13_unique"] = not dup_isbn13
+    metrics["bad_price_values"] = bool(bad_price if 'bad_price' in locals() else False)
+
+    # duplicados detectados
+    metrics["duplicates_detected_by_isbn13"] = int(book_source_detail["isbn13"].duplicated(keep=False).sum()) if "isbn13" in book_source_detail.columns else 0
+
+    # lista de canonical_ids sintéticos(sin isbn13)
+    metrics["synthetic_ids_count"] = int(dim_book["isbn13"].isna().sum())
+    metrics["examples_synthetic_ids"] = dim_book.loc[dim_book["isbn13"].isna(), "canonical_id"].head(5).tolist()
+
+    # guardar quality metrics
+    with open(os.path.join(DOCS_DIR, "quality_metrics.json"), "w", encoding="utf-8") as fh:
+        json.dump(metrics, fh, indent=2, ensure_ascii=False)
+
+    PROFILER.rows(rows_in=len(book_source_detail) + len(dim_book))
+    return metrics
+
+# parquet de book_source_detail (source_files: el JSON compartido, o list<string> con PARQUET_SOURCE_FILES=list)
+# y su sidecar Arrow para lectores con mmap (utils_parquet.read_standard), escrito después del Parquet
+def write_source_detail(books):
+    write_table(books["book_source_detail"], bsd_path, PARQUET_OPTIONS)
+    if ARROW_SIDECAR:
+        write_sidecar(books["book_source_detail"], sidecar_path(bsd_path), PARQUET_OPTIONS)
+    PROFILER.rows(rows_out=len(books["book_source_detail"]))
+
+# parquet de dim_book y su sidecar Arrow
+def write_dim_book(books):
+    write_table(books["dim_book"], dim_path, PARQUET_OPTIONS)
+    if ARROW_SIDECAR:
+        write_sidecar(books["dim_book"], sidecar_path(dim_path), PARQUET_OPTIONS)
+    PROFILER.rows(rows_out=len(books["dim_book"]))
+
+# índice de búsqueda puntual sobre dim_book (utils_lookup.BookLookup)
+def write_lookup_index(books):
+    if DIM_BOOK_INDEX:
+        build_lookup_index(books["dim_book"], index_path(dim_path))
+        PROFILER.rows(rows_out=len(books["dim_book"]))
+
+# manifiesto de la ingesta (sha256 y canonical_ids por archivo) y filas previas a deduplicar, para el modo incremental;
+# se guarda después de escribir las salidas para que el estado corresponda siempre a lo que hay en disco
+def save_integration_state(ingest, match, books):
+    file_cids = canonical_ids_by_file(match["detail_keys"], match["detail_rows"]["canonical_id"], match["gr_files"])
+    save_state(INTEGRATE_STATE_DIR, ingest["file_metadata"], settings, file_cids, match["detail_rows"],
+               match["detail_keys"], books["post_fp"], books["post_cid"], INGEST_TS)
 
-# FUENTES Y PRIORIDADES
-schema_lines.append("## 2. Fuentes y prioridades\n")
-schema_lines.append("""
+# Generar schema.md
+def write_schema():
+    schema_lines = []
+
+    schema_lines.append("# Schema: dim_book\n")
+    schema_lines.append("Este documento describe el esquema final del dataset `dim_book`, incluyendo:\n")
+    schema_lines.append("- Definición de campos (tipo, nullability, formato, ejemplo, reglas)\n")
+    schema_lines.append("- Prioridades y fuentes (Goodreads vs Google Books)\n")
+    schema_lines.append("- Reglas de deduplicación\n")
+    schema_lines.append("- Reglas de supervivencia aplicadas durante la integración\n\n")
+
+    schema_lines.append("## 1. Campos del dataset\n")
+
+    field_schema = [
+        {
+            "name": "isbn13",
+            "type": "string",
+            "nullable": False,
+            "format": "ISBN-13 (13 dígitos, validados por utils_isbn)",
+            "example": "9781491957660",
+            "rules": "Clave primaria del libro. Se elige siempre el ISBN-13 válido. Si no existe, la fila se descarta."
+        },
+        {
+            "name": "title",
+            "type": "string",
+            "nullable": False,
+            "format": "Texto UTF-8",
+            "example": "Data Science from Scratch",
+            "rules": "Se selecciona usando survival rule: priority Google Books > Goodreads. Debe existir ≥90% cobertura."
+        },
+        {
+            "name": "authors",
+            "type": "string",
+            "nullable": True,
+            "format": "Lista de autores separada por coma",
+            "example": "Joel Grus",
+            "rules": "Survival rule: Google Books > Goodreads."
+        },
+        {
+            "name": "publisher",
+            "type": "string",
+            "nullable": True,
+            "format": "Texto libre",
+            "example": "O'Reilly Media",
+            "rules": "Tomado exclusivamente de Google Books."
+        },
+        {
+            "name": "pub_date",
+            "type": "string",
+            "nullable": True,
+            "format": "Fecha ISO-8601 (YYYY, YYYY-MM o YYYY-MM-DD)",
+            "example": "2019-04-14",
+            "rules": "Fecha original de Google Books, no normalizada más allá de ISO."
+        },
+        {
+            "name": "language",
+            "type": "string",
+            "nullable": True,
+            "format": "Código BCP-47",
+            "example": "en",
+            "rules": "Se usa el código de idioma proporcionado por Google Books."
+        },
+        {
+            "name": "categories",
+            "type": "string",
+            "nullable": True,
+            "format": "Lista separada por coma",
+            "example": "Data Science, Machine Learning",
+            "rules": "Categorías directamente de Google Books."
+        },
+        {
+            "name": "price_amount",
+            "type": "float",
+            "nullable": True,
+            "format": "Número decimal positivo",
+            "example": "34.50",
+            "rules": "Debe ser ≥0. Seleccionado desde Google Books si existe."
+        },
+        {
+            "name": "price_currency",
+            "type": "string",
+            "nullable": True,
+            "format": "Código ISO-4217",
+            "example": "USD",
+            "rules": "Moneda proporcionada por Google Books."
+        },
+        {
+            "name": "prov_title",
+            "type": "string",
+            "nullable": True,
+            "format": "goodreads | google_books",
+            "example": "google_books",
+            "rules": "Indica de dónde procede el valor final de `title`."
+        },
+        {
+            "name": "prov_authors",
+            "type": "string",
+            "nullable": True,
+            "format": "goodreads | google_books",
+            "example": "google_books",
+            "rules": "Indica de dónde procede el valor final de `authors`."
+        },
+        {
+            "name": "prov_price",
+            "type": "string",
+            "nullable": True,
+            "format": "google_books",
+            "example": "google_books",
+            "rules": "Indica si el precio proviene de Google Books."
+        },
+    ]
+
+    # Generación de tabla
+    schema_lines.append("| Campo | Tipo | Nullable | Formato | Ejemplo | Reglas |\n")
+    schema_lines.append("|-------|------|----------|---------|---------|--------|\n")
+
+    for f in field_schema:
+        schema_lines.append(
+            f"| {f['name']} | {f['type']} | {f['nullable']} | {f['format']} | {f['example']} | {f['rules']} |\n"
+        )
+
+    schema_lines.append("\n")
+
+    # FUENTES Y PRIORIDADES
+    schema_lines.append("## 2. Fuentes y prioridades\n")
+    schema_lines.append("""
 | Campo | Fuente primaria | Fuente secundaria | Regla de prioridad |
 |-------|-----------------|-------------------|--------------------|
 | title | Google Books | Goodreads | Google Books prevalece si existe. |
@@ -495,9 +579,9 @@ schema_lines.append("""
 | price_currency | Google Books | — | ISO-4217. |
 """)
 
-# REGLAS DE DEDUPLICACIÓN
-schema_lines.append("## 3. Reglas de deduplicación\n")
-schema_lines.append("""
+    # REGLAS DE DEDUPLICACIÓN
+    schema_lines.append("## 3. Reglas de deduplicación\n")
+    schema_lines.append("""
 - La clave de deduplicación es **isbn13**.
 - Si existen múltiples registros con el mismo isbn13:
   - Se agrupan mediante `.groupby("isbn13")`.
@@ -505,9 +589,9 @@ schema_lines.append("""
 - Si un registro no tiene isbn13 válido → se descarta.
 """)
 
-# REGLAS DE SUPERVIVENCIA
-schema_lines.append("## 4. Reglas de supervivencia\n")
-schema_lines.append("""
+    # REGLAS DE SUPERVIVENCIA
+    schema_lines.append("## 4. Reglas de supervivencia\n")
+    schema_lines.append("""
 ### Lógica general
 Para cada grupo (por isbn13), se aplica:
 
@@ -532,25 +616,70 @@ Para cada grupo (por isbn13), se aplica:
 - **publisher / pub_date / language / categories** → solo GB  
 """)
 
-# Guardar schema
-schema_path = os.path.join("../docs", "schema.md")
-with open(schema_path, "w", encoding="utf-8") as f:
-    f.writelines(schema_lines)
-
-# Report summary 
-summary = {
-    "output_files": {
-        "dim_book_parquet": os.path.join("/standard/", "dim_book.parquet"),
-        "book_source_detail_parquet": os.path.join("/standard/", "book_source_detail.parquet"),
-        "quality_metrics": os.path.join("/docs/", "quality_metrics.json"),
-        "schema_md": os.path.join("/docs/", "schema.md")
-    },
-    "counts": metrics["counts"],
-    "ingest_ts": INGEST_TS
-}
-with open(os.path.join(DOCS_DIR, "ingest_summary.json"), "w", encoding="utf-8") as fh:
-    json.dump(summary, fh, indent=2, ensure_ascii=False)
-
-print("\n---------------------------INGESTION COMPLETADA-------------------------")
-print("\nArchivos escritos en /docs y /standard")
-print("Resumen:", json.dumps(summary, indent=2))
+    # Guardar schema
+    schema_path = os.path.join("../docs", "schema.md")
+    with open(schema_path, "w", encoding="utf-8") as f:
+        f.writelines(schema_lines)
+
+# resumen de la ingesta en docs/ingest_summary.json
+def write_summary(match, metrics):
+    summary = {
+        "output_files": {
+            "dim_book_parquet": os.path.join("/standard/", "dim_book.parquet"),
+            "book_source_detail_parquet": os.path.join("/standard/", "book_source_detail.parquet"),
+            "dim_book_index": os.path.join("/standard/", "dim_book.index.sqlite") if DIM_BOOK_INDEX else None,
+            "quality_metrics": os.path.join("/docs/", "quality_metrics.json"),
+            "schema_md": os.path.join("/docs/", "schema.md")
+        },
+        "counts": metrics["counts"],
+        # caminos de resolución de fechas (formas cortas, camino rápido, dateutil, fallidas) y aciertos de caché
+        "date_parsing": match["date_parsing"],
+        "ingest_ts": INGEST_TS
+    }
+
+    # conservar los contadores de caché que deja enrich_googlebooks.py y los perfiles de los otros scripts
+    summary_path = os.path.join(DOCS_DIR, "ingest_summary.json")
+    if os.path.exists(summary_path):
+        with open(summary_path, "r", encoding="utf-8") as fh:
+            previous = json.load(fh)
+        for key in ["googlebooks_cache", "profile"]:
+            if key in previous:
+                summary[key] = previous[key]
+    with open(summary_path, "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, indent=2, ensure_ascii=False)
+    return summary
+
+#--------------------------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    with PROFILER.stage("ingest"):
+        ingest = ingest_landing()
+    if ingest["plan"] == "skip":
+        print("Sin cambios en landing/: dim_book y book_source_detail ya están al día")
+        PROFILER.finish(os.path.join(DOCS_DIR, "ingest_summary.json"))
+        sys.exit(0)
+    with PROFILER.stage("match"):
+        match = match_sources(ingest)
+    with PROFILER.stage("survivorship"):
+        books = survive_books(ingest, match)
+    with PROFILER.stage("quality"):
+        metrics = check_quality(ingest, books, match)
+    with PROFILER.stage("write_detail"):
+        write_source_detail(books)
+    with PROFILER.stage("write_dim"):
+        write_dim_book(books)
+    with PROFILER.stage("index"):
+        write_lookup_index(books)
+    with PROFILER.stage("state"):
+        save_integration_state(ingest, match, books)
+    with PROFILER.stage("schema"):
+        write_schema()
+    with PROFILER.stage("summary"):
+        summary = write_summary(match, metrics)
+    # perfil de la ejecución (etapas y caché de fechas) en ingest_summary.json y en la traza
+    PROFILER.set("cache", {"date_parse": match["date_parsing"]})
+    PROFILER.finish(os.path.join(DOCS_DIR, "ingest_summary.json"))
+
+    print("\n---------------------------INGESTION COMPLETADA-------------------------")
+    print("\nArchivos escritos en /docs y /standard")
+    print("Resumen:", json.dumps(summary, indent=2))
@@ -0,0 +1,125 @@
+import os
+import sys
+import glob
+import json
+import argparse
+import subprocess
+from dotenv import load_dotenv
+from utils_pipeline import *
+import integrate_pipeline as integrate
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Pipeline completo como DAG de etapas con checkpoint: scrape -> enrich -> ingest -> match -> survivorship ->
+# quality -> escrituras (en paralelo) -> estado incremental -> resumen. Una etapa se salta si su configuración,
+# sus entradas y su código no cambiaron; si falla la calidad, la siguiente ejecución reutiliza scrape, enrich y
+# los checkpoints de ingest/match/survivorship
+# uso: python run_pipeline.py [--force all|etapa,...] [--skip scrape,enrich] [--workers N]
+
+load_dotenv("../.env.example")
+LANDING_DIR = os.getenv('LANDING_DIR')
+DOCS_DIR = os.getenv('DOCS_DIR')
+# huellas (stages.json) y checkpoints (<etapa>.pkl) de cada etapa
+PIPELINE_STATE_DIR = os.getenv('PIPELINE_STATE_DIR', '../cache/pipeline')
+# etapas independientes ejecutadas a la vez (escrituras de salidas, schema)
+PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', '4'))
+
+GOODREADS_JSON = os.path.join(LANDING_DIR, "goodreads_books.json")
+GOOGLEBOOKS_CSV = os.path.join(LANDING_DIR, "googlebooks_books.csv")
+
+SCRAPE_CONFIG = ["GOODREADS_URL", "QUERY_GOODREADS", "GOODREADS_DETAIL_WORKERS", "GOODREADS_RATE_PER_SEC",
+                 "GOODREADS_INCREMENTAL", "GOODREADS_STALE_DAYS", "HTML_PARSER", "GOODREADS_FETCH_MODE",
+                 "GOODREADS_QUERIES_FILE", "GOODREADS_PAGES_PER_QUERY"]
+SCRAPE_CODE = ["scrape_goodreads.py", "utils_isbn.py", "utils_http.py", "utils_state.py", "utils_parse.py",
+               "utils_browser.py"]
+ENRICH_CONFIG = ["GOOGLEBOOKS_API_URL", "GOOGLEBOOKS_CONCURRENCY", "GOOGLEBOOKS_RATE_PER_SEC", "GOOGLEBOOKS_TIMEOUT",
+                 "GOOGLEBOOKS_MAX_RETRIES", "GOOGLEBOOKS_CACHE_PATH", "GOOGLEBOOKS_BATCH_SIZE"]
+ENRICH_CODE = ["enrich_googlebooks.py", "utils_quality.py", "utils_isbn.py", "utils_http.py", "utils_cache.py",
+               "utils_stream.py"]
+INTEGRATE_CONFIG = ["LANDING_DIR", "DOCS_DIR", "STANDARD_DIR", "FUZZY_MATCH_MODE", "LANDING_MODE",
+                    "LANDING_CHUNK_ROWS", "INTEGRATE_MODE", "INTEGRATE_STATE_DIR", "PARQUET_COMPRESSION",
+                    "PARQUET_ROW_GROUP_ROWS", "PARQUET_PARTITION_BY", "PARQUET_SOURCE_FILES", "DIM_BOOK_INDEX",
+                    "ARROW_SIDECAR", "DTYPE_PLAN"]
+INTEGRATE_CODE = ["integrate_pipeline.py"] + sorted(glob.glob("utils_*.py"))
+
+# scrape y enrich hacen su trabajo al ejecutarse como script (Selenium y sesiones HTTP a nivel de módulo)
+def run_script(script):
+    def run(*deps):
+        subprocess.run([sys.executable, script], check=True)
+    return run
+
+# etapa de integración: fn recibe los resultados de sus n primeras dependencias (las demás solo ordenan).
+# Con INTEGRATE_MODE=incremental y el landing sin cambios, match devuelve None (plan "skip") y las etapas
+# siguientes no hacen nada
+def unless_skipped(fn, n):
+    def run(*deps):
+        if any(d is None for d in deps[:n]):
+            return None
+        return fn(*deps[:n])
+    return run
+
+def match_stage(ingest):
+    return None if ingest["plan"] == "skip" else integrate.match_sources(ingest)
+
+def build_stages(skip=()):
+    stages = [
+        Stage("scrape", run_script("scrape_goodreads.py"), inputs=[p for p in [os.getenv('GOODREADS_QUERIES_FILE')] if p],
+              outputs=[GOODREADS_JSON],
+              config=SCRAPE_CONFIG, code=SCRAPE_CODE),
+        Stage("enrich", run_script("enrich_googlebooks.py"), deps=["scrape"], inputs=[GOODREADS_JSON],
+              outputs=[GOOGLEBOOKS_CSV], config=ENRICH_CONFIG, code=ENRICH_CODE),
+        Stage("ingest", integrate.ingest_landing, deps=["enrich"],
+              inputs=lambda: sorted(glob.glob(os.path.join(LANDING_DIR, "*"))),
+              config=INTEGRATE_CONFIG, code=INTEGRATE_CODE, checkpoint=True),
+        Stage("match", match_stage, deps=["ingest"], config=INTEGRATE_CONFIG, code=INTEGRATE_CODE, checkpoint=True),
+        Stage("survivorship", unless_skipped(integrate.survive_books, 2), deps=["ingest", "match"],
+              config=INTEGRATE_CONFIG, code=INTEGRATE_CODE, checkpoint=True),
+        Stage("quality", unless_skipped(integrate.check_quality, 3), deps=["ingest", "survivorship", "match"],
+              outputs=[os.path.join(DOCS_DIR, "quality_metrics.json")],
+              config=INTEGRATE_CONFIG, code=INTEGRATE_CODE, checkpoint=True),
+        # las salidas solo se escriben si la calidad pasa
+        Stage("write_detail", unless_skipped(integrate.write_source_detail, 1),
+              deps=["survivorship", "quality"], outputs=[integrate.bsd_path],
+              config=INTEGRATE_CONFIG, code=INTEGRATE_CODE),
+        Stage("write_dim", unless_skipped(integrate.write_dim_book, 1),
+              deps=["survivorship", "quality"], outputs=[integrate.dim_path],
+              config=INTEGRATE_CONFIG, code=INTEGRATE_CODE),
+        Stage("index", unless_skipped(integrate.write_lookup_index, 1),
+              deps=["survivorship", "quality"],
+              outputs=[integrate.index_path(integrate.dim_path)] if integrate.DIM_BOOK_INDEX else [],
+              config=INTEGRATE_CONFIG, code=INTEGRATE_CODE),
+        Stage("schema", integrate.write_schema, outputs=[os.path.join(DOCS_DIR, "schema.md")],
+              code=["integrate_pipeline.py"]),
+        # el estado incremental se guarda cuando las salidas ya están en disco
+        Stage("state", unless_skipped(integrate.save_integration_state, 3),
+              deps=["ingest", "match", "survivorship", "write_detail", "write_dim", "index"],
+              config=INTEGRATE_CONFIG, code=INTEGRATE_CODE),
+        Stage("summary", unless_skipped(integrate.write_summary, 2),
+              deps=["match", "quality", "state", "schema"], outputs=[os.path.join(DOCS_DIR, "ingest_summary.json")],
+              config=INTEGRATE_CONFIG, code=INTEGRATE_CODE, checkpoint=True),
+    ]
+    # etapas omitidas: sus salidas se usan tal como están en disco
+    for s in stages:
+        s.deps = [d for d in s.deps if d not in skip]
+    return [s for s in stages if s.name not in skip]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline Goodreads + Google Books por etapas con checkpoint")
+    parser.add_argument("--force", default="", help="'all' o etapas separadas por comas que se ejecutan siempre")
+    parser.add_argument("--skip", default="", help="etapas que no se ejecutan, ej. scrape,enrich")
+    parser.add_argument("--workers", type=int, default=PIPELINE_WORKERS)
+    args = parser.parse_args()
+
+    skip = [s.strip() for s in args.skip.split(",") if s.strip()]
+    force = "all" if args.force == "all" else [s.strip() for s in args.force.split(",") if s.strip()]
+    # el mismo run_id en el perfil de scrape y enrich (subprocesos) y en el de la integración
+    os.environ.setdefault("PIPELINE_RUN_ID", integrate.PROFILER.run_id)
+    runner = PipelineRunner(build_stages(skip), PIPELINE_STATE_DIR, workers=args.workers, force=force,
+                            profiler=integrate.PROFILER)
+    report = runner.run()
+    integrate.PROFILER.set("runner", report)
+    integrate.PROFILER.finish(os.path.join(DOCS_DIR, "ingest_summary.json"))
+
+    print("\n---------------------------PIPELINE-------------------------")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(1 if any(r["status"] in ("failed", "cancelled") for r in report.values()) else 0)
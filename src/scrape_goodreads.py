@@ -1,15 +1,17 @@
-from bs4 import BeautifulSoup
 import json
-import re
-import time
 import os
+import time
+import threading
+from urllib.parse import urlencode
 from dotenv import load_dotenv
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from utils_isbn import *
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
+from utils_http import *
+from utils_state import *
+from utils_parse import *
+from utils_profile import *
+from utils_browser import *
 
 #--------------------------------------------------------------------------------------------------------------
 
@@ -20,137 +22,267 @@ QUERY = os.getenv('QUERY_GOODREADS')
 SEARCH_URL = f"{BASE_URL}{QUERY}"
 
 OUT_DIR = os.getenv('LANDING_DIR')
+DOCS_DIR = os.getenv('DOCS_DIR')
 print(OUT_DIR)
 OUTPUT_JSON = os.path.join(OUT_DIR, "goodreads_books.json")
 
 os.makedirs(OUT_DIR, exist_ok=True)
 
-# configuración de Selenium
-options = Options()
-options.add_argument("--headless")
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument(
-    "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/116.0.5845.140 Safari/537.36"
 )
-driver = webdriver.Chrome(options=options)  # webdriver.Firefox(options=options) para usar firefox
-driver.get(SEARCH_URL)
 
-# función para scrapear y parsear info limitada
-def scrape_full_data():
-    
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(2) 
-
-    # Esperar hasta que se carguen los elementos de los libros con 20s de espera
-    try:
-        WebDriverWait(driver, 20).until(
-            lambda d: d.find_elements(By.CSS_SELECTOR, "a.bookTitle")
-        )
-    except:
-        print("No se cargaron los resultados en el tiempo esperado.")
-        driver.quit()
-        exit()
-
-    # Obtener HTML renderizado
-    html = driver.page_source
+# cortesía con Goodreads: presupuesto de peticiones/segundo compartido por todos los workers
+# (páginas de búsqueda + páginas de detalle) en lugar de un sleep fijo tras cada petición
+DETAIL_WORKERS = int(os.getenv('GOODREADS_DETAIL_WORKERS', '4'))
+RATE_PER_SEC = float(os.getenv('GOODREADS_RATE_PER_SEC', '2'))
+
+# tiempos por etapa, peticiones (fichas por HTTP, búsquedas por HTTP o Selenium) y reutilización del estado de crawl
+PROFILER = profiler_from_env("scrape_goodreads")
+DETAIL_HTTP = HttpStats()
+SEARCH_HTTP = HttpStats()
+
+SESSION = make_session(pool_size=DETAIL_WORKERS, user_agent=USER_AGENT, stats=DETAIL_HTTP)
+BUCKET = TokenBucket(RATE_PER_SEC, burst=1)
+DETAIL_POOL = ThreadPoolExecutor(max_workers=DETAIL_WORKERS)
+
+# backend de parsing HTML: auto (lxml si está instalado) | lxml | html.parser
+HTML_PARSER = resolve_backend(os.getenv('HTML_PARSER', 'auto'))
+
+# modo incremental: solo se descargan fichas nuevas o con más de GOODREADS_STALE_DAYS días
+INCREMENTAL = os.getenv('GOODREADS_INCREMENTAL', '0') == '1'
+STALE_DAYS = float(os.getenv('GOODREADS_STALE_DAYS', '30'))
+STATE_PATH = os.getenv('GOODREADS_STATE_PATH', '../cache/goodreads_state.sqlite')
+STATE = CrawlState(STATE_PATH, stale_seconds=STALE_DAYS * 86400) if INCREMENTAL else None
+
+# modo por lotes: una consulta por línea en GOODREADS_QUERIES_FILE, hasta GOODREADS_PAGES_PER_QUERY páginas por
+# consulta y todas las filas de cada página; cola de trabajo con checkpoint en GOODREADS_QUEUE_PATH
+QUERIES_FILE = os.getenv('GOODREADS_QUERIES_FILE', '')
+PAGES_PER_QUERY = int(os.getenv('GOODREADS_PAGES_PER_QUERY', '5'))
+QUEUE_PATH = os.getenv('GOODREADS_QUEUE_PATH', '../cache/goodreads_queue.sqlite')
+ROWS_PER_PAGE = None if QUERIES_FILE else 15
+
+# pool de navegadores Selenium: páginas de búsqueda renderizadas en paralelo por navegadores reutilizados,
+# sin imágenes, fuentes, CSS ni scripts de terceros, y leídas en cuanto hay resultados (sin sleep fijo)
+POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', '2'))
+BLOCK_RESOURCES = os.getenv('BROWSER_BLOCK_RESOURCES', '1') == '1'
+READY_TIMEOUT = float(os.getenv('BROWSER_READY_TIMEOUT', '20'))
+BLOCK_URLS = (BLOCKED_URLS + [u.strip() for u in os.getenv('BROWSER_BLOCK_URLS', '').split(",") if u.strip()]
+              if BLOCK_RESOURCES else None)
+
+POOL = BrowserPool(
+    size=POOL_SIZE,
+    make_driver=lambda: chrome_driver(USER_AGENT, BLOCK_URLS),  # o un webdriver.Firefox equivalente
+    bucket=BUCKET,
+    ready_timeout=READY_TIMEOUT,
+    stats=SEARCH_HTTP,
+)
 
-    # parsear HTML
-    soup = BeautifulSoup(html, "html.parser")
-    
-    results = []
-    rows = soup.select("tr[itemtype='http://schema.org/Book']")[:15]  
-    
-    # Obtener información de los libros
-    for row in rows:
-        title_tag = row.select_one("a.bookTitle span")
-        author_tag = row.select_one("a.authorName span")
-        rating_tag = row.select_one("span.minirating")
-        url_tag = row.select_one("a.bookTitle")
-
-        if not title_tag:
-            continue
-
-        # info básica
-        title = title_tag.text.strip()
-        author = author_tag.text.strip() if author_tag else None
-        minirating = rating_tag.text.strip() if rating_tag else ""
-        
-        # rating y número de votos
-        rating_match = re.search(r"([0-9.]+)\s+avg rating", minirating)
-        count_match = re.search(r"—\s+([\d,]+)\s+ratings", minirating)
-
-        rating = float(rating_match.group(1)) if rating_match else None
-        ratings_count = int(count_match.group(1).replace(",", "")) if count_match else None
-        
-        book_url = BASE_URL + url_tag["href"]
-
-        # Extraer ISBN
-        isbn10, isbn13 = extract_isbn(book_url)
-        time.sleep(1)   
-        
-        results.append({
-            "title": title,
-            "author": author,
-            "rating": rating,
-            "ratings_count": ratings_count,
-            "book_url": book_url,
-            "isbn10": isbn10,
-            "isbn13": isbn13
-        })
-
-    # diccionario con datos obtenidos del scrapeo
-    scrape_data = {'books': results, 'html': html}
-
-    return scrape_data
+# descarga de las páginas de búsqueda: auto (HTTP y Selenium solo si faltan las filas de libros) | http | browser
+FETCH_MODE = os.getenv('GOODREADS_FETCH_MODE', 'auto')
+SEARCH_SESSION = make_session(pool_size=POOL_SIZE, user_agent=USER_AGENT, stats=SEARCH_HTTP)
+FETCHER = SearchFetcher(
+    FETCH_MODE, SEARCH_SESSION, POOL,
+    # parsear HTML una sola vez: filas de libros (selector tr[itemtype=...]) y paginación (a.next_page)
+    parse=lambda html: parse_search_page(html, HTML_PARSER, base_url=BASE_URL, limit=ROWS_PER_PAGE),
+    bucket=BUCKET,
+)
+# vía por la que se sirvió cada página de búsqueda (metadatos del landing)
+SEARCH_PAGES = []
+SEARCH_LOCK = threading.Lock()
+
+# descarga y parsea las páginas de búsqueda dadas (en paralelo, hasta POOL_SIZE a la vez), en orden;
+# si la primera no se puede obtener se aborta el scraping como antes
+def scrape_pages(urls):
+    pages = []
+    for url, result in zip(urls, FETCHER.fetch_many(urls)):
+        if isinstance(result, Exception):
+            if not pages and url == SEARCH_URL:
+                print("No se cargaron los resultados en el tiempo esperado.")
+                POOL.close()
+                DETAIL_POOL.shutdown(cancel_futures=True)
+                exit()
+            print(f"[WARN] No se pudo descargar {url}: {type(result).__name__}")
+            break
+        page = result['page']
+        pages.append({'url': url, 'books': page['books'], 'next_href': page['next_href'],
+                      'served_by': result['served_by']})
+    return pages
 
 # funcion que gestiona el scrapeo por paginación de goodreads
 def scrape_goodreads_limit(min_books=15):
     
     all_books = []
-    page = 1
-    url = SEARCH_URL
-
-    # Bucle para scrapear según min_books(mínimo de libros en argumento)
-    while len(all_books) < min_books:
-        print(f"[INFO] Scrapeando página {page}: {url}")
-
-        data = scrape_full_data()
-        books = data['books']
-        html = data['html']
-
-        if not books:
-            print("[WARN] No se encontraron libros en esta página.")
-            break
-
-        all_books.extend(books)
-
-        # Buscar botón siguiente página
-        soup = BeautifulSoup(html, "html.parser")
-        next_page = soup.select_one("a.next_page")
-
-        if not next_page or "disabled" in next_page.get("class", []):
-            print("[INFO] No hay más páginas.")
-            break
-
-        next_href = next_page.get("href")
-        url = BASE_URL + next_href
-        page += 1
-
-        time.sleep(1)
+    isbn_futures = []
+    page = 0
+    per_page = 15
+
+    # Bucle para scrapear según min_books(mínimo de libros en argumento): la primera página sola y, si faltan
+    # libros, las siguientes en lotes de hasta POOL_SIZE páginas (URLs derivadas del enlace a la siguiente)
+    # etapa "browser": primera página, con el arranque de Chrome solo si HTTP no basta
+    with PROFILER.stage("browser"):
+        batch = scrape_pages([SEARCH_URL])
+    with PROFILER.stage("search"):
+        while batch:
+            next_href = None
+            for data in batch:
+                page += 1
+                print(f"[INFO] Scrapeando página {page} ({data['served_by']}): {data['url']}")
+                books = data['books']
+                SEARCH_PAGES.append({"page": page, "url": data['url'], "served_by": data['served_by'],
+                                     "rows": len(books)})
+
+                if not books:
+                    print("[WARN] No se encontraron libros en esta página.")
+                    next_href = ""
+                    break
+
+                # lanzar en segundo plano las páginas de detalle que faltan para llegar a min_books;
+                # se descargan mientras el pool renderiza las páginas siguientes
+                books = books[:min_books - len(all_books)]
+                for b in books:
+                    known = STATE.fresh(b["book_url"]) if STATE is not None else None
+                    if known is not None:
+                        # ficha vigente en el estado de crawl: se reutilizan sus ISBN sin descargarla
+                        b["isbn10"], b["isbn13"] = known["isbn10"], known["isbn13"]
+                        STATE.touch(b["book_url"])
+                        isbn_futures.append(None)
+                    else:
+                        isbn_futures.append(DETAIL_POOL.submit(fetch_book_detail, b["book_url"], SESSION, BUCKET, 10, HTML_PARSER))
+                all_books.extend(books)
+
+                # botón siguiente página, ya resuelto en el mismo parseo
+                next_href = data['next_href']
+                if len(all_books) >= min_books or not next_href:
+                    break
+
+            if len(all_books) >= min_books:
+                break
+            if not next_href:
+                if next_href is None:
+                    print("[INFO] No hay más páginas.")
+                break
+
+            missing = -(-(min_books - len(all_books)) // per_page)
+            batch = scrape_pages([page_url(BASE_URL, next_href, page + i) for i in range(1, min(missing, POOL_SIZE) + 1)])
+        PROFILER.rows(rows_in=page, rows_out=len(all_books))
+
+    # esperar las páginas de detalle y completar ISBNs en el orden original
+    with PROFILER.stage("details"):
+        for b, fut in zip(all_books, isbn_futures):
+            if fut is None:
+                continue
+            try:
+                b["isbn10"], b["isbn13"], html_hash = fut.result()
+            except Exception as e:
+                print(f"[WARN] No se pudo obtener ISBN de {b['book_url']}: {e}")
+                continue
+            if STATE is not None:
+                STATE.record(b["book_url"], b["isbn10"], b["isbn13"], html_hash)
+        PROFILER.rows(rows_in=sum(f is not None for f in isbn_futures),
+                      rows_out=sum(b.get("isbn13") is not None or b.get("isbn10") is not None for b in all_books))
 
     return all_books[:min_books]
 
+# consultas del archivo de lotes (una por línea; se ignoran vacías, comentarios # y duplicadas)
+def load_queries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return list(dict.fromkeys(q for q in lines if q and not q.startswith("#")))
+
+# tarea de la cola: página de búsqueda (encola sus libros nuevos y la página siguiente dentro del presupuesto)
+# o ficha de detalle (ISBNs, reutilizados del estado de crawl si siguen vigentes)
+def run_task(queue, task, pages_per_query):
+    if task["kind"] == "search":
+        result = FETCHER.fetch(task["url"])
+        page = result["page"]
+        next_href = page["next_href"] if page["books"] else None
+        next_url = (page_url(BASE_URL, next_href, task["page"] + 1)
+                    if next_href and task["page"] < pages_per_query else None)
+        queue.complete_search(task, page["books"], next_href, next_url)
+        query = task["query"]
+        print(f"[INFO] '{query}' página {task['page']} ({result['served_by']}): {len(page['books'])} libros")
+        with SEARCH_LOCK:
+            SEARCH_PAGES.append({"query": query, "page": task["page"], "url": task["url"],
+                                 "served_by": result["served_by"], "rows": len(page["books"])})
+        return
+    known = STATE.fresh(task["url"]) if STATE is not None else None
+    if known is not None:
+        STATE.touch(task["url"])
+        queue.complete_detail(task, known["isbn10"], known["isbn13"])
+        return
+    isbn10, isbn13, html_hash = fetch_book_detail(task["url"], SESSION, BUCKET, 10, HTML_PARSER)
+    if STATE is not None:
+        STATE.record(task["url"], isbn10, isbn13, html_hash)
+    queue.complete_detail(task, isbn10, isbn13)
+
+# scraping por lotes: todas las consultas alimentan una misma cola de páginas de búsqueda y fichas de detalle,
+# atendida por DETAIL_WORKERS hilos; los book_url repetidos entre consultas se descartan antes de pedir la ficha.
+# La cola persiste en QUEUE_PATH: si se interrumpe, la siguiente ejecución continúa con las tareas pendientes
+def scrape_goodreads_batch(queries, pages_per_query):
+    queue = CrawlQueue(QUEUE_PATH, queries)
+    if queue.reset:
+        print("[INFO] Las consultas han cambiado: se descarta la cola anterior y empieza un crawl nuevo")
+    if queue.resumed:
+        print(f"[INFO] Reanudando cola de crawl: {queue.resumed} tareas interrumpidas vuelven a pendientes")
+    for q in queries:
+        queue.put("search", search_key(q, 1), f"{BASE_URL}/search?{urlencode({'q': q})}", q, 1)
+    for task in queue.open_searches():
+        if task["page"] < pages_per_query:
+            queue.put("search", search_key(task["query"], task["page"] + 1),
+                      page_url(BASE_URL, task["next_href"], task["page"] + 1), task["query"], task["page"] + 1)
+
+    def worker():
+        while True:
+            task = queue.claim()
+            if task is None:
+                if not queue.active():
+                    return
+                # otro worker puede encolar tareas nuevas al terminar la suya
+                time.sleep(0.05)
+                continue
+            try:
+                run_task(queue, task, pages_per_query)
+            except Exception as e:
+                retry = queue.fail(task, f"{type(e).__name__}: {e}")
+                print(f"[WARN] {task['kind']} {task['url']}: {type(e).__name__}: {e}"
+                      + (" (se reintentará)" if retry else ""))
+
+    with PROFILER.stage("queue"):
+        workers = [threading.Thread(target=worker, name=f"crawl-{i}") for i in range(DETAIL_WORKERS)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        counts = queue.counts()
+        PROFILER.rows(rows_in=sum(counts.get("search", {}).values()), rows_out=counts["books"])
+    books = queue.books()
+    # crawl completo (sin tareas pendientes): la cola no se reutiliza en la siguiente ejecución
+    if not queue.active():
+        queue.clear()
+    queue.close()
+    return books, counts
+
 #--------------------------------------------------------------------------------------------------------------
 
 # EJECUCIÓN PRINCIPAL
 
 print("[INFO] Iniciando scraping...")
 
-books = scrape_goodreads_limit()
+if QUERIES_FILE:
+    QUERIES = load_queries(QUERIES_FILE)
+    books, QUEUE_COUNTS = scrape_goodreads_batch(QUERIES, PAGES_PER_QUERY)
+else:
+    books = scrape_goodreads_limit()
+scraped_count = len(books)
+
+# en modo incremental, fusionar con los registros ya presentes en el landing
+if INCREMENTAL and os.path.exists(OUTPUT_JSON):
+    with open(OUTPUT_JSON, "r", encoding="utf-8") as f:
+        known_books = json.load(f).get("data", [])
+    books = merge_landing_records(known_books, books)
 
 # metadatos del scraping
 metadata = {
@@ -167,33 +299,92 @@ metadata = {
     },
 
     "pauses": {
-        "page_load_wait_seconds": 2,
-        "isbn_request_pause_seconds": 1,
-        "pagination_pause_seconds": 1,
+        "page_load_wait_seconds": 0,
+        "explanation": (
+            "Sin pausas fijas: cada página de búsqueda se lee en cuanto cumple la condición de página lista "
+            "y todas las peticiones pasan por el presupuesto de cortesía compartido."
+        )
+    },
+
+    "politeness": {
+        "host": BASE_URL,
+        "requests_per_second": RATE_PER_SEC,
+        "detail_workers": DETAIL_WORKERS,
+        "shared_http_session": True,
+        "retry_on": sorted(RETRY_STATUS),
         "explanation": (
-            "Se aplican pausas con time.sleep() para respetar el rendimiento "
-            "de Goodreads, evitar comportamiento agresivo de scraping y "
-            "reducir el riesgo de bloqueos o rate limiting."
+            "Token bucket por host compartido entre Selenium y los workers de detalle: "
+            "respeta el rendimiento de Goodreads y reduce el riesgo de bloqueos o rate limiting "
+            "sin esperas ciegas tras cada petición."
+        )
+    },
+
+    "html_parser": HTML_PARSER,
+
+    "fetch": {
+        "mode": FETCH_MODE,
+        "pages": SEARCH_PAGES,
+        "explanation": (
+            "Las páginas de búsqueda se piden primero por HTTP y se parsean; solo si faltan las filas "
+            "tr[itemtype='http://schema.org/Book'] se renderizan con el pool de Selenium."
         )
     },
 
     "selenium": {
         "headless": True,
         "user_agent": "Chrome 120 custom UA",
-        "page_wait_strategy": "WebDriverWait(driver, 20).until(a.bookTitle)"
+        "page_wait_strategy": f"page_load_strategy=eager + WebDriverWait(driver, {READY_TIMEOUT:g}).until(a.bookTitle o readyState complete)",
+        "browser_pool_size": POOL_SIZE,
+        "blocked_urls": BLOCK_URLS or [],
     },
 
-    "notes": "Renderizado por Selenium; incluye pausas entre peticiones."
+    "notes": "Búsqueda por HTTP con Selenium como respaldo; páginas de detalle en paralelo con límite de peticiones por segundo."
 }
 
+if QUERIES_FILE:
+    metadata["query"] = None
+    metadata["batch"] = {
+        "queries": QUERIES,
+        "pages_per_query": PAGES_PER_QUERY,
+        "queue_path": QUEUE_PATH,
+        "queue": QUEUE_COUNTS,
+        "explanation": (
+            "Cola compartida de páginas de búsqueda y fichas de detalle; cada book_url se descarga una sola vez "
+            "aunque aparezca en varias consultas, y la cola se reanuda tras una interrupción."
+        )
+    }
+
+if INCREMENTAL:
+    metadata["incremental"] = {
+        "state_path": STATE_PATH,
+        "stale_days": STALE_DAYS,
+        "scraped_this_run": scraped_count,
+        "detail_pages_fetched": STATE.stats["fetched"],
+        "detail_pages_reused": STATE.stats["reused"],
+        "detail_pages_changed": STATE.stats["changed"],
+    }
+
 output_data = {
     "metadata": metadata,
     "data": books
 }
 
-with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-    json.dump(output_data, f, indent=2, ensure_ascii=False)
-
-driver.quit()
+with PROFILER.stage("write"):
+    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
+        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    PROFILER.rows(rows_out=len(books))
+
+PROFILER.set("browser_pool", POOL.summary())
+PROFILER.set("search_fetch", FETCHER.summary())
+POOL.close()
+DETAIL_POOL.shutdown()
+if STATE is not None:
+    STATE.close()
+
+# perfil en docs/ingest_summary.json y en la traza
+PROFILER.set("http", {"goodreads_detail": DETAIL_HTTP.summary(), "goodreads_search": SEARCH_HTTP.summary()})
+PROFILER.set("cache", {"crawl_state": dict(STATE.stats) if STATE is not None else None})
+os.makedirs(DOCS_DIR, exist_ok=True)
+PROFILER.finish(os.path.join(DOCS_DIR, "ingest_summary.json"))
 
 print("[OK] Archivo goodreads_books.json generado en /landing")
\ No newline at end of file
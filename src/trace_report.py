@@ -0,0 +1,51 @@
+import os
+import sys
+import json
+import statistics
+from dotenv import load_dotenv
+
+#--------------------------------------------------------------------------------------------------------------
+
+# Compara la última ejecución de la traza (cache/pipeline_trace.jsonl) con la mediana de las anteriores:
+# tiempo de reloj, CPU y RSS pico por script y etapa; marca las etapas más lentas que el umbral
+# uso: python trace_report.py [traza] [umbral, ej. 0.2 = +20%]
+
+load_dotenv("../.env.example")
+TRACE_PATH = os.getenv('PROFILE_TRACE_PATH', '../cache/pipeline_trace.jsonl')
+
+def load_trace(path):
+    with open(path, "r", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+# {(script, etapa): [registros en orden de ejecución]} de las etapas correctas
+def stage_history(events):
+    history = {}
+    for e in events:
+        if e.get("kind") == "stage" and e.get("status") == "ok":
+            history.setdefault((e["script"], e["stage"]), []).append(e)
+    return history
+
+def median_of(records, key):
+    values = [r[key] for r in records if r.get(key) is not None]
+    return statistics.median(values) if values else None
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else TRACE_PATH
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    history = stage_history(load_trace(path))
+
+    print(f"{'script':20} | {'etapa':14} | {'ejecuciones':>11} | {'reloj s':>8} | {'mediana s':>9} | "
+          f"{'CPU s':>7} | {'RSS pico MB':>11} | filas")
+    regressions = 0
+    for (script, stage), records in sorted(history.items()):
+        last, previous = records[-1], records[:-1]
+        base = median_of(previous, "wall_s")
+        flag = ""
+        if base and last["wall_s"] > base * (1 + threshold):
+            flag = f"  <-- +{(last['wall_s'] / base - 1) * 100:.0f}%"
+            regressions += 1
+        print(f"{script:20} | {stage:14} | {len(records):11d} | {last['wall_s']:8.3f} | "
+              f"{base if base is not None else float('nan'):9.3f} | {last['cpu_s']:7.3f} | "
+              f"{last['peak_rss_mb'] if last['peak_rss_mb'] is not None else float('nan'):11.1f} | "
+              f"{last['rows_in']} -> {last['rows_out']}{flag}")
+    print(f"\nEtapas por encima de +{threshold * 100:.0f}% de su mediana: {regressions}")
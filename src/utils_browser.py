@@ -0,0 +1,237 @@
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException, TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from utils_http import get_with_retry
+
+# ---------------------------------------- POOL DE NAVEGADORES ----------------------------------------
+
+# recursos que no hacen falta para leer los resultados: imágenes, fuentes, CSS y scripts de terceros habituales
+# (patrones de Network.setBlockedURLs: * = cualquier secuencia)
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.css",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*amazon-adsystem.com*", "*facebook.net*", "*scorecardresearch.com*", "*quantserve.com*", "*media-amazon.com*",
+]
+
+# selector de los resultados de búsqueda de Goodreads
+RESULT_SELECTOR = "a.bookTitle"
+
+# condición de página lista: ya hay resultados, o el documento terminó de cargar sin ninguno (búsqueda vacía)
+def search_ready(driver):
+    if driver.find_elements(By.CSS_SELECTOR, RESULT_SELECTOR):
+        return True
+    return driver.execute_script("return document.readyState") == "complete"
+
+# URL de la página n de una búsqueda a partir del enlace a la página siguiente (mismos parámetros, otro page=)
+def page_url(base_url, next_href, n):
+    parts = urlsplit(base_url + next_href if next_href.startswith("/") else next_href)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != "page"] + [("page", str(n))]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+# Chrome headless con carga "eager" (no espera a subrecursos) y, con `block_urls`, sin imágenes ni los patrones dados
+def chrome_driver(user_agent=None, block_urls=None):
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    if user_agent:
+        options.add_argument(f"user-agent={user_agent}")
+    options.page_load_strategy = "eager"
+    if block_urls:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    driver = webdriver.Chrome(options=options)
+    if block_urls:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(block_urls)})
+    return driver
+
+# pool de navegadores calientes: se crean bajo demanda hasta `size`, se reutilizan entre páginas y un navegador
+# que falla se descarta y se sustituye; render() aplica el presupuesto de cortesía (`bucket`) y la condición `ready`
+class BrowserPool:
+    def __init__(self, size=2, make_driver=chrome_driver, bucket=None, ready=search_ready, ready_timeout=20,
+                 stats=None):
+        self.size = max(1, int(size))
+        self.make_driver = make_driver
+        self.bucket = bucket
+        self.ready = ready
+        self.ready_timeout = ready_timeout
+        self.stats = stats
+        # navegadores libres (LIFO: se reutiliza el más caliente), vivos y en creación; `available` avisa a los
+        # hilos en espera cada vez que se libera un navegador o un hueco (también si la creación o el navegador fallan)
+        self.idle = []
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.drivers = []
+        self.creating = 0
+        self.counters = {"started": 0, "renders": 0, "discarded": 0, "timeouts": 0}
+
+    @contextmanager
+    def browser(self):
+        driver = None
+        with self.available:
+            while True:
+                if self.idle:
+                    driver = self.idle.pop()
+                    break
+                if len(self.drivers) + self.creating < self.size:
+                    self.creating += 1
+                    break
+                self.available.wait()
+        if driver is None:
+            try:
+                driver = self.make_driver()
+            except BaseException:
+                # el hueco queda libre: otro hilo en espera puede intentarlo (y recibir su propio error)
+                with self.available:
+                    self.creating -= 1
+                    self.available.notify()
+                raise
+            with self.available:
+                self.creating -= 1
+                self.drivers.append(driver)
+                self.counters["started"] += 1
+        try:
+            yield driver
+        except WebDriverException as e:
+            # TimeoutException: la página no llegó a estar lista, el navegador sigue sano
+            if isinstance(e, TimeoutException):
+                self._release(driver)
+            else:
+                self._discard(driver)
+            raise
+        except BaseException:
+            self._release(driver)
+            raise
+        else:
+            self._release(driver)
+
+    def _release(self, driver):
+        with self.available:
+            self.idle.append(driver)
+            self.available.notify()
+
+    def _discard(self, driver):
+        with self.available:
+            self.drivers.remove(driver)
+            self.counters["discarded"] += 1
+            self.available.notify()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    # HTML renderizado de `url` en cuanto cumple la condición de página lista
+    def render(self, url):
+        with self.browser() as driver:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            t0 = time.perf_counter()
+            driver.get(url)
+            try:
+                WebDriverWait(driver, self.ready_timeout).until(self.ready)
+            except TimeoutException:
+                with self.lock:
+                    self.counters["timeouts"] += 1
+                raise
+            html = driver.page_source
+            if self.stats is not None:
+                self.stats.record(time.perf_counter() - t0, "loaded")
+            with self.lock:
+                self.counters["renders"] += 1
+            return html
+
+    # renderiza varias URLs en paralelo (un navegador por página en curso); devuelve los HTML en orden,
+    # o la excepción de cada página que falle
+    def render_many(self, urls):
+        def one(url):
+            try:
+                return self.render(url)
+            except Exception as e:
+                return e
+        with ThreadPoolExecutor(max_workers=self.size) as pool:
+            return list(pool.map(one, urls))
+
+    def summary(self):
+        with self.lock:
+            return {**self.counters, "size": self.size, "alive": len(self.drivers)}
+
+    def close(self):
+        with self.available:
+            drivers, self.drivers, self.idle = self.drivers, [], []
+            self.available.notify_all()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+# ---------------------------------------- ESTRATEGIA DE DESCARGA ----------------------------------------
+
+FETCH_MODES = ["auto", "http", "browser"]
+
+# descarga de páginas de búsqueda: "http" (requests + parseo), "browser" (pool de navegadores) o "auto": primero
+# HTTP y el navegador solo si la respuesta no trae filas de libros (o falla). `parse(html)` devuelve el dict de
+# parse_search_page; cada resultado indica qué vía sirvió la página ("served_by"). El pool crea los navegadores
+# bajo demanda, así que mientras HTTP baste no se arranca ningún Chrome
+class SearchFetcher:
+    def __init__(self, mode, session, pool, parse, bucket=None, timeout=10):
+        if mode not in FETCH_MODES:
+            raise ValueError(f"Modo de descarga desconocido: {mode} (opciones: {', '.join(FETCH_MODES)})")
+        self.mode = mode
+        self.session = session
+        self.pool = pool
+        self.parse = parse
+        self.bucket = bucket
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.counters = {"http": 0, "browser": 0, "fallbacks": 0}
+
+    def _count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def _browser(self, url):
+        html = self.pool.render(url)
+        self._count("browser")
+        return {"url": url, "served_by": "browser", "page": self.parse(html)}
+
+    def fetch(self, url):
+        if self.mode == "browser":
+            return self._browser(url)
+        try:
+            html = get_with_retry(self.session, url, bucket=self.bucket, timeout=self.timeout).text
+        except requests.RequestException:
+            if self.mode == "http":
+                raise
+            html = None
+        page = self.parse(html) if html is not None else None
+        if page is not None and (page["books"] or self.mode == "http"):
+            self._count("http")
+            return {"url": url, "served_by": "http", "page": page}
+        # sin filas tr[itemtype=...] (página generada por JS, bloqueo o error): se renderiza con Selenium
+        self._count("fallbacks")
+        return self._browser(url)
+
+    # varias páginas en paralelo (hasta el tamaño del pool); en orden, con la excepción de cada página que falle
+    def fetch_many(self, urls):
+        def one(url):
+            try:
+                return self.fetch(url)
+            except Exception as e:
+                return e
+        with ThreadPoolExecutor(max_workers=self.pool.size) as pool:
+            return list(pool.map(one, urls))
+
+    def summary(self):
+        with self.lock:
+            return {"mode": self.mode, **self.counters}
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# ---------------------------------------- CACHE DE CONSULTAS ----------------------------------------
+
+# normaliza la consulta a Google Books para usarla como clave de caché
+def query_cache_key(isbn10, isbn13, title, author):
+    if isbn13:
+        return f"isbn:{str(isbn13).strip()}"
+    if isbn10:
+        return f"isbn:{str(isbn10).strip()}"
+    t = " ".join(str(title or "").lower().split())
+    a = " ".join(str(author or "").lower().split())
+    return f"intitle:{t}|inauthor:{a}"
+
+# caché persistente en SQLite: TTL, caché negativa ("sin items"), tope LRU y contadores hit/miss
+class LookupCache:
+    def __init__(self, path, ttl_seconds=30 * 86400, negative_ttl_seconds=7 * 86400, max_entries=100000):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.ttl = ttl_seconds
+        self.negative_ttl = negative_ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS lookups ("
+            " key TEXT PRIMARY KEY, payload TEXT, negative INTEGER,"
+            " created_at REAL, last_access REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS lookups_last_access ON lookups(last_access)")
+        self.conn.commit()
+        self.size = self.conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+    # devuelve (True, payload) si hay entrada vigente (payload None = respuesta negativa); (False, None) si no
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload, negative, created_at FROM lookups WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return False, None
+            payload, negative, created_at = row
+            ttl = self.negative_ttl if negative else self.ttl
+            if now - created_at > ttl:
+                self.conn.execute("DELETE FROM lookups WHERE key = ?", (key,))
+                self.conn.commit()
+                self.size -= 1
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return False, None
+            self.conn.execute("UPDATE lookups SET last_access = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            if negative:
+                self.stats["negative_hits"] += 1
+                return True, None
+            self.stats["hits"] += 1
+            return True, json.loads(payload)
+
+    # guarda una respuesta; payload None registra la respuesta negativa
+    def put(self, key, payload):
+        now = time.time()
+        with self.lock:
+            # reemplazar una clave existente no cambia el número de entradas
+            exists = self.conn.execute("SELECT 1 FROM lookups WHERE key = ?", (key,)).fetchone() is not None
+            self.conn.execute(
+                "INSERT OR REPLACE INTO lookups(key, payload, negative, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(payload) if payload is not None else None, int(payload is None), now, now),
+            )
+            if not exists:
+                self.size += 1
+            self.stats["stores"] += 1
+            if self.size > self.max_entries:
+                self._evict()
+            self.conn.commit()
+
+    # descarta las entradas menos usadas recientemente hasta volver al tope
+    def _evict(self):
+        self.size = self.conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+        excess = self.size - self.max_entries
+        if excess <= 0:
+            return
+        self.conn.execute(
+            "DELETE FROM lookups WHERE key IN (SELECT key FROM lookups ORDER BY last_access LIMIT ?)", (excess,)
+        )
+        self.size -= excess
+        self.stats["evictions"] += excess
+
+    # contadores para docs/ingest_summary.json
+    def summary(self):
+        lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        hit_ratio = (self.stats["hits"] + self.stats["negative_hits"]) / lookups if lookups else None
+        return {**self.stats, "entries": self.size, "hit_ratio": hit_ratio, "path": self.path}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,109 @@
+import sys
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# ---------------------------------------- PLAN DE TIPOS COMPACTOS ----------------------------------------
+
+# tipo compacto por columna de book_source_detail y dim_book:
+#   category -> pocos valores distintos (idioma, moneda, procedencia): códigos enteros + diccionario
+#   string   -> texto en string[pyarrow]: un buffer contiguo + offsets, sin un objeto str por valor;
+#               los ISBN también (13 bytes + offset por valor) para que sigan comparándose como texto
+#   int      -> Int64 nullable
+#   float    -> Float32 nullable
+#   list     -> list<string> de Arrow: valores contiguos + offsets por fila, en lugar de una lista Python por fila
+DTYPE_PLAN = {
+    "src_id": "string",
+    "__source": "category",
+    "title_gr": "string",
+    "author": "string",
+    "rating": "float",
+    "ratings_count": "int",
+    "book_url": "string",
+    "isbn10_gr": "string",
+    "isbn13": "string",
+    "gb_id": "string",
+    "title": "string",
+    "subtitle": "string",
+    "authors": "string",
+    "publisher": "string",
+    "pub_date": "string",
+    "language": "category",
+    "categories": "string",
+    "isbn10": "string",
+    "price_amount": "float",
+    "price_currency": "category",
+    "prov_title": "category",
+    "prov_authors": "category",
+    "prov_price": "category",
+    "pub_date_iso": "string",
+    "language_norm": "category",
+    "price_currency_norm": "category",
+    "ingest_ts": "category",
+    "source_files": "category",
+    "canonical_isbn13": "string",
+    "canonical_id": "string",
+    "source_ids": "list",
+}
+
+STRING_DTYPE = pd.StringDtype("pyarrow")
+LIST_DTYPE = pd.ArrowDtype(pa.list_(pa.string()))
+
+# categorías = valores presentes, ordenados: no dependen de las filas que tuvo antes el frame (estado incremental)
+def _to_category(ser):
+    if not isinstance(ser.dtype, pd.CategoricalDtype):
+        return ser.astype("category")
+    ser = ser.cat.remove_unused_categories()
+    return ser.cat.reorder_categories(ser.cat.categories.sort_values())
+
+def _to_int(ser):
+    num = pd.to_numeric(ser, errors="coerce").astype("Float64")
+    if ((num % 1) == 0).all():
+        return num.astype("Int64")
+    # valores no enteros: se conservan como decimales nullable
+    return num
+
+def _to_list(ser):
+    values = [None if v is None or (np.ndim(v) == 0 and pd.isna(v)) else list(v) for v in ser.astype(object)]
+    return pd.Series(pd.arrays.ArrowExtensionArray(pa.array(values, type=pa.list_(pa.string()), from_pandas=True)),
+                     index=ser.index, name=ser.name)
+
+CONVERTERS = {
+    "category": _to_category,
+    "string": lambda ser: ser.astype(STRING_DTYPE),
+    "int": _to_int,
+    "float": lambda ser: pd.to_numeric(ser, errors="coerce").astype("Float32"),
+    "list": _to_list,
+}
+
+TARGET_DTYPES = {
+    "category": lambda dtype: False,
+    "string": lambda dtype: dtype == STRING_DTYPE,
+    "int": lambda dtype: str(dtype) == "Int64",
+    "float": lambda dtype: str(dtype) == "Float32",
+    "list": lambda dtype: dtype == LIST_DTYPE,
+}
+
+# aplica `plan` a las columnas de `df` que aparecen en él (las demás no cambian); devuelve un frame nuevo
+def apply_dtype_plan(df, plan=DTYPE_PLAN):
+    out = df.copy(deep=False)
+    for col, kind in plan.items():
+        if col in out.columns and not TARGET_DTYPES[kind](out[col].dtype):
+            out[col] = CONVERTERS[kind](out[col])
+    return out
+
+# bytes de una columna; en columnas object con listas cuenta también los elementos (memory_usage no lo hace)
+def column_bytes(ser):
+    total = int(ser.memory_usage(index=False, deep=True))
+    if ser.dtype == object:
+        for v in ser:
+            if isinstance(v, (list, tuple)):
+                total += sum(sys.getsizeof(x) for x in v)
+            elif isinstance(v, np.ndarray) and v.dtype == object:
+                total += v.nbytes + sum(sys.getsizeof(x) for x in v)
+    return total
+
+# memoria por columna (bytes) y total de un DataFrame
+def memory_report(df):
+    cols = {c: column_bytes(df[c]) for c in df.columns}
+    return {"columns": cols, "total_bytes": sum(cols.values()), "rows": len(df)}
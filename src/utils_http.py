@@ -0,0 +1,110 @@
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# ---------------------------------------- HTTP TOOLS ----------------------------------------
+
+# códigos que se reintentan con backoff exponencial
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# contadores de peticiones de un servicio: total, por código de estado, errores de red y latencias (s)
+class HttpStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.status = {}
+        self.errors = 0
+
+    # una petición terminada (status None = error de conexión o timeout)
+    def record(self, latency, status=None):
+        with self.lock:
+            self.latencies.append(float(latency))
+            key = str(status) if status is not None else "error"
+            self.status[key] = self.status.get(key, 0) + 1
+            if status is None:
+                self.errors += 1
+
+    # hook de requests: se llama con cada respuesta de la sesión (reintentos incluidos)
+    def hook(self, response, *args, **kwargs):
+        self.record(response.elapsed.total_seconds(), response.status_code)
+
+    def summary(self):
+        with self.lock:
+            lat = sorted(self.latencies)
+        pct = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))], 4) if lat else None
+        return {
+            "requests": len(lat),
+            "errors": self.errors,
+            "status": dict(self.status),
+            "latency_s": {"mean": round(sum(lat) / len(lat), 4) if lat else None,
+                          "p50": pct(0.50), "p95": pct(0.95), "max": pct(1.0)},
+        }
+
+# sesión HTTP compartida con pool de conexiones (keep-alive) dimensionado a la concurrencia;
+# con `stats` (HttpStats) se anotan el código y la latencia de cada petición
+def make_session(pool_size=10, user_agent=None, stats=None):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if user_agent:
+        session.headers["User-Agent"] = user_agent
+    if stats is not None:
+        session.hooks["response"].append(stats.hook)
+        session.http_stats = stats
+    return session
+
+# limitador token-bucket: `rate` peticiones/segundo con ráfagas de hasta `burst`, seguro entre hilos
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # rate <= 0 desactiva el límite
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# espera antes del reintento: Retry-After si el servidor lo indica, si no backoff exponencial con jitter
+def _retry_delay(response, attempt, backoff):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+# GET con límite de tasa, timeout y reintentos sobre 429/5xx y errores de conexión
+def get_with_retry(session, url, bucket=None, timeout=10, max_retries=4, backoff=0.5):
+    for attempt in range(max_retries + 1):
+        if bucket is not None:
+            bucket.acquire()
+        response = None
+        t0 = time.perf_counter()
+        try:
+            response = session.get(url, timeout=timeout)
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                return response
+        except (requests.ConnectionError, requests.Timeout):
+            # sin respuesta no pasa por el hook de la sesión
+            if getattr(session, "http_stats", None) is not None:
+                session.http_stats.record(time.perf_counter() - t0)
+            if attempt == max_retries:
+                raise
+        if attempt == max_retries:
+            response.raise_for_status()
+        time.sleep(_retry_delay(response, attempt, backoff))
@@ -0,0 +1,137 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------- INTEGRACIÓN INCREMENTAL ----------------------------------------
+
+# manifiesto (JSON legible) y estado de filas (pickle, conserva dtypes exactos) en INTEGRATE_STATE_DIR
+MANIFEST_FILE = "manifest.json"
+STATE_FILE = "detail_rows.pkl"
+
+# columnas de Goodreads que determinan las filas de book_source_detail de cada registro
+GR_KEY_COLS = ["src_id", "title", "author", "rating", "ratings_count", "book_url", "isbn10", "isbn13"]
+
+def load_manifest(state_dir):
+    path = os.path.join(state_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+def load_state(state_dir):
+    path = os.path.join(state_dir, STATE_FILE)
+    return pd.read_pickle(path) if os.path.exists(path) else None
+
+# decide qué hacer con el landing actual frente al manifiesto anterior:
+#   skip  -> mismos archivos, mismos hash y misma configuración: las salidas ya están al día
+#   delta -> solo cambian archivos Goodreads (JSON): se reprocesan los registros nuevos o modificados
+#   full  -> sin estado previo, cambia Google Books (todas las filas pueden emparejar distinto) o la configuración
+def plan_integration(manifest, file_metadata, settings, outputs):
+    if manifest is None or manifest.get("settings") != settings:
+        return "full", []
+    if not all(os.path.exists(p) for p in outputs):
+        return "full", []
+    before = {name: f["sha256"] for name, f in manifest["files"].items()}
+    now = {m["file_name"]: m["sha256"] for m in file_metadata}
+    changed = sorted(n for n in set(before) | set(now) if before.get(n) != now.get(n))
+    if not changed:
+        return "skip", []
+    if any(not n.lower().endswith(".json") for n in changed):
+        return "full", changed
+    return "delta", changed
+
+# huella por fila (uint64) de las columnas indicadas, independiente del índice; las columnas numéricas se
+# comparan como float64 para que 5 y 5.0 coincidan cuando un registro nuevo con nulos cambia el dtype de la columna
+def row_fingerprints(df, cols):
+    part = df[[c for c in cols if c in df.columns]].copy()
+    for c in part.columns:
+        if part[c].dtype.kind in "iub":
+            part[c] = part[c].astype("float64")
+    return pd.util.hash_pandas_object(part, index=False).to_numpy()
+
+# pd.concat de filas sin depender de cómo trata pandas los marcos vacíos o las columnas todo-NA (comportamiento en
+# desuso, FutureWarning): se descartan los marcos vacíos y una columna todo-NA toma el dtype que esa columna tiene
+# en los demás marcos si admite nulos; las columnas son las de todos los marcos, en orden de aparición
+def concat_rows(frames):
+    columns = list(dict.fromkeys(c for f in frames for c in f.columns))
+    frames = [f for f in frames if len(f)] or frames[:1]
+    dtypes = {}
+    for f in frames:
+        for c in f.columns:
+            if c not in dtypes and f[c].notna().any():
+                dtypes[c] = f[c].dtype
+    aligned = []
+    for f in frames:
+        cast = {c: dtypes[c] for c in f.columns if c in dtypes and f[c].dtype != dtypes[c] and f[c].isna().all()
+                and _holds_na(dtypes[c])}
+        aligned.append(f.astype(cast) if cast else f)
+    out = pd.concat(aligned, ignore_index=True, sort=False) if len(aligned) > 1 else aligned[0].reset_index(drop=True)
+    return out.reindex(columns=columns) if list(out.columns) != columns else out
+
+# dtypes que pueden guardar un nulo sin cambiar de tipo (no int/bool de numpy)
+def _holds_na(dtype):
+    return not (isinstance(dtype, np.dtype) and dtype.kind in "iub")
+
+# une filas reutilizadas del estado anterior y filas recalculadas en el orden de una reconstrucción completa
+# (orden de los registros Goodreads; las filas de un mismo registro mantienen su orden relativo)
+# `keys` acompaña a cada fila: huella del registro Goodreads (_gr_fp) y archivo Google Books emparejado (gb_file)
+def combine_detail_rows(cached, cached_keys, delta, delta_keys, gr_fp):
+    position = pd.Series(np.arange(len(gr_fp)), index=gr_fp)
+    rows = concat_rows([cached, delta])
+    keys = concat_rows([cached_keys, delta_keys])
+    order = np.argsort(position.loc[keys["_gr_fp"].to_numpy()].to_numpy(), kind="stable")
+    return rows.iloc[order].reset_index(drop=True), keys.iloc[order].reset_index(drop=True)
+
+# canonical_ids cuya fila superviviente cambió (aparece, desaparece o cambia de contenido) entre dos ejecuciones
+def affected_canonical_ids(old_fp, old_cid, new_fp, new_cid):
+    old_fp, new_fp = np.asarray(old_fp), np.asarray(new_fp)
+    gone = ~np.isin(old_fp, new_fp)
+    added = ~np.isin(new_fp, old_fp)
+    return set(np.asarray(old_cid, dtype=object)[gone]) | set(np.asarray(new_cid, dtype=object)[added])
+
+# sustituye en dim_book las filas de `affected` por las recalculadas, en el orden de groupby (canonical_id)
+def upsert_dim_book(previous, recomputed, affected, detail, rules, key="canonical_id"):
+    kept = previous[~previous[key].isin(affected)]
+    dim = concat_rows([kept, recomputed])
+    dim = dim.sort_values(key, kind="stable").reset_index(drop=True)
+    # en una reconstrucción, los campos "max" heredan el dtype de su columna en book_source_detail
+    for field, rule, cols in rules:
+        if rule != "max" or field not in dim.columns:
+            continue
+        source = detail[cols[0]].dtype
+        if source.kind in "iu" and dim[field].dtype.kind == "f" and dim[field].notna().all():
+            dim[field] = dim[field].astype(source)
+        elif source.kind == "f" and dim[field].dtype.kind in "iu":
+            dim[field] = dim[field].astype(source)
+    return dim
+
+# canonical_ids producidos por cada archivo: registros Goodreads de cada JSON y emparejamientos de cada CSV
+def canonical_ids_by_file(keys, canonical_ids, gr_files):
+    file_cids = {}
+    gr_file = keys["_gr_fp"].map(gr_files)
+    for col in [gr_file, keys["gb_file"]]:
+        for fname, cid in zip(col, canonical_ids):
+            if pd.notna(fname):
+                file_cids.setdefault(fname, set()).add(cid)
+    return file_cids
+
+# guarda manifiesto (hash por archivo y canonical_ids que produjo) y filas previas a la deduplicación
+def save_state(state_dir, file_metadata, settings, file_cids, rows, keys, post_fp, post_cid, ingest_ts):
+    os.makedirs(state_dir, exist_ok=True)
+    pd.to_pickle({"rows": rows, "keys": keys, "post_fp": post_fp, "post_cid": post_cid},
+                 os.path.join(state_dir, STATE_FILE))
+    manifest = {
+        "ingest_ts": ingest_ts,
+        "settings": settings,
+        "files": {
+            m["file_name"]: {
+                "sha256": m["sha256"],
+                "size_bytes": m["size_bytes"],
+                "canonical_ids": sorted(file_cids.get(m["file_name"], [])),
+            }
+            for m in file_metadata
+        },
+    }
+    with open(os.path.join(state_dir, MANIFEST_FILE), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False)
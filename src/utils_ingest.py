@@ -0,0 +1,121 @@
+import json
+import pandas as pd
+
+# ---------------------------------------- INGESTA EN STREAMING ----------------------------------------
+
+# tipos explícitos del landing: con chunks no se puede dejar la inferencia a cada trozo
+GR_DTYPES = {
+    "title": "object", "author": "object", "rating": "float64", "ratings_count": "float64",
+    "book_url": "object", "isbn10": "object", "isbn13": "object",
+}
+GB_DTYPES = {
+    "gb_id": "str", "title": "str", "subtitle": "str", "authors": "str", "publisher": "str",
+    "pub_date": "str", "language": "str", "categories": "str", "isbn13": "str", "isbn10": "str",
+    "price_amount": "float64", "price_currency": "str",
+}
+
+_decoder = json.JSONDecoder()
+
+# lector incremental de texto JSON: decodifica valores completos y pide más texto si faltan bytes
+class _JsonStream:
+    def __init__(self, fh, read_size):
+        self.fh = fh
+        self.read_size = read_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.fh.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    # siguiente carácter no blanco (sin consumirlo)
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON inválido: se esperaba '{char}'")
+        self.pos += 1
+
+    # decodifica el siguiente valor completo; si el búfer lo corta, lee más y reintenta
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # un número al final del búfer puede estar incompleto
+            if end == len(self.buf) and not self.eof and isinstance(obj, (int, float)) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+# itera los registros de `key` (lista u objeto único) de un JSON {"metadata": ..., "data": [...]}
+# sin cargar el archivo completo; el resto de claves de primer nivel se decodifican y descartan
+def iter_json_records(path, key="data", read_size=1 << 16):
+    with open(path, "r", encoding="utf-8") as fh:
+        stream = _JsonStream(fh, read_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            name = stream.value()
+            stream.expect(":")
+            if name != key:
+                stream.value()
+            elif stream.peek() != "[":
+                yield stream.value()
+            else:
+                stream.expect("[")
+                if stream.peek() == "]":
+                    stream.pos += 1
+                else:
+                    while True:
+                        yield stream.value()
+                        if stream.peek() == ",":
+                            stream.pos += 1
+                            continue
+                        stream.expect("]")
+                        break
+            if stream.peek() == ",":
+                stream.pos += 1
+                continue
+            stream.expect("}")
+            return
+
+# lotes de registros Goodreads como DataFrames con tipos explícitos
+def iter_json_batches(path, batch_rows=50000):
+    batch = []
+    for rec in iter_json_records(path):
+        batch.append(rec)
+        if len(batch) >= batch_rows:
+            yield _json_batch_frame(batch)
+            batch = []
+    if batch:
+        yield _json_batch_frame(batch)
+
+def _json_batch_frame(batch):
+    df = pd.DataFrame(batch)
+    for c, dtype in GR_DTYPES.items():
+        if c in df.columns:
+            df[c] = df[c].astype(dtype)
+    return df
+
+# trozos del CSV de Google Books con tipos explícitos (vacíos -> NaN)
+def iter_csv_chunks(path, chunk_rows=50000):
+    yield from pd.read_csv(path, dtype=GB_DTYPES, chunksize=chunk_rows)
@@ -1,22 +1,36 @@
+import hashlib
 import requests
-from bs4 import BeautifulSoup
 import re
 import pandas as pd
+from utils_http import get_with_retry
+from utils_parse import parse_detail_box
 
 # ---------------------------------------- ISBN TOOLS ----------------------------------------
 
 # extraer el ISBN desde la pagina individual del libro
-def extract_isbn(book_url):
+# con `session` reutiliza conexiones y aplica el limitador `bucket` y reintentos (429/5xx)
+def extract_isbn(book_url, session=None, bucket=None, timeout=10, backend="html.parser"):
+    isbn10, isbn13, _ = fetch_book_detail(book_url, session, bucket, timeout, backend)
+    return isbn10, isbn13
+
+# descarga la página de detalle; devuelve ISBNs y hash del HTML (para el estado de crawl)
+def fetch_book_detail(book_url, session=None, bucket=None, timeout=10, backend="html.parser"):
     
-    r = requests.get(book_url)
-    soup = BeautifulSoup(r.text, "html.parser")
+    if session is None:
+        r = requests.get(book_url)
+    else:
+        r = get_with_retry(session, book_url, bucket=bucket, timeout=timeout)
+    isbn10, isbn13 = parse_isbn(r.text, backend)
+    return isbn10, isbn13, hashlib.sha256(r.content).hexdigest()
+
+# buscar ISBN-10/13 en el HTML de la página de detalle (solo se parsea #bookDataBox)
+def parse_isbn(html, backend="html.parser"):
     
     isbn10, isbn13 = None, None
     
     # Buscar cualquier cadena ISBN en la sección BookDataBox
-    data_box = soup.find("div", {"id": "bookDataBox"})
-    if data_box:
-        text = data_box.get_text(" ", strip=True)
+    text = parse_detail_box(html, backend)
+    if text:
         match_10 = re.search(r"ISBN(?:\-10)?:?\s?(\d{10})", text)
         match_13 = re.search(r"ISBN(?:\-13)?:?\s?(\d{13})", text)
         if match_10: isbn10 = match_10.group(1)
@@ -41,4 +55,11 @@ def normalize_isbn13(isbn):
     if not isbn:
         return None
     isbn_digits = isbn.replace("-", "").strip()
-    return isbn_digits if isbn_digits.isdigit() and len(isbn_digits) == 13 else None
\ No newline at end of file
+    return isbn_digits if isbn_digits.isdigit() and len(isbn_digits) == 13 else None
+
+# limpia un ISBN de cualquier tipo: sin guiones ni espacios, vacío o nulo -> None
+def fast_clean_isbn(s):
+    if pd.isna(s):
+        return None
+    s = str(s).replace("-", "").strip()
+    return s if s != "" else None
@@ -0,0 +1,99 @@
+import os
+import json
+import sqlite3
+import threading
+
+# ---------------------------------------- ÍNDICE DE BÚSQUEDA (dim_book) ----------------------------------------
+
+# sidecar SQLite junto a dim_book: una fila por canonical_id con la fila completa en JSON e índices por
+# isbn13, isbn10 y título normalizado; una búsqueda puntual no necesita leer el Parquet
+
+# índice escrito al lado de la salida
+def index_path(dim_path):
+    return os.path.splitext(dim_path.rstrip("/"))[0] + ".index.sqlite"
+
+# título normalizado para búsqueda por prefijo: minúsculas y espacios colapsados
+def title_key(title):
+    if title is None:
+        return None
+    return " ".join(str(title).lower().split())
+
+# ISBN sin guiones ni espacios, en mayúsculas (X de control del ISBN-10)
+def _clean_key(value):
+    return str(value).replace("-", "").replace(" ", "").strip().upper() if value is not None else ""
+
+# columna -> claves del índice (nulos -> None)
+def _index_keys(ser, fn):
+    return [fn(v) if v is not None else None for v in ser.astype(object).where(ser.notna(), None)]
+
+# construye el índice en un archivo temporal y lo sustituye de forma atómica (los lectores abiertos siguen viendo el anterior)
+def build_lookup_index(dim_book, path, key="canonical_id", batch_rows=100000):
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(
+        "CREATE TABLE books (canonical_id TEXT PRIMARY KEY, isbn13 TEXT, isbn10 TEXT, title_key TEXT, row TEXT)"
+    )
+    # Float32 (plan de tipos compacto) pasa por su representación más corta: 4.68 y no 4.6799998283 en el JSON
+    dim_book = dim_book.assign(**{c: dim_book[c].astype("string").astype("Float64")
+                                  for c in dim_book.columns if str(dim_book[c].dtype).lower() in ("float32", "float[pyarrow]")})
+    for start in range(0, len(dim_book), batch_rows):
+        part = dim_book.iloc[start:start + batch_rows]
+        # to_json: NaN -> null, listas/arrays -> listas JSON, numpy -> números; "\n" solo separa registros
+        rows = part.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n").split("\n")
+        conn.executemany(
+            "INSERT INTO books VALUES (?, ?, ?, ?, ?)",
+            zip(part[key].astype(str), _index_keys(part["isbn13"], _clean_key), _index_keys(part["isbn10"], _clean_key),
+                _index_keys(part["title"], title_key), rows),
+        )
+    conn.execute("CREATE INDEX books_isbn13 ON books(isbn13)")
+    conn.execute("CREATE INDEX books_isbn10 ON books(isbn10)")
+    conn.execute("CREATE INDEX books_title_key ON books(title_key)")
+    conn.commit()
+    conn.close()
+    os.replace(tmp, path)
+
+# consultas puntuales sobre el índice; la conexión (solo lectura) se abre en la primera consulta
+class BookLookup:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def _query(self, sql, args):
+        with self.lock:
+            if self.conn is None:
+                if not os.path.exists(self.path):
+                    raise FileNotFoundError(self.path)
+                self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            return [json.loads(r[0]) for r in self.conn.execute(sql, args)]
+
+    def _one(self, column, value):
+        rows = self._query(f"SELECT row FROM books WHERE {column} = ? ORDER BY canonical_id LIMIT 1", (value,))
+        return rows[0] if rows else None
+
+    def by_canonical_id(self, canonical_id):
+        return self._one("canonical_id", str(canonical_id))
+
+    def by_isbn13(self, isbn13):
+        return self._one("isbn13", _clean_key(isbn13))
+
+    def by_isbn10(self, isbn10):
+        return self._one("isbn10", _clean_key(isbn10))
+
+    # libros cuyo título normalizado empieza por `prefix`, en orden alfabético
+    def search_title(self, prefix, limit=20):
+        key = title_key(prefix) or ""
+        return self._query(
+            "SELECT row FROM books WHERE title_key >= ? AND title_key < ? ORDER BY title_key, canonical_id LIMIT ?",
+            (key, key + "\U0010ffff", int(limit)),
+        )
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
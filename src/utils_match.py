@@ -0,0 +1,192 @@
+import bisect
+import pandas as pd
+from collections import Counter
+
+# ---------------------------------- MATCHING TÍTULO + AUTOR ----------------------------------
+
+# Regla de coincidencia aproximada (la misma que usaba integrate_pipeline con iterrows):
+#   - título Goodreads contenido en el de Google Books, o al revés (subcadena, minúsculas)
+#   - si hay autor, al menos un token del autor debe aparecer en `authors` de Google Books
+#   - gana el primer candidato en orden de df_csv
+
+# tamaño de n-grama de caracteres usado para bloquear "título GB contenido en título GR"
+GRAM_SIZE = 4
+
+# comprueba la regla de autor sobre un candidato ya normalizado
+def _author_ok(a, a2):
+    if a and a != "nan":
+        return any(tok for tok in a.split() if tok in a2)
+    return True
+
+# recorrido lineal de referencia (modo "scan"), O(M) por consulta
+def match_title_author_scan(titles, authors, t, a):
+    for j, (t2, a2) in enumerate(zip(titles, authors)):
+        t2 = str(t2).lower()
+        a2 = str(a2).lower()
+        if t in t2 or t2 in t:
+            if _author_ok(a, a2):
+                return j
+    return None
+
+# construye los índices de bloqueo sobre los candidatos de Google Books
+def build_title_index(titles, authors, gram_size=GRAM_SIZE):
+    titles = [str(t).lower() for t in titles]
+    authors = [str(a).lower() for a in authors]
+
+    # frecuencia global de n-gramas para indexar cada título por su n-grama más raro
+    gram_freq = Counter()
+    for t2 in titles:
+        gram_freq.update({t2[i:i + gram_size] for i in range(len(t2) - gram_size + 1)})
+
+    by_gram = {}    # n-grama más raro de t2 -> posiciones (bloque para "t2 in t")
+    short = []      # títulos más cortos que el n-grama, se comprueban siempre
+    by_token = {}   # token exacto (split por espacio) de t2 -> posiciones (bloque para "t in t2")
+    for j, t2 in enumerate(titles):
+        if len(t2) < gram_size:
+            short.append(j)
+        else:
+            key = min((t2[i:i + gram_size] for i in range(len(t2) - gram_size + 1)), key=gram_freq.__getitem__)
+            by_gram.setdefault(key, []).append(j)
+        for tok in set(t2.split(" ")):
+            by_token.setdefault(tok, []).append(j)
+
+    # n-grama -> tokens que lo contienen (bloque para "t sin espacios dentro de un token de t2");
+    # los tokens más cortos que el n-grama van aparte
+    gram_tokens = {}
+    short_tokens = []
+    for tok in by_token:
+        if len(tok) < gram_size:
+            short_tokens.append(tok)
+        for g in {tok[i:i + gram_size] for i in range(len(tok) - gram_size + 1)}:
+            gram_tokens.setdefault(g, []).append(tok)
+
+    return {
+        "titles": titles,
+        "authors": authors,
+        "gram_size": gram_size,
+        "by_gram": by_gram,
+        "short": short,
+        "by_token": by_token,
+        "vocab": sorted(by_token),
+        "gram_tokens": gram_tokens,
+        "short_tokens": short_tokens,
+        "short_queries": {},
+    }
+
+# candidatos cuyo título contiene a t: los tokens interiores de t son tokens completos de t2
+def _containing_candidates(index, t):
+    by_token = index["by_token"]
+    toks = t.split(" ")
+    if len(toks) >= 3:
+        # intersección de los tokens interiores, empezando por la lista más corta
+        postings = sorted((by_token.get(tok, []) for tok in set(toks[1:-1])), key=len)
+        cands = set(postings[0])
+        for p in postings[1:]:
+            if not cands:
+                break
+            cands.intersection_update(p)
+        return cands
+
+    vocab = index["vocab"]
+    if len(toks) == 2:
+        # el último token de t es prefijo de algún token de t2
+        prefix = toks[1]
+        lo = bisect.bisect_left(vocab, prefix)
+        hi = bisect.bisect_left(vocab, prefix + "\U0010ffff")
+        matched = vocab[lo:hi]
+    else:
+        # t sin espacios cae dentro de un único token de t2
+        matched = _tokens_containing(index, t)
+
+    cands = set()
+    for tok in matched:
+        cands.update(by_token[tok])
+    return cands
+
+# tokens del vocabulario que contienen a t (sin espacios): los del n-grama más raro de t que lo contienen entero;
+# si t es más corto que el n-grama, los de los n-gramas que contienen a t y los tokens cortos (memorizado por t)
+def _tokens_containing(index, t):
+    n = index["gram_size"]
+    gram_tokens = index["gram_tokens"]
+    if len(t) >= n:
+        rarest = min((t[i:i + n] for i in range(len(t) - n + 1)), key=lambda g: len(gram_tokens.get(g, ())))
+        return [tok for tok in gram_tokens.get(rarest, ()) if t in tok]
+    short_queries = index["short_queries"]
+    if t not in short_queries:
+        toks = {tok for g, toks in gram_tokens.items() if t in g for tok in toks}
+        toks.update(tok for tok in index["short_tokens"] if t in tok)
+        short_queries[t] = toks
+    return short_queries[t]
+
+# busca el primer candidato que cumple la regla, mirando solo dentro de los bloques
+def match_title_author(index, t, a):
+    n = index["gram_size"]
+    by_gram = index["by_gram"]
+
+    cands = set(index["short"])
+    cands.update(_containing_candidates(index, t))
+    for i in range(len(t) - n + 1):
+        cands.update(by_gram.get(t[i:i + n], ()))
+
+    titles = index["titles"]
+    authors = index["authors"]
+    for j in sorted(cands):
+        t2 = titles[j]
+        if (t in t2 or t2 in t) and _author_ok(a, authors[j]):
+            return j
+    return None
+
+# ----------------------------------- JOIN POR ETAPAS -----------------------------------
+
+# vuelca en bloque las filas de Google Books encontradas (una asignación por columna, no por celda)
+def fill_from_gb(merged, fill):
+    for k in fill.columns:
+        merged.loc[fill.index, k] = fill[k]
+    return merged
+
+# etapa ISBN-10: filas sin gb_id pero con isbn10 de Goodreads, join enmascarado contra df_csv
+def merge_by_isbn10(merged, df_csv):
+    mask = merged["gb_id"].isna() & merged["isbn10_gr"].notna()
+    if not mask.any():
+        return merged
+
+    # si hay duplicados de isbn10 en Google Books, gana el primero
+    gb_by_isbn10 = df_csv.dropna(subset=["isbn10"]).drop_duplicates(subset=["isbn10"])
+    left = merged.loc[mask, ["isbn10_gr"]].reset_index()
+    hits = left.merge(gb_by_isbn10, left_on="isbn10_gr", right_on="isbn10", how="inner").set_index("index")
+    fill = hits[[c for c in gb_by_isbn10.columns if c != "isbn10"]]
+    return fill_from_gb(merged, fill)
+
+# etapa título+autor: filas aún sin gb_id, candidatos por índice de bloqueo ("blocking") o recorrido ("scan");
+# `index` permite reutilizar el índice de df_csv entre lotes
+def merge_by_title_author(merged, df_csv, mode="blocking", index=None):
+    mask = merged["gb_id"].isna()
+    if not mask.any():
+        return merged
+
+    gb_titles = df_csv["title"].tolist()
+    gb_authors = df_csv["authors"].tolist()
+    if index is None and mode == "blocking":
+        index = build_title_index(gb_titles, gb_authors)
+
+    titles_gr = merged.loc[mask, "title_gr"].tolist() if "title_gr" in merged.columns else [""] * int(mask.sum())
+    authors_gr = merged.loc[mask, "author"].tolist() if "author" in merged.columns else [""] * int(mask.sum())
+
+    rows, positions = [], []
+    for i, t, a in zip(merged.index[mask], titles_gr, authors_gr):
+        t = str(t).lower().strip()
+        a = str(a).lower().strip()
+        if t == "":
+            continue
+        if index is not None:
+            j = match_title_author(index, t, a)
+        else:
+            j = match_title_author_scan(gb_titles, gb_authors, t, a)
+        if j is not None:
+            rows.append(i)
+            positions.append(j)
+
+    if not rows:
+        return merged
+    fill = df_csv.iloc[positions].set_axis(rows, axis=0)
+    return fill_from_gb(merged, fill)
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from utils_quality import LANG_ALIAS, CURRENCY_ALIAS, count_date_parse, normalize_pub_date, safe_int
+
+# ---------------------------------- NORMALIZACIÓN POR COLUMNAS ----------------------------------
+
+# Versiones por columna de normalize_pub_date, normalize_language, normalize_currency, safe_int
+# y fast_clean_isbn. Devuelven exactamente lo mismo que `serie.apply(funcion)` (valores y dtype)
+# para valores escalares str / int / float / bool / None.
+
+# alias de idioma indexados por su forma en minúsculas (evita recorrer LANG_ALIAS por valor)
+LANG_ALIAS_LOWER = {k.lower(): v for k, v in reversed(list(LANG_ALIAS.items())) if k}
+
+# apply sobre serie vacía conserva el dtype de entrada
+def _empty_like(ser):
+    return ser._constructor(dtype=ser.dtype, index=ser.index)
+
+# valores "falsy" (`not v`) para escalares: None, "", 0, 0.0, False
+def _falsy_mask(values):
+    return np.equal(values, None) | (values == "") | (values == 0)
+
+# aplica `fn_unique` (serie de str únicos -> array de resultados) y expande a todas las filas
+def _map_unique_strings(strings, fn_unique):
+    codes, uniques = pd.factorize(strings)
+    mapped = np.asarray(fn_unique(pd.Series(uniques, dtype=object)), dtype=object)
+    return mapped[codes]
+
+def _object_series(values, ser):
+    return pd.Series(values, index=ser.index, dtype=object, name=ser.name)
+
+# fechas a ISO: YYYY y YYYY-MM se resuelven con kernels de texto; el resto pasa por normalize_pub_date una vez por valor único
+def normalize_pub_date_col(ser):
+    if len(ser) == 0:
+        return _empty_like(ser)
+    values = ser.to_numpy(dtype=object)
+    is_none = np.equal(values, None)
+
+    def per_unique(u):
+        d = u.str.strip()
+        year = d.str.isdigit() & (d.str.len() == 4)
+        year_month = (d.str.len() == 7) & (d.str[4:5] == "-")
+        out = d.astype(object).where(year | year_month, None)
+        count_date_parse("short", int((year | year_month).sum()))
+        slow = ~(year | year_month) & (d != "")
+        out[slow] = [normalize_pub_date(x) for x in d[slow]]
+        return out
+
+    result = _map_unique_strings(pd.Series(values).astype(str).to_numpy(dtype=object), per_unique)
+    result[is_none] = None
+    return _object_series(result, ser)
+
+# idioma: alias por diccionario en minúsculas, si no las dos primeras letras
+def normalize_language_col(ser):
+    if len(ser) == 0:
+        return _empty_like(ser)
+    values = ser.to_numpy(dtype=object)
+    falsy = _falsy_mask(values)
+
+    def per_unique(u):
+        s = u.str.strip()
+        alias = s.str.lower().map(LANG_ALIAS_LOWER)
+        fallback = s.where(s.str.len() < 2, s.str[:2].str.lower())
+        return alias.where(alias.notna(), fallback)
+
+    result = _map_unique_strings(pd.Series(values).astype(str).to_numpy(dtype=object), per_unique)
+    result[falsy] = None
+    return _object_series(result, ser)
+
+# moneda: alias exacto o código en mayúsculas
+def normalize_currency_col(ser):
+    if len(ser) == 0:
+        return _empty_like(ser)
+    values = ser.to_numpy(dtype=object)
+    falsy = _falsy_mask(values)
+
+    def per_unique(u):
+        s = u.str.strip()
+        alias = s.map(CURRENCY_ALIAS)
+        return alias.where(alias.notna(), s.str.upper())
+
+    result = _map_unique_strings(pd.Series(values).astype(str).to_numpy(dtype=object), per_unique)
+    result[falsy] = None
+    return _object_series(result, ser)
+
+# ISBN: sin guiones ni espacios, vacío o nulo -> None
+def clean_isbn_col(ser):
+    if len(ser) == 0:
+        return _empty_like(ser)
+    missing = ser.isna().to_numpy()
+    s = ser.astype(str).str.replace("-", "", regex=False).str.strip()
+    result = s.to_numpy(dtype=object)
+    result[missing | (result == "")] = None
+    return _object_series(result, ser)
+
+# entero seguro: truncado numérico por columna; columnas object caen a safe_int por valor
+def safe_int_col(ser):
+    if len(ser) == 0:
+        return _empty_like(ser)
+    # Int64/Float32 nullable (plan de tipos compactos): se resuelven como su equivalente numpy con NaN
+    if isinstance(ser.dtype, pd.api.extensions.ExtensionDtype) and ser.dtype.kind in "iuf":
+        ser = ser.astype("float64")
+    if ser.dtype.kind in "iub":
+        return ser.astype("int64")
+    if ser.dtype.kind != "f":
+        return ser.apply(safe_int)
+
+    values = ser.to_numpy()
+    finite = np.isfinite(values)
+    if not finite.any():
+        return _object_series(np.full(len(ser), None, dtype=object), ser)
+    truncated = np.trunc(values[finite])
+    if np.abs(truncated).max() >= 2**63:
+        return ser.apply(safe_int)
+    if finite.all():
+        return pd.Series(truncated.astype("int64"), index=ser.index, name=ser.name)
+    out = np.full(len(ser), np.nan)
+    out[finite] = truncated + 0.0
+    return pd.Series(out, index=ser.index, name=ser.name)
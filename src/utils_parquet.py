@@ -0,0 +1,154 @@
+import os
+import json
+import shutil
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pyarrow.dataset as ds
+import pandas as pd
+
+# ---------------------------------------- SALIDA PARQUET ----------------------------------------
+
+# columnas de partición derivadas (nombre -> función sobre el DataFrame); no forman parte de la tabla original
+DERIVED_PARTITIONS = {
+    "pub_year": lambda df: df["pub_date_iso" if "pub_date_iso" in df.columns else "pub_date"].astype("string").str[:4],
+}
+
+# columnas lista de procedencia (se escriben siempre como list<string>, aunque estén vacías o sean nulas)
+LIST_COLUMNS = ["source_ids", "source_files"]
+
+# fracción máxima de valores distintos para codificar una columna de texto con diccionario
+DICTIONARY_MAX_RATIO = 0.5
+
+# opciones de escritura: compresión, filas por row group, partición Hive y formato de source_files
+def parquet_options(compression="zstd", row_group_rows=131072, partition_by="", source_files="json"):
+    return {
+        "compression": compression,
+        "row_group_rows": int(row_group_rows),
+        "partition_by": [c.strip() for c in partition_by.split(",") if c.strip()],
+        "source_files": source_files,
+    }
+
+# columnas de texto de baja cardinalidad (idioma, moneda, procedencia...) y categóricas para codificar con diccionario
+def dictionary_columns(table, max_ratio=DICTIONARY_MAX_RATIO):
+    cols = []
+    n = max(table.num_rows, 1)
+    for field in table.schema:
+        if pa.types.is_dictionary(field.type):
+            cols.append(field.name)
+            continue
+        if not (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)):
+            continue
+        if pc.count_distinct(table[field.name]).as_py() / n <= max_ratio:
+            cols.append(field.name)
+    return cols
+
+def _to_arrow(df, options):
+    df = df.copy()
+    if "source_files" in df.columns:
+        df["source_files"] = df["source_files"].astype(object)
+    for name in options["partition_by"]:
+        if name in DERIVED_PARTITIONS and name not in df.columns:
+            df[name] = DERIVED_PARTITIONS[name](df)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # source_files como lista nativa: se decodifica una vez por valor distinto (el JSON compartido)
+    if options["source_files"] == "list" and "source_files" in table.column_names:
+        enc = table["source_files"].combine_chunks().dictionary_encode()
+        lists = pa.array([json.loads(v) for v in enc.dictionary.to_pylist()], type=pa.list_(pa.string()))
+        table = table.set_column(table.column_names.index("source_files"), "source_files", lists.take(enc.indices))
+    for name in LIST_COLUMNS:
+        if name in table.column_names and (pa.types.is_list(table[name].type) or pa.types.is_null(table[name].type)):
+            i = table.column_names.index(name)
+            table = table.set_column(i, name, table[name].cast(pa.list_(pa.string())))
+
+    # listas ArrowDtype (plan de tipos compacto) anotadas como object: pandas no reconstruye "list<...>[pyarrow]"
+    meta = table.schema.pandas_metadata
+    if meta and any(c["numpy_type"].startswith("list<") for c in meta["columns"]):
+        for c in meta["columns"]:
+            if c["numpy_type"].startswith("list<"):
+                c.update(pandas_type="list[unicode]", numpy_type="object", metadata=None)
+        table = table.replace_schema_metadata({**table.schema.metadata, b"pandas": json.dumps(meta).encode()})
+    return table
+
+def _clear(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+# escribe `df` en `path`: un archivo, o un directorio Hive (col=valor/) si hay columnas de partición;
+# zstd, row groups de tamaño fijo, diccionario en columnas de baja cardinalidad y estadísticas por página
+def write_table(df, path, options):
+    table = _to_arrow(df, options)
+    kwargs = {
+        "compression": options["compression"],
+        "row_group_size": options["row_group_rows"],
+        "use_dictionary": dictionary_columns(table),
+        "write_statistics": True,
+        "write_page_index": True,
+    }
+    _clear(path)
+    if options["partition_by"]:
+        pq.write_to_dataset(table, path, partition_cols=options["partition_by"],
+                            existing_data_behavior="delete_matching", **kwargs)
+    else:
+        pq.write_table(table, path, **kwargs)
+
+# dataset Arrow sobre un archivo o un directorio Hive (valores de partición como texto, no como diccionario)
+def open_dataset(path):
+    return ds.dataset(path, format="parquet", partitioning="hive" if os.path.isdir(path) else None)
+
+# columnas en el orden del DataFrame escrito (las de partición Hive se leen al final), sin las derivadas
+def _column_order(schema, names):
+    meta = schema.pandas_metadata or {}
+    order = [c["name"] for c in meta.get("columns", []) if c["name"] in names]
+    order += [c for c in names if c not in order]
+    return [c for c in order if c not in DERIVED_PARTITIONS]
+
+# lee una salida escrita con write_table como el DataFrame original: columnas en su orden, sin columnas de
+# partición derivadas y source_files de vuelta a JSON (con partición, las filas salen agrupadas por partición)
+def read_table(path, columns=None, filter=None):
+    dataset = open_dataset(path)
+    df = dataset.to_table(columns=columns, filter=filter).to_pandas()
+    df = df[_column_order(dataset.schema, df.columns)]
+    if "source_files" in df.columns and len(df) and not isinstance(df["source_files"].iloc[0], str):
+        df["source_files"] = df["source_files"].map(lambda v: json.dumps(list(v)))
+    return df
+
+# ---------------------------------------- LECTURA MAPEADA EN MEMORIA ----------------------------------------
+
+# sidecar Arrow IPC (Feather v2 sin compresión) junto a una salida: se abre con mmap y sin copias
+def sidecar_path(path):
+    return os.path.splitext(path.rstrip("/"))[0] + ".arrow"
+
+# escribe el sidecar de `df` (mismas columnas que el Parquet, sin partición) en un temporal con rename atómico
+def write_sidecar(df, path, options):
+    table = _to_arrow(df, {**options, "partition_by": []})
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=options["row_group_rows"])
+    os.replace(tmp, path)
+
+# tabla Arrow de una salida estándar: el sidecar mapeado en memoria si existe y es posterior al Parquet
+# (las páginas se comparten entre procesos a través de la caché del sistema), si no el Parquet con memory_map
+def open_standard(path, columns=None):
+    side = sidecar_path(path)
+    if os.path.exists(side) and os.path.getmtime(side) >= os.path.getmtime(path):
+        table = pa.ipc.open_file(pa.memory_map(side, "r")).read_all()
+        return table.select(columns) if columns else table
+    if os.path.isdir(path):
+        dataset = open_dataset(path)
+        table = dataset.to_table(columns=columns)
+        return table.select(_column_order(dataset.schema, table.column_names))
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+# DataFrame respaldado por Arrow: "pyarrow" -> todas las columnas ArrowDtype (sin copia),
+# "string" -> solo el texto como string[pyarrow] y el resto con los tipos numpy habituales
+def read_standard(path, columns=None, dtype_backend="pyarrow"):
+    table = open_standard(path, columns)
+    if dtype_backend == "pyarrow":
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    strings = {pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}
+    return table.to_pandas(types_mapper=strings.get)
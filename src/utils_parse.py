@@ -0,0 +1,84 @@
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml es opcional: si está instalado se usa como backend rápido
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# ---------------------------------------- PARSING HTML ----------------------------------------
+
+# backends disponibles: html.parser (Python puro, siempre presente) y lxml (C, opcional)
+BACKENDS = ["html.parser", "lxml"]
+
+# selectores CSS de Goodreads
+ROW_SELECTOR = "tr[itemtype='http://schema.org/Book']"   # fila de libro en resultados
+NEXT_SELECTOR = "a.next_page"                            # enlace de paginación
+
+# solo se construyen los subárboles relevantes: filas/enlaces en búsqueda, #bookDataBox en detalle
+SEARCH_STRAINER = SoupStrainer(["tr", "a"])
+DETAIL_STRAINER = SoupStrainer("div", id="bookDataBox")
+
+# resuelve el backend pedido ("auto" = el más rápido instalado)
+def resolve_backend(name="auto"):
+    if name in (None, "", "auto"):
+        return "lxml" if HAS_LXML else "html.parser"
+    if name not in BACKENDS:
+        raise ValueError(f"Backend HTML desconocido: {name} (opciones: auto, {', '.join(BACKENDS)})")
+    if name == "lxml" and not HAS_LXML:
+        print("Warning: lxml no está instalado, se usa html.parser")
+        return "html.parser"
+    return name
+
+# parsea una página de resultados una sola vez: libros + enlace a la página siguiente
+def parse_search_page(html, backend="html.parser", base_url="", limit=15):
+    soup = BeautifulSoup(html, backend, parse_only=SEARCH_STRAINER)
+
+    books = []
+    for row in soup.select(ROW_SELECTOR)[:limit]:
+        title_tag = row.select_one("a.bookTitle span")
+        author_tag = row.select_one("a.authorName span")
+        rating_tag = row.select_one("span.minirating")
+        url_tag = row.select_one("a.bookTitle")
+
+        if not title_tag:
+            continue
+
+        # info básica
+        title = title_tag.text.strip()
+        author = author_tag.text.strip() if author_tag else None
+        minirating = rating_tag.text.strip() if rating_tag else ""
+
+        # rating y número de votos
+        rating_match = re.search(r"([0-9.]+)\s+avg rating", minirating)
+        count_match = re.search(r"—\s+([\d,]+)\s+ratings", minirating)
+
+        rating = float(rating_match.group(1)) if rating_match else None
+        ratings_count = int(count_match.group(1).replace(",", "")) if count_match else None
+
+        # los ISBN se completan después desde la página de detalle
+        books.append({
+            "title": title,
+            "author": author,
+            "rating": rating,
+            "ratings_count": ratings_count,
+            "book_url": base_url + url_tag["href"],
+            "isbn10": None,
+            "isbn13": None
+        })
+
+    # botón siguiente página (ausente o deshabilitado = última página)
+    next_page = soup.select_one(NEXT_SELECTOR)
+    next_href = None
+    if next_page and "disabled" not in next_page.get("class", []):
+        next_href = next_page.get("href")
+
+    return {"books": books, "next_href": next_href}
+
+# texto de la sección #bookDataBox de la página de detalle (None si no existe)
+def parse_detail_box(html, backend="html.parser"):
+    soup = BeautifulSoup(html, backend, parse_only=DETAIL_STRAINER)
+    data_box = soup.find("div", {"id": "bookDataBox"})
+    return data_box.get_text(" ", strip=True) if data_box else None
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils_quality import file_sha256
+
+# ---------------------------------------- ETAPAS CON CHECKPOINT ----------------------------------------
+
+# etapa del pipeline: run(*resultados de deps) -> resultado; inputs/outputs son rutas (o una función que las
+# devuelve, para entradas que produce otra etapa), config son variables de entorno y code los .py que la definen
+class Stage:
+    def __init__(self, name, run, deps=(), inputs=(), outputs=(), config=(), code=(), checkpoint=False):
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+        self.inputs = inputs
+        self.outputs = outputs
+        self.config = list(config)
+        self.code = list(code)
+        self.checkpoint = checkpoint
+
+def _paths(spec):
+    return list(spec() if callable(spec) else spec)
+
+# sha256 de un archivo o de todos los archivos de un directorio (None si no existe)
+def path_sha256(path):
+    if os.path.isfile(path):
+        return file_sha256(path)
+    if not os.path.isdir(path):
+        return None
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for fname in sorted(files):
+            fpath = os.path.join(root, fname)
+            h.update(os.path.relpath(fpath, path).encode() + b"\0" + file_sha256(fpath).encode())
+    return h.hexdigest()
+
+# ejecuta las etapas en orden de dependencias, en paralelo cuando son independientes; una etapa se salta si su
+# huella (configuración + sha256 de entradas y código + huellas de sus dependencias) coincide con la de la última
+# ejecución correcta y sus salidas siguen en disco. Si una etapa falla, solo se cancelan las que dependen de ella.
+# Con `profiler` (utils_profile.Profiler) cada etapa ejecutada se mide como una etapa del perfil
+class PipelineRunner:
+    def __init__(self, stages, state_dir, workers=4, force=(), log=print, profiler=None):
+        self.stages = {s.name: s for s in stages}
+        for s in stages:
+            missing = [d for d in s.deps if d not in self.stages]
+            assert not missing, f"ERROR: la etapa {s.name} depende de etapas no declaradas: {missing}"
+        self.state_dir = state_dir
+        self.workers = max(1, int(workers))
+        self.force = set(self.stages) if force == "all" else set(force)
+        self.log = log
+        self.profiler = profiler
+        self.lock = threading.Lock()
+        self.load_locks = {name: threading.Lock() for name in self.stages}
+        self.fingerprints = {}
+        self.results = {}
+        self.report = {}
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_path = os.path.join(state_dir, "stages.json")
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as fh:
+                self.state = json.load(fh)
+
+    def checkpoint_path(self, name):
+        return os.path.join(self.state_dir, f"{name}.pkl")
+
+    def fingerprint(self, stage):
+        payload = {
+            "config": {k: os.getenv(k) for k in stage.config},
+            "inputs": {p: path_sha256(p) for p in _paths(stage.inputs)},
+            "code": {p: path_sha256(p) for p in stage.code},
+            "deps": {d: self.fingerprints[d] for d in stage.deps},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def is_fresh(self, stage, fp):
+        if stage.name in self.force or self.state.get(stage.name, {}).get("fingerprint") != fp:
+            return False
+        required = _paths(stage.outputs) + ([self.checkpoint_path(stage.name)] if stage.checkpoint else [])
+        return all(os.path.exists(p) for p in required)
+
+    def save_state(self):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.state, fh, indent=2)
+        os.replace(tmp, self.state_path)
+
+    # resultado de una etapa; el de una etapa saltada se carga de su checkpoint solo si alguien lo pide
+    def result(self, name):
+        with self.load_locks[name]:
+            if name not in self.results:
+                path = self.checkpoint_path(name)
+                if self.stages[name].checkpoint and os.path.exists(path):
+                    with open(path, "rb") as fh:
+                        self.results[name] = pickle.load(fh)
+                else:
+                    self.results[name] = None
+            return self.results[name]
+
+    def execute(self, stage):
+        fp = self.fingerprint(stage)
+        self.fingerprints[stage.name] = fp
+        if self.is_fresh(stage, fp):
+            return "skipped", 0.0
+        # el registro se borra antes de ejecutar: una etapa interrumpida nunca pasa por vigente
+        with self.lock:
+            self.state.pop(stage.name, None)
+            self.save_state()
+        deps = [self.result(d) for d in stage.deps]
+        t0 = time.perf_counter()
+        if self.profiler is not None:
+            with self.profiler.stage(stage.name):
+                result = stage.run(*deps)
+        else:
+            result = stage.run(*deps)
+        wall = time.perf_counter() - t0
+        with self.load_locks[stage.name]:
+            self.results[stage.name] = result
+        if stage.checkpoint:
+            path = self.checkpoint_path(stage.name)
+            with open(path + ".tmp", "wb") as fh:
+                pickle.dump(result, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + ".tmp", path)
+        with self.lock:
+            self.state[stage.name] = {"fingerprint": fp, "finished_at": time.time(), "wall_s": round(wall, 3)}
+            self.save_state()
+        return "run", wall
+
+    # etapas que dependen (directa o indirectamente) de `name`
+    def downstream(self, name):
+        found, pending = set(), [name]
+        while pending:
+            current = pending.pop()
+            for s in self.stages.values():
+                if current in s.deps and s.name not in found:
+                    found.add(s.name)
+                    pending.append(s.name)
+        return found
+
+    # ejecuta el DAG; devuelve {etapa: {"status": run|skipped|failed|cancelled, "wall_s", "error"}}
+    def run(self):
+        done, running = set(), {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                for s in self.stages.values():
+                    if s.name in self.report or s.name in running.values():
+                        continue
+                    if all(d in done for d in s.deps):
+                        running[pool.submit(self.execute, s)] = s.name
+                if not running:
+                    break
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name = running.pop(fut)
+                    try:
+                        status, wall = fut.result()
+                        self.report[name] = {"status": status, "wall_s": round(wall, 3)}
+                        self.log(f"[{status.upper():7}] {name} ({wall:.2f} s)")
+                        done.add(name)
+                    except Exception as e:
+                        self.report[name] = {"status": "failed", "wall_s": None, "error": f"{type(e).__name__}: {e}"}
+                        self.log(f"[FAILED ] {name}: {type(e).__name__}: {e}")
+                        for other in self.downstream(name) - set(self.report):
+                            self.report[other] = {"status": "cancelled", "wall_s": None}
+                            self.log(f"[CANCEL ] {other} (depende de {name})")
+        return self.report
@@ -0,0 +1,207 @@
+import os
+import sys
+import json
+import time
+import uuid
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# ---------------------------------------- PERFILADO POR ETAPAS ----------------------------------------
+
+# RSS actual del proceso en bytes (Linux, /proc/self/statm); None si no está disponible
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _mb(n):
+    return round(n / 2**20, 1) if n is not None else None
+
+# pila de un frame en formato "folded" (módulo:función;...), raíz primero
+def _folded(frame):
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+# muestreador de pilas cada `interval` segundos (perfil tipo flame graph, sin instrumentar el código);
+# muestrea todos los hilos del proceso (workers HTTP incluidos), con el nombre del hilo como raíz de la pila
+class StackSampler:
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.counts = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                # los hilos del propio perfilador no se cuentan
+                name = names.get(ident, str(ident))
+                if not name.startswith("profiler-"):
+                    self.counts[name + ";" + _folded(frame)] += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self, path):
+        self.stopped.set()
+        self.thread.join()
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, n in self.counts.most_common():
+                fh.write(f"{stack} {n}\n")
+
+# tiempos de un script por etapa: reloj, CPU del proceso, RSS pico (muestreado) y filas de entrada/salida.
+# mode "cprofile" vuelca un .prof por etapa y "sample" un perfil de pilas .folded en profile_dir; finish() añade
+# el resultado a docs/ingest_summary.json ("profile") y una línea por etapa al archivo de traza JSONL
+class Profiler:
+    def __init__(self, script, mode="", profile_dir="../cache/profiles", trace_path="../cache/pipeline_trace.jsonl",
+                 sample_ms=5, rss_interval=0.02, run_id=None):
+        self.script = script
+        self.mode = mode
+        self.profile_dir = profile_dir
+        self.trace_path = trace_path
+        self.sample_interval = sample_ms / 1000
+        self.rss_interval = rss_interval
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.t0 = time.perf_counter()
+        self.c0 = time.process_time()
+        self.stages = []
+        self.extra = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.open = {}
+        self.sampler = None
+
+    # hilo que anota el RSS pico de las etapas abiertas (con etapas concurrentes, el pico es el del proceso)
+    def _watch_rss(self):
+        while True:
+            with self.lock:
+                if not self.open:
+                    self.sampler = None
+                    return
+                rss = rss_bytes()
+                for rec in self.open.values():
+                    if rss is not None:
+                        rec["_peak"] = max(rec["_peak"] or 0, rss)
+            time.sleep(self.rss_interval)
+
+    @contextmanager
+    def stage(self, name):
+        rss = rss_bytes()
+        rec = {"stage": name, "started_at": datetime.now(timezone.utc).isoformat(), "rows_in": None,
+               "rows_out": None, "_peak": rss, "_rss_start": rss}
+        outer = getattr(self.local, "current", None)
+        self.local.current = rec
+        prof = sampler = None
+        if self.mode:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        if self.mode == "cprofile":
+            prof = cProfile.Profile()
+            prof.enable()
+        elif self.mode == "sample":
+            sampler = StackSampler(self.sample_interval)
+            sampler.start()
+        self._track(rec)
+        t0, c0 = time.perf_counter(), time.process_time()
+        status = "ok"
+        try:
+            yield rec
+        except BaseException:
+            status = "failed"
+            raise
+        finally:
+            wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+            base = os.path.join(self.profile_dir, f"{self.script}.{name}")
+            if prof is not None:
+                prof.disable()
+                prof.dump_stats(base + ".prof")
+            if sampler is not None:
+                sampler.stop(base + ".folded")
+            self._untrack(rec)
+            self.local.current = outer
+            rss_end = rss_bytes()
+            peaks = [p for p in [rec.pop("_peak"), rss_end] if p is not None]
+            rec.update(status=status, wall_s=round(wall, 4), cpu_s=round(cpu, 4),
+                       rss_start_mb=_mb(rec.pop("_rss_start")), peak_rss_mb=_mb(max(peaks) if peaks else None))
+            with self.lock:
+                self.stages.append(rec)
+
+    def _track(self, rec):
+        with self.lock:
+            self.open[id(rec)] = rec
+            if self.sampler is None:
+                self.sampler = threading.Thread(target=self._watch_rss, name="profiler-rss", daemon=True)
+                self.sampler.start()
+
+    def _untrack(self, rec):
+        with self.lock:
+            self.open.pop(id(rec), None)
+
+    # filas de entrada y salida de la etapa en curso (del hilo actual); fuera de una etapa no hace nada
+    def rows(self, rows_in=None, rows_out=None):
+        rec = getattr(self.local, "current", None)
+        if rec is None:
+            return
+        if rows_in is not None:
+            rec["rows_in"] = int(rows_in)
+        if rows_out is not None:
+            rec["rows_out"] = int(rows_out)
+
+    # sección adicional del perfil (peticiones HTTP, cachés...)
+    def set(self, key, value):
+        with self.lock:
+            self.extra[key] = value
+
+    def report(self):
+        with self.lock:
+            return {
+                "run_id": self.run_id,
+                "started_at": self.started_at,
+                "wall_s": round(time.perf_counter() - self.t0, 4),
+                "cpu_s": round(time.process_time() - self.c0, 4),
+                "stages": list(self.stages),
+                **self.extra,
+            }
+
+    # guarda el perfil en summary_path["profile"][script] (conserva el resto del archivo)
+    # y añade a la traza una línea por etapa y otra para el script completo
+    def finish(self, summary_path):
+        report = self.report()
+        summary = {}
+        if os.path.exists(summary_path):
+            with open(summary_path, "r", encoding="utf-8") as fh:
+                summary = json.load(fh)
+        summary.setdefault("profile", {})[self.script] = report
+        with open(summary_path, "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, indent=2, ensure_ascii=False)
+
+        if self.trace_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.trace_path)), exist_ok=True)
+            base = {"run_id": self.run_id, "script": self.script}
+            with open(self.trace_path, "a", encoding="utf-8") as fh:
+                for rec in report["stages"]:
+                    fh.write(json.dumps({**base, "kind": "stage", **rec}, ensure_ascii=False) + "\n")
+                totals = {k: v for k, v in report.items() if k not in ("run_id", "stages")}
+                fh.write(json.dumps({**base, "kind": "script", **totals}, ensure_ascii=False) + "\n")
+        return report
+
+# perfilador de un script configurado con PROFILE_MODE, PROFILE_DIR, PROFILE_TRACE_PATH y PIPELINE_RUN_ID
+def profiler_from_env(script):
+    return Profiler(
+        script,
+        mode=os.getenv('PROFILE_MODE', ''),
+        profile_dir=os.getenv('PROFILE_DIR', '../cache/profiles'),
+        trace_path=os.getenv('PROFILE_TRACE_PATH', '../cache/pipeline_trace.jsonl'),
+        sample_ms=float(os.getenv('PROFILE_SAMPLE_MS', '5')),
+        run_id=os.getenv('PIPELINE_RUN_ID') or None,
+    )
@@ -1,5 +1,8 @@
+import re
 import hashlib
-from datetime import datetime, timezone
+import threading
+from functools import lru_cache
+from datetime import date, datetime, timezone
 from dateutil import parser as dateparser
 
 # -------------------- LIMPIEZA DE DATOS --------------------
@@ -20,20 +23,71 @@ def normalize_pub_date(d):
     d = str(d).strip()
     if d == "":
         return None
-    
+    return _parse_pub_date(d)
+
+# tamaño de la caché LRU de fechas (cadena -> ISO); los valores se repiten mucho entre filas y grupos
+DATE_CACHE_SIZE = 65536
+
+# contadores por camino de resolución (valores distintos; los aciertos de caché van aparte)
+DATE_PARSE_STATS = {"short": 0, "fast": 0, "dateutil": 0, "failed": 0}
+DATE_PARSE_LOCK = threading.Lock()
+
+# suma `n` al contador del camino `path` (la normalización puede correr en varios hilos)
+def count_date_parse(path, n=1):
+    with DATE_PARSE_LOCK:
+        DATE_PARSE_STATS[path] += n
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+
+# formas habituales de Google Books / Goodreads: YYYY-MM-DD, YYYY/MM/DD y "Month D, YYYY"
+DATE_YMD = re.compile(r"([0-9]{4})[-/]([0-9]{1,2})[-/]([0-9]{1,2})")
+DATE_MDY = re.compile(r"([A-Za-z]+) ([0-9]{1,2}),? ([1-9][0-9]{3})")
+
+# reconoce las formas comunes sin dateutil; None si no aplica o la fecha no es válida
+def _fast_pub_date(d):
+    m = DATE_YMD.fullmatch(d)
+    if m:
+        y, mo, day = int(m.group(1)), int(m.group(2)), int(m.group(3))
+    else:
+        m = DATE_MDY.fullmatch(d)
+        if not m or m.group(1).lower() not in MONTHS:
+            return None
+        y, mo, day = int(m.group(3)), MONTHS[m.group(1).lower()], int(m.group(2))
+    try:
+        return date(y, mo, day).isoformat()
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_pub_date(d):
+    # Si solo dígitos y 4 chars => año; si coincide con YYYY-MM se deja igual
+    if (d.isdigit() and len(d) == 4) or (len(d) == 7 and d[4] == '-'):
+        count_date_parse("short")
+        return d
+    iso = _fast_pub_date(d)
+    if iso is not None:
+        count_date_parse("fast")
+        return iso
+    # último recurso: parse completo con dateutil
     try:
-        # Si solo dígitos y 4 chars => año
-        if d.isdigit() and len(d) == 4:
-            return d  
-        # Si coincide con YYYY-MM
-        if len(d) == 7 and d[4] == '-':
-            return d
-        # parse completo
         dt = dateparser.parse(d, fuzzy=True)
+        count_date_parse("dateutil")
         return dt.date().isoformat()  
     except Exception:
+        count_date_parse("failed")
         return None
 
+# contadores de fechas para ingest_summary.json
+def date_parse_stats():
+    info = _parse_pub_date.cache_info()
+    with DATE_PARSE_LOCK:
+        return dict(DATE_PARSE_STATS, cache_hits=info.hits, cache_size=info.currsize)
+
 # mapeos simplificados para idiomas y monedas, dominios
 LANG_ALIAS = {
     "eng": "en", "en-US": "en", "en_US": "en", "english": "en",
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+# ---------------------------------------- ESTADO DE CRAWL ----------------------------------------
+
+# clave estable de un libro: book_url sin query ni fragmento (Goodreads añade qid/rank por búsqueda)
+def book_key(book_url):
+    parts = urlsplit(book_url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+# almacén SQLite por book_url: última vez visto/descargado, ISBNs y hash del HTML de detalle
+class CrawlState:
+    def __init__(self, path, stale_seconds=30 * 86400):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS books ("
+            " book_key TEXT PRIMARY KEY, book_url TEXT, isbn10 TEXT, isbn13 TEXT, html_hash TEXT,"
+            " first_seen REAL, last_seen REAL, last_fetched REAL)"
+        )
+        self.conn.commit()
+        self.stats = {"fetched": 0, "reused": 0, "changed": 0}
+
+    # devuelve el estado guardado si la ficha sigue vigente; None si es nueva o está caducada
+    def fresh(self, book_url):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT isbn10, isbn13, last_fetched FROM books WHERE book_key = ?", (book_key(book_url),)
+            ).fetchone()
+        if row is None or time.time() - row[2] > self.stale_seconds:
+            return None
+        return {"isbn10": row[0], "isbn13": row[1]}
+
+    # marca el libro como visto en la búsqueda sin volver a descargar su página
+    def touch(self, book_url):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE books SET last_seen = ?, book_url = ? WHERE book_key = ?",
+                (time.time(), book_url, book_key(book_url)),
+            )
+            self.conn.commit()
+            self.stats["reused"] += 1
+
+    # guarda el resultado de una descarga de detalle
+    def record(self, book_url, isbn10, isbn13, html_hash):
+        now = time.time()
+        key = book_key(book_url)
+        with self.lock:
+            prev = self.conn.execute("SELECT html_hash FROM books WHERE book_key = ?", (key,)).fetchone()
+            if prev is not None and prev[0] != html_hash:
+                self.stats["changed"] += 1
+            self.conn.execute(
+                "INSERT INTO books(book_key, book_url, isbn10, isbn13, html_hash, first_seen, last_seen, last_fetched)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(book_key) DO UPDATE SET book_url = excluded.book_url, isbn10 = excluded.isbn10,"
+                " isbn13 = excluded.isbn13, html_hash = excluded.html_hash,"
+                " last_seen = excluded.last_seen, last_fetched = excluded.last_fetched",
+                (key, book_url, isbn10, isbn13, html_hash, now, now, now),
+            )
+            self.conn.commit()
+            self.stats["fetched"] += 1
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# fusiona los registros nuevos con los ya presentes en el landing (por book_key, gana el nuevo)
+def merge_landing_records(known, new):
+    merged = {}
+    for i, r in enumerate(known):
+        merged[book_key(r["book_url"]) if r.get("book_url") else f"__known_{i}"] = r
+    order = list(merged)
+    for r in new:
+        key = book_key(r["book_url"])
+        if key not in merged:
+            order.append(key)
+        merged[key] = r
+    return [merged[k] for k in order]
+
+# ---------------------------------------- COLA DE CRAWL ----------------------------------------
+
+# clave de la tarea de búsqueda de la página n de una consulta
+def search_key(query, page):
+    return f"{query}#{page}"
+
+# cola de trabajo persistente (SQLite) para el scraping por lotes: tareas "search" (página n de una consulta) y
+# "detail" (ficha de un libro) con estado pending | running | done | failed. Cada libro se registra una sola vez por
+# book_key, así que una ficha que aparece en varias consultas se descarga una vez. Cada tarea terminada se confirma
+# en la misma transacción que lo que produce: al reabrir la cola tras una interrupción, las tareas en curso vuelven
+# a pending y el crawl sigue donde se quedó. La cola guarda su conjunto de consultas: con otras consultas empieza
+# vacía, y clear() la vacía al terminar un crawl completo
+class CrawlQueue:
+    def __init__(self, path, queries, max_attempts=3):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.queries = list(queries)
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'queries'").fetchone()
+        # otro conjunto de consultas (o una cola de otro formato): se empieza un crawl nuevo
+        self.reset = row is not None and sorted(json.loads(row[0])) != sorted(self.queries)
+        if row is None or self.reset:
+            self._drop()
+        self._create()
+        self.resumed = self.conn.execute("UPDATE tasks SET status = 'pending' WHERE status = 'running'").rowcount
+        self.conn.commit()
+
+    def _drop(self):
+        for table in ("tasks", "books", "hits"):
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        self.conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('queries', ?)",
+                          (json.dumps(sorted(self.queries), ensure_ascii=False),))
+
+    def _create(self):
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, key TEXT UNIQUE, url TEXT, query TEXT,"
+            " page INTEGER, status TEXT, attempts INTEGER DEFAULT 0, next_href TEXT, error TEXT, updated REAL)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS books (book_key TEXT PRIMARY KEY, isbn10 TEXT, isbn13 TEXT)")
+        # cada aparición de un libro en una página de búsqueda (consulta, página, posición y registro)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS hits ("
+            " book_key TEXT, query TEXT, page INTEGER, position INTEGER, record TEXT,"
+            " PRIMARY KEY (book_key, query, page))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks(status, id)")
+
+    # encola una tarea si su clave no existe ya; devuelve True si es nueva
+    def put(self, kind, key, url, query=None, page=None):
+        with self.lock:
+            inserted = self._put(kind, key, url, query, page)
+            self.conn.commit()
+        return inserted
+
+    def _put(self, kind, key, url, query, page):
+        return self.conn.execute(
+            "INSERT OR IGNORE INTO tasks(kind, key, url, query, page, status, updated)"
+            " VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+            (kind, key, url, query, page, time.time()),
+        ).rowcount == 1
+
+    # siguiente tarea pendiente (FIFO), marcada como running; None si no hay ninguna
+    def claim(self):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, kind, key, url, query, page FROM tasks WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE tasks SET status = 'running', attempts = attempts + 1, updated = ? WHERE id = ?",
+                              (time.time(), row[0]))
+            self.conn.commit()
+        return dict(zip(["id", "kind", "key", "url", "query", "page"], row))
+
+    # quedan tareas pendientes o en curso (las que están en curso pueden encolar más)
+    def active(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT 1 FROM tasks WHERE status IN ('pending', 'running') LIMIT 1"
+            ).fetchone() is not None
+
+    # página de búsqueda terminada: apariciones de sus libros (y su ficha, si el libro es nuevo) y la página
+    # siguiente, si la hay
+    def complete_search(self, task, books, next_href=None, next_url=None):
+        with self.lock:
+            for position, b in enumerate(books):
+                key = book_key(b["book_url"])
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO hits(book_key, query, page, position, record) VALUES (?, ?, ?, ?, ?)",
+                    (key, task["query"], task["page"], position, json.dumps(b, ensure_ascii=False)),
+                )
+                if self.conn.execute("INSERT OR IGNORE INTO books(book_key) VALUES (?)", (key,)).rowcount == 1:
+                    self._put("detail", key, b["book_url"], task["query"], task["page"])
+            if next_url is not None:
+                self._put("search", search_key(task["query"], task["page"] + 1), next_url,
+                          task["query"], task["page"] + 1)
+            self.conn.execute("UPDATE tasks SET status = 'done', next_href = ?, updated = ? WHERE id = ?",
+                              (next_href, time.time(), task["id"]))
+            self.conn.commit()
+
+    # ficha de detalle terminada (ISBNs del libro)
+    def complete_detail(self, task, isbn10, isbn13):
+        with self.lock:
+            self.conn.execute("UPDATE books SET isbn10 = ?, isbn13 = ? WHERE book_key = ?", (isbn10, isbn13, task["key"]))
+            self.conn.execute("UPDATE tasks SET status = 'done', updated = ? WHERE id = ?", (time.time(), task["id"]))
+            self.conn.commit()
+
+    # tarea fallida: vuelve a pending hasta max_attempts intentos; devuelve True si se reintentará
+    def fail(self, task, error):
+        with self.lock:
+            attempts = self.conn.execute("SELECT attempts FROM tasks WHERE id = ?", (task["id"],)).fetchone()[0]
+            retry = attempts < self.max_attempts
+            self.conn.execute("UPDATE tasks SET status = ?, error = ?, updated = ? WHERE id = ?",
+                              ("pending" if retry else "failed", str(error)[:500], time.time(), task["id"]))
+            self.conn.commit()
+        return retry
+
+    # búsquedas terminadas que tienen página siguiente (para ampliar el presupuesto de páginas al reanudar;
+    # put() ignora las que ya estén encoladas)
+    def open_searches(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, kind, key, url, query, page, next_href FROM tasks"
+                " WHERE kind = 'search' AND status = 'done' AND next_href IS NOT NULL"
+            ).fetchall()
+        return [dict(zip(["id", "kind", "key", "url", "query", "page", "next_href"], r)) for r in rows]
+
+    # libros de las consultas actuales en orden de primera aparición (orden de las consultas en el archivo,
+    # página, posición), con el registro de esa aparición y los ISBN de su ficha
+    def books(self):
+        rank = {q: i for i, q in enumerate(self.queries)}
+        with self.lock:
+            hits = self.conn.execute("SELECT book_key, query, page, position, record FROM hits").fetchall()
+            isbns = {k: (i10, i13) for k, i10, i13 in self.conn.execute("SELECT book_key, isbn10, isbn13 FROM books")}
+        first = {}
+        for key, query, page, position, record in hits:
+            if query not in rank:
+                continue
+            order = (rank[query], page, position)
+            if key not in first or order < first[key][0]:
+                first[key] = (order, record)
+        out = []
+        for key, (_, record) in sorted(first.items(), key=lambda kv: kv[1][0]):
+            b = json.loads(record)
+            b["isbn10"], b["isbn13"] = isbns.get(key, (None, None))
+            out.append(b)
+        return out
+
+    # {kind: {status: n}}, libros únicos y tareas reanudadas
+    def counts(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT kind, status, COUNT(*) FROM tasks GROUP BY kind, status").fetchall()
+            n_books = self.conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+        counts = {}
+        for kind, status, n in rows:
+            counts.setdefault(kind, {})[status] = n
+        return {**counts, "books": n_books, "resumed": self.resumed, "reset": self.reset}
+
+    # crawl terminado: se vacía la cola para que la siguiente ejecución vuelva a buscar desde cero
+    def clear(self):
+        with self.lock:
+            for table in ("tasks", "books", "hits"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,92 @@
+import os
+import csv
+import json
+
+# ---------------------------------------- ESCRITURA CSV EN STREAMING ----------------------------------------
+
+# escribe un CSV por tramos a medida que se producen las filas, en `path`.partial, sin acumularlas en memoria.
+# Cada `fsync_every` tramos se hace fsync y se guarda el progreso (`path`.progress.json: entradas procesadas,
+# filas y bytes confirmados, huella de la entrada). Con `resume`, si el progreso corresponde a la misma entrada
+# (`source`), se trunca el parcial al último punto confirmado y se continúa desde ahí; finalize() lo renombra
+# de forma atómica a `path`
+class ResumableCsvWriter:
+    def __init__(self, path, fieldnames, source=None, resume=True, fsync_every=1):
+        self.path = path
+        self.partial_path = path + ".partial"
+        self.progress_path = path + ".progress.json"
+        self.fieldnames = list(fieldnames)
+        self.source = source
+        self.fsync_every = max(1, int(fsync_every))
+        self.pending = 0
+        self.done = 0
+        self.rows = 0
+        self.resumed = False
+        self.writing = False
+
+        progress = self._load_progress() if resume else None
+        if progress is not None:
+            os.truncate(self.partial_path, progress["bytes"])
+            self.fh = open(self.partial_path, "a", encoding="utf-8", newline="")
+            self.done, self.rows, self.resumed = progress["done"], progress["rows"], True
+            self.writer = csv.DictWriter(self.fh, fieldnames=self.fieldnames)
+        else:
+            self.fh = open(self.partial_path, "w", encoding="utf-8", newline="")
+            self.writer = csv.DictWriter(self.fh, fieldnames=self.fieldnames)
+            self.writer.writeheader()
+            self._commit()
+
+    # progreso válido para reanudar: misma entrada, mismas columnas y parcial con al menos los bytes confirmados
+    def _load_progress(self):
+        if not (os.path.exists(self.progress_path) and os.path.exists(self.partial_path)):
+            return None
+        try:
+            with open(self.progress_path, "r", encoding="utf-8") as fh:
+                progress = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if progress.get("source") != self.source or progress.get("fieldnames") != self.fieldnames:
+            return None
+        if os.path.getsize(self.partial_path) < progress.get("bytes", 0):
+            return None
+        return progress
+
+    # fsync del parcial y, después, el progreso (escritura atómica): el progreso nunca apunta a datos no persistidos
+    def _commit(self):
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        progress = {"source": self.source, "fieldnames": self.fieldnames, "done": self.done, "rows": self.rows,
+                    "bytes": os.fstat(self.fh.fileno()).st_size}
+        tmp = self.progress_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(progress, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.progress_path)
+        self.pending = 0
+
+    # añade las filas producidas a partir de `n_inputs` registros de entrada
+    def append(self, rows, n_inputs):
+        self.writing = True
+        self.writer.writerows(rows)
+        self.rows += len(rows)
+        self.done += n_inputs
+        self.fh.flush()
+        self.writing = False
+        self.pending += 1
+        if self.pending >= self.fsync_every:
+            self._commit()
+
+    # confirma lo pendiente y publica el CSV completo con un rename atómico
+    def finalize(self):
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        self.fh.close()
+        os.replace(self.partial_path, self.path)
+        os.remove(self.progress_path)
+
+    # cierre tras un error: se confirman los tramos completos (no uno a medio escribir) para poder reanudar
+    def close(self):
+        if not self.fh.closed:
+            if not self.writing and self.pending:
+                self._commit()
+            self.fh.close()
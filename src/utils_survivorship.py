@@ -0,0 +1,138 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------- PROVENANCE E IDS SINTÉTICOS ----------------------------------------
+
+# procedencia por campo: google_books si el valor GB existe, goodreads si solo existe el GR, None si ninguno
+def pick_prov_col(df, field_gr, field_gb):
+    prov = np.select(
+        [df[field_gb].notna().to_numpy(), df[field_gr].notna().to_numpy()],
+        [np.array("google_books", dtype=object), np.array("goodreads", dtype=object)],
+        default=None,
+    )
+    return pd.Series(prov, index=df.index, dtype=object)
+
+# sha1(título|autor en minúsculas)[:16], calculado una vez por clave distinta
+def make_synthetic_ids(titles, authors):
+    keys = (titles.astype(str) + "|" + authors.astype(str)).str.lower()
+    codes, uniques = pd.factorize(keys)
+    digests = np.array([hashlib.sha1(k.encode("utf-8")).hexdigest()[:16] for k in uniques], dtype=object)
+    return pd.Series(digests[codes], index=titles.index, dtype=object)
+
+# canonical_id a partir de `id_col`: ISBN-13 si existe; si está vacío o es "nan"/"none", id sintético "synth:<sha1_16>"
+def fill_synthetic_ids(df, id_col="canonical_isbn13", title_col="title_gr", author_col="author"):
+    ids = df[id_col]
+    missing = ~ids.astype(bool) | ids.astype(str).str.lower().isin(["nan", "none"])
+    if not missing.any():
+        return ids.copy()
+    synth = "synth:" + make_synthetic_ids(df.loc[missing, title_col], df.loc[missing, author_col])
+    out = ids.astype(object).copy()
+    out[missing] = synth
+    return out
+
+# ---------------------------------------- SUPERVIVENCIA (dim_book) ----------------------------------------
+
+# reglas por campo de dim_book: (campo de salida, regla, columnas candidatas en orden de preferencia)
+#   first    -> primer valor no nulo del grupo
+#   longest  -> valor no nulo con str() más largo; empate por str() mayor y después por orden de aparición
+#   max      -> máximo no nulo
+#   date     -> fecha ISO más específica (YYYY-MM-DD > YYYY-MM > YYYY) y, a igualdad, la más reciente
+#   unique   -> lista de valores distintos en orden de aparición
+DIM_BOOK_RULES = [
+    ("isbn13", "first", ["isbn13"]),
+    ("isbn10", "longest", ["isbn10", "isbn10_gr"]),
+    ("gb_id", "longest", ["gb_id"]),
+    ("title", "longest", ["title_gr", "title"]),
+    ("subtitle", "longest", ["subtitle"]),
+    ("authors", "longest", ["authors", "author"]),
+    ("publisher", "longest", ["publisher"]),
+    # pub_date_iso = normalize_pub_date(pub_date), ya calculado en book_source_detail
+    ("pub_date", "date", ["pub_date_iso"]),
+    ("language", "longest", ["language_norm"]),
+    ("categories", "longest", ["categories"]),
+    ("price_amount", "max", ["price_amount"]),
+    ("price_currency", "longest", ["price_currency_norm"]),
+    ("rating", "max", ["rating"]),
+    ("ratings_count", "max", ["ratings_count"]),
+    ("source_ids", "unique", ["src_id"]),
+]
+
+# candidatos no nulos de varias columnas apilados: (grupo, orden de aparición, valor)
+def _stack(df, codes, cols):
+    group, order, values = [], [], []
+    n = len(df)
+    for k, c in enumerate(cols):
+        vals = df[c].to_numpy(dtype=object)
+        keep = df[c].notna().to_numpy()
+        group.append(codes[keep])
+        order.append(k * n + np.flatnonzero(keep))
+        values.append(vals[keep])
+    return np.concatenate(group), np.concatenate(order), np.concatenate(values)
+
+# primera fila de cada grupo tras ordenar con `keys` (np.lexsort: la última clave es la principal)
+def _first_per_group(n_groups, group, values, keys):
+    out = np.full(n_groups, None, dtype=object)
+    if len(group) == 0:
+        return out
+    idx = np.lexsort(keys + [group])
+    first = idx[np.r_[True, group[idx][1:] != group[idx][:-1]]]
+    out[group[first]] = values[first]
+    return out
+
+def _rule_first(df, codes, n_groups, cols):
+    group, order, values = _stack(df, codes, cols)
+    return _first_per_group(n_groups, group, values, [order])
+
+def _rule_longest(df, codes, n_groups, cols):
+    group, order, values = _stack(df, codes, cols)
+    strings = pd.Series(values, dtype=object).astype(str)
+    lengths = strings.str.len().to_numpy()
+    rank, _ = pd.factorize(strings, sort=True)
+    return _first_per_group(n_groups, group, values, [order, -rank, -lengths])
+
+def _rule_date(df, codes, n_groups, cols):
+    group, order, values = _stack(df, codes, cols)
+    lengths = pd.Series(values, dtype=object).str.len().to_numpy()
+    specificity = np.select([lengths == 10, lengths == 7, lengths == 4], [3, 2, 1], 0)
+    rank, _ = pd.factorize(values, sort=True)
+    return _first_per_group(n_groups, group, values, [-rank, -specificity])
+
+def _rule_max(df, codes, n_groups, cols):
+    ser = df[cols[0]]
+    keep = ser.notna().to_numpy()
+    best = ser[keep].groupby(codes[keep]).max()
+    out = np.full(n_groups, None, dtype=object)
+    out[best.index.to_numpy()] = best.tolist()
+    return out
+
+def _rule_unique(df, codes, n_groups, cols):
+    pairs = pd.DataFrame({"g": codes, "v": df[cols[0]].to_numpy()}).drop_duplicates()
+    pairs = pairs.sort_values("g", kind="stable")
+    bounds = np.flatnonzero(np.diff(pairs["g"].to_numpy())) + 1
+    return [list(chunk) for chunk in np.split(pairs["v"].to_numpy(), bounds)]
+
+RULES = {
+    "first": _rule_first,
+    "longest": _rule_longest,
+    "max": _rule_max,
+    "date": _rule_date,
+    "unique": _rule_unique,
+}
+
+# una fila por `key` aplicando `rules` a todo el frame a la vez (mismo orden de claves que groupby)
+def survive(df, key="canonical_id", rules=DIM_BOOK_RULES):
+    codes = df.groupby(key, sort=True).ngroup().to_numpy()
+    keep = codes >= 0
+    df, codes = df[keep], codes[keep]
+    if len(df) == 0:
+        return pd.DataFrame([])
+    n_groups = codes.max() + 1
+
+    keys = np.empty(n_groups, dtype=object)
+    keys[codes] = df[key].to_numpy(dtype=object)
+    out = {key: keys.tolist()}
+    for field, rule, cols in rules:
+        values = RULES[rule](df, codes, n_groups, cols)
+        out[field] = list(values) if isinstance(values, list) else values.tolist()
+    return pd.DataFrame(out)